@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Webhook-Lasttest und Latenz-Benchmark
+Startet den lokalen Binance-Stand-in (binance_mock_server.py) und den
+Webhook-Server (sync oder async) im selben Prozess, feuert Alerts mit fester
+Rate oder so schnell wie moeglich und misst Durchsatz, Latenz-Perzentile
+(gesamt, pro Signal und pro place_order-Stage), Thread-Anzahl und Speicher.
+Ergebnisse werden als eine JSON-Zeile pro Lauf angehaengt; mit --baseline
+wird gegen einen frueheren Lauf verglichen und bei Regression Exit-Code 1
+geliefert.
+
+Beispiel:
+  python benchmark_webhook.py --alerts 2000 --rate 200 --symbols 20 --mix LONG=4,SHORT=4,CLOSE_LONG=1,CLOSE_SHORT=1
+  python benchmark_webhook.py --server async --latency-ms 20 --baseline benchmark_results.jsonl --max-regression 15
+"""
+
+import os
+import sys
+import glob
+import json
+import math
+import time
+import random
+import resource
+import argparse
+import platform
+import threading
+import subprocess
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import binance_mock_server
+
+STAGES = ('price', 'balance', 'rules', 'positions', 'pretrade', 'sizing', 'orders', 'total')
+PERCENTILES = (50, 90, 99, 99.9)
+SAMPLE_INTERVAL_SECONDS = 0.1
+BENCH_SECRET = 'bench'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the /webhook path against the local Binance stand-in')
+    parser.add_argument('--server', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--scenario', default=None, help='label for the run; baselines are matched by scenario')
+    parser.add_argument('--alerts', type=int, default=1000, help='number of alerts to send')
+    parser.add_argument('--rate', type=float, default=0, help='alerts per second (0 = as fast as possible)')
+    parser.add_argument('--concurrency', type=int, default=32, help='max. alerts in flight')
+    parser.add_argument('--symbols', type=int, default=10, help='number of distinct symbols')
+    parser.add_argument('--mix', default='LONG=4,SHORT=4,CLOSE_LONG=1,CLOSE_SHORT=1',
+                        help='signal weights, e.g. LONG=1,SHORT=1')
+    parser.add_argument('--duplicate-rate', type=float, default=0.0, help='share of alerts resent as duplicates')
+    parser.add_argument('--risk-usd', type=float, default=10.0)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='injected exchange latency per REST call')
+    parser.add_argument('--latency-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of REST calls failing with 503')
+    parser.add_argument('--warmup', type=int, default=20, help='alerts sent before measuring')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='benchmark_results.jsonl', help="append results here ('-' = stdout only)")
+    parser.add_argument('--baseline', help='results file to compare against (last run with the same scenario)')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='allowed percent regression of p99 latency / throughput vs. baseline')
+    parser.add_argument('--log-level', default='WARNING', help='server log level during the run')
+    return parser.parse_args(argv)
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(','):
+        signal, _, weight = part.partition('=')
+        weights[signal.strip().upper()] = float(weight or 1)
+    unknown = set(weights) - {'LONG', 'SHORT', 'CLOSE_LONG', 'CLOSE_SHORT'}
+    if unknown:
+        raise SystemExit(f"Unknown signals in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {'count': 0}
+    summary = {'count': len(values), 'mean': round(sum(values) / len(values), 3), 'max': round(values[-1], 3)}
+    for pct in PERCENTILES:
+        summary[f"p{pct:g}"] = round(percentile(values, pct), 3)
+    return summary
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ResourceSampler:
+    """Samples thread count and RSS in the background while the load runs"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.threads = []
+        self.rss = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='bench-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.threads.append(threading.active_count())
+            self.rss.append(rss_mb())
+            self._stop.wait(self.interval)
+
+    def report(self):
+        return {
+            'threads_peak': max(self.threads, default=threading.active_count()),
+            'threads_end': threading.active_count(),
+            'rss_mb_start': round(self.rss[0], 1) if self.rss else None,
+            'rss_mb_peak': round(max(self.rss), 1) if self.rss else None,
+            'maxrss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        }
+
+
+class AlertGenerator:
+    """Deterministic alert stream (seeded) priced around the stand-in's current mark prices"""
+
+    def __init__(self, exchange, symbols, mix, risk_usd, duplicate_rate, secret, seed):
+        self.exchange = exchange
+        self.symbols = symbols
+        self.signals = list(mix)
+        self.weights = [mix[s] for s in self.signals]
+        self.risk_usd = risk_usd
+        self.duplicate_rate = duplicate_rate
+        self.secret = secret
+        self.random = random.Random(seed)
+        self._sent = []
+        self._seq = 0
+
+    def next(self):
+        if self._sent and self.random.random() < self.duplicate_rate:
+            return dict(self.random.choice(self._sent))
+
+        self._seq += 1
+        signal = self.random.choices(self.signals, self.weights)[0]
+        symbol = self.random.choice(self.symbols)
+        alert = {'secret': self.secret, 'signal': signal, 'symbol': symbol, 'alert_id': f"bench-{self._seq}"}
+        if signal in ('LONG', 'SHORT'):
+            mark = float(self.exchange.ticker(symbol)['price'])
+            direction = 1 if signal == 'LONG' else -1
+            entry = mark * (1 - direction * self.random.uniform(0, 0.01))
+            alert.update(
+                entry=round(entry, 6),
+                sl=round(entry * (1 - direction * 0.02), 6),
+                tp=round(entry * (1 + direction * 0.04), 6),
+                risk_usd=self.risk_usd
+            )
+        self._sent.append(alert)
+        return alert
+
+
+class Recorder:
+    """Collects per-request latencies (ms) by signal and by place_order stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_signal = defaultdict(list)
+        self.by_stage = defaultdict(list)
+        self.end_to_end = []
+        self.statuses = Counter()
+
+    def add(self, alert, status, payload, latency_ms):
+        with self._lock:
+            self.end_to_end.append(latency_ms)
+            self.by_signal[alert['signal']].append(latency_ms)
+            self.statuses[str(status)] += 1
+            for stage, elapsed in (payload or {}).get('timings_ms', {}).items():
+                self.by_stage[stage].append(elapsed)
+
+    def report(self):
+        return {
+            'latency_ms': summarize(self.end_to_end),
+            'latency_ms_by_signal': {signal: summarize(v) for signal, v in sorted(self.by_signal.items())},
+            'stage_ms': {stage: summarize(self.by_stage[stage]) for stage in STAGES if stage in self.by_stage},
+            'status_codes': dict(self.statuses)
+        }
+
+
+def setup_environment(server, mock_url, stream_url, log_level, **extra):
+    """Point the server module (imported afterwards) at the stand-in; must run before the import"""
+    # Frischer Order-Store und Signal-WAL — Orders/Signale eines frueheren Laufs kennt der neue Stand-in nicht
+    order_store = os.getenv('BENCH_ORDER_STORE_FILE', 'benchmark_orders.db')
+    signal_wal = os.getenv('BENCH_SIGNAL_WAL_FILE', 'benchmark_signal_wal.jsonl')
+    wal_root, wal_ext = os.path.splitext(signal_wal)
+    wal_files = glob.glob(f'{glob.escape(wal_root)}*{glob.escape(wal_ext)}*')  # ein File (+ .lock) pro Prozess
+    for path in (order_store, f'{order_store}-wal', f'{order_store}-shm', *wal_files):
+        if os.path.exists(path):
+            os.remove(path)
+    os.environ.update({
+        'BINANCE_MOCK_URL': mock_url,
+        'BINANCE_MOCK_STREAM_URL': stream_url,
+        'BINANCE_API_KEY': 'bench',
+        'BINANCE_SECRET_KEY': 'bench',
+        'WEBHOOK_SECRET': BENCH_SECRET,
+        'LOG_LEVEL': log_level,
+        'LOG_FILE': os.getenv('BENCH_LOG_FILE', 'benchmark_server.log'),
+        'ORDER_STORE_FILE': order_store,
+        'SIGNAL_WAL_FILE': signal_wal,
+        'WEBHOOK_SERVER_MODE': server,
+        **extra
+    })
+
+
+def wait_ready(probe, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if probe():
+            return True
+        time.sleep(0.05)
+    raise SystemExit('Server did not become ready within 30s — check benchmark_server.log')
+
+
+def rate_schedule(alerts, rate):
+    """[(offset_seconds, alert)] for a fixed rate; offset None = send as soon as a slot is free"""
+    return [(i / rate if rate else None, alert) for i, alert in enumerate(alerts)]
+
+
+def run_sync(concurrency):
+    """
+    Drive the Flask app (binance_webhook_server) from a thread pool.
+    Returns drive(schedule, on_result=None, before_send=None) → elapsed seconds;
+    `schedule` is a list of (offset_seconds, alert), see rate_schedule().
+    """
+    import binance_webhook_server as server
+
+    wait_ready(lambda: server.app.test_client().get('/readyz').status_code == 200)
+    local = threading.local()
+
+    def send(alert, scheduled_at):
+        if not hasattr(local, 'client'):
+            local.client = server.app.test_client()
+        response = local.client.post('/webhook', json=alert)
+        return response.status_code, response.get_json(silent=True), (time.perf_counter() - scheduled_at) * 1000
+
+    def drive(schedule, on_result=None, before_send=None):
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench') as pool:
+            started = time.perf_counter()
+            futures = []
+            for offset, alert in schedule:
+                scheduled_at = started + offset if offset is not None else time.perf_counter()
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                if before_send:
+                    before_send(alert)
+                futures.append((alert, pool.submit(send, alert, scheduled_at)))
+            for alert, future in futures:
+                status, payload, latency = future.result()
+                if on_result:
+                    on_result(alert, status, payload, latency)
+        return time.perf_counter() - started
+
+    return drive
+
+
+def run_async(concurrency):
+    """Drive the ASGI module's handle_webhook() on one event loop (same drive() contract as run_sync)"""
+    import asyncio
+    import binance_webhook_server_async as server
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name='bench-loop', daemon=True).start()
+    asyncio.run_coroutine_threadsafe(server._init_trader(), loop).result()
+    wait_ready(lambda: asyncio.run_coroutine_threadsafe(server.handle_readyz(None), loop).result()[1] == 200)
+
+    async def drive_async(schedule, on_result, before_send):
+        semaphore = asyncio.Semaphore(concurrency)
+        started = time.perf_counter()
+
+        async def one(alert, scheduled_at):
+            async with semaphore:
+                payload, status = await server.handle_webhook(alert)
+            if on_result:
+                on_result(alert, status, payload, (time.perf_counter() - scheduled_at) * 1000)
+
+        tasks = []
+        for offset, alert in schedule:
+            scheduled_at = started + offset if offset is not None else time.perf_counter()
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if before_send:
+                before_send(alert)
+            tasks.append(asyncio.create_task(one(alert, scheduled_at)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+    def drive(schedule, on_result=None, before_send=None):
+        return asyncio.run_coroutine_threadsafe(drive_async(schedule, on_result, before_send), loop).result()
+
+    return drive
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_baseline(path, scenario):
+    """Last result in a JSON-lines file with the same scenario label"""
+    baseline = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                result = json.loads(line)
+                if result.get('scenario') == scenario:
+                    baseline = result
+    return baseline
+
+
+def compare(result, baseline, max_regression):
+    """Returns a list of human readable regressions (empty = ok)"""
+    regressions = []
+    limit = 1 + max_regression / 100
+    checks = [('throughput_per_s', result['throughput_per_s'], baseline['throughput_per_s'], False)]
+    for key in ('p50', 'p99'):
+        checks.append((f"latency {key}", result['latency_ms'].get(key), baseline['latency_ms'].get(key), True))
+    for stage in ('total', 'orders', 'pretrade'):
+        current = result['stage_ms'].get(stage, {}).get('p99')
+        previous = baseline['stage_ms'].get(stage, {}).get('p99')
+        checks.append((f"stage {stage} p99", current, previous, True))
+
+    for name, current, previous, lower_is_better in checks:
+        if current is None or not previous:
+            continue
+        if lower_is_better and current > previous * limit:
+            regressions.append(f"{name}: {previous:.2f} → {current:.2f} ms (+{(current / previous - 1) * 100:.0f}%)")
+        if not lower_is_better and current < previous / limit:
+            regressions.append(f"{name}: {previous:.1f} → {current:.1f}/s (-{(1 - current / previous) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenario = args.scenario or (
+        f"{args.server}-r{args.rate:g}-c{args.concurrency}-s{args.symbols}-l{args.latency_ms:g}-{args.mix}"
+    )
+
+    mock = binance_mock_server.MockBinanceServer(
+        port=0, stream_port=0, exchange=binance_mock_server.MockExchange(symbol_count=args.symbols)
+    )
+    mock.faults.configure(latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms)
+    mock.start()
+    setup_environment(args.server, mock.url, mock.stream_url, args.log_level)
+
+    symbols = [f"MOCK{i}USDT" for i in range(args.symbols)]
+    generator = AlertGenerator(
+        mock.exchange, symbols, parse_mix(args.mix), args.risk_usd, args.duplicate_rate, BENCH_SECRET, args.seed
+    )
+    drive = run_async(args.concurrency) if args.server == 'async' else run_sync(args.concurrency)
+
+    if args.warmup:
+        drive(rate_schedule([generator.next() for _ in range(args.warmup)], args.rate))
+
+    # Fehler erst nach dem Warmup injizieren, damit der Start nicht scheitert
+    mock.faults.configure(error_rate=args.error_rate)
+    alerts = [generator.next() for _ in range(args.alerts)]
+    recorder = Recorder()
+    sampler = ResourceSampler().start()
+    elapsed = drive(rate_schedule(alerts, args.rate), recorder.add)
+    sampler.stop()
+
+    result = {
+        'scenario': scenario,
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline', 'log_level')},
+        'alerts': len(alerts),
+        'duration_s': round(elapsed, 3),
+        'throughput_per_s': round(len(alerts) / elapsed, 2) if elapsed else None,
+        **recorder.report(),
+        'resources': sampler.report(),
+        'exchange': {
+            'rest_requests': mock.exchange.requests,
+            'injected_errors': mock.faults.injected_errors
+        }
+    }
+    mock.stop()
+
+    # Baseline vor dem Anhaengen lesen — --baseline und --output duerfen dieselbe Datei sein
+    baseline = load_baseline(args.baseline, scenario) if args.baseline and os.path.exists(args.baseline) else None
+
+    print(json.dumps(result, indent=2))
+    if args.output and args.output != '-':
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(result, separators=(',', ':')) + '\n')
+
+    if args.baseline:
+        if baseline is None:
+            print(f"No baseline for scenario '{scenario}' in {args.baseline}", file=sys.stderr)
+            return 0
+        regressions = compare(result, baseline, args.max_regression)
+        if regressions:
+            print(f"❌ Regression vs. {baseline.get('git_revision')} ({baseline['timestamp']}):", file=sys.stderr)
+            for line in regressions:
+                print(f"   {line}", file=sys.stderr)
+            return 1
+        print(f"✅ Within {args.max_regression:g}% of baseline {baseline.get('git_revision')}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,847 @@
+#!/usr/bin/env python3
+"""
+Lokaler Binance-Futures-Stand-in fuer Offline-Tests und Benchmarks
+Bildet die vom Webhook-Server genutzten REST-Endpoints (exchangeInfo,
+account, ticker/price, positionRisk, order/batchOrders/openOrders/allOrders,
+listenKey) und die Websocket-Streams (Mark-Preise, User-Data) nach — mit
+einfachem Limit-Order-Matching gegen einen Random-Walk-Mark-Preis,
+konfigurierbarer Latenz und Fehler-Injektion. Signierte Requests
+ausserhalb von timestamp/recvWindow scheitern wie bei Binance mit -1021
+(Uhrversatz ueber MOCK_CLOCK_SKEW_MS).
+
+Start:  python binance_mock_server.py
+Bot:    BINANCE_MOCK_URL=http://127.0.0.1:18080 gunicorn binance_webhook_server:app
+Laufzeit-Steuerung: POST /mock/config, POST /mock/price, POST /mock/reset, GET /mock/state
+"""
+
+import os
+import json
+import time
+import random
+import queue
+import threading
+import logging
+from decimal import Decimal
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+from websockets.sync.server import serve as ws_serve
+from websockets.exceptions import ConnectionClosed
+
+logger = logging.getLogger('binance_mock')
+
+# ── Konfiguration ───────────────────────────────────────────────────────────
+MOCK_HOST = os.getenv('MOCK_HOST', '127.0.0.1')
+MOCK_PORT = int(os.getenv('MOCK_PORT', '18080'))
+MOCK_STREAM_PORT = int(os.getenv('MOCK_STREAM_PORT', str(MOCK_PORT + 1)))
+MOCK_BALANCE = float(os.getenv('MOCK_BALANCE', '10000'))
+MOCK_SYMBOL_COUNT = int(os.getenv('MOCK_SYMBOL_COUNT', '0'))  # zusaetzliche synthetische Symbole MOCK<n>USDT
+MOCK_LEVERAGE = 20
+MOCK_PRICE_TICK_SECONDS = float(os.getenv('MOCK_PRICE_TICK_SECONDS', '1'))  # wie !markPrice@arr@1s
+MOCK_VOLATILITY_BPS = float(os.getenv('MOCK_VOLATILITY_BPS', '5'))  # Std.-Abw. des Random Walk pro Tick
+# Fehler-Injektion / Latenz (zur Laufzeit per POST /mock/config aenderbar)
+MOCK_LATENCY_MS = float(os.getenv('MOCK_LATENCY_MS', '0'))
+MOCK_LATENCY_JITTER_MS = float(os.getenv('MOCK_LATENCY_JITTER_MS', '0'))
+MOCK_ERROR_RATE = float(os.getenv('MOCK_ERROR_RATE', '0'))  # Anteil der Requests mit HTTP 503 / -1001
+MOCK_TIMEOUT_RATE = float(os.getenv('MOCK_TIMEOUT_RATE', '0'))  # Anteil der Requests, die MOCK_TIMEOUT_SECONDS haengen
+MOCK_TIMEOUT_SECONDS = float(os.getenv('MOCK_TIMEOUT_SECONDS', '15'))
+MOCK_ERROR_PATHS = [p for p in os.getenv('MOCK_ERROR_PATHS', '').split(',') if p]  # leer = alle Endpoints
+MOCK_STREAM_DELAY_MS = float(os.getenv('MOCK_STREAM_DELAY_MS', '0'))  # User-Data-Events kommen N ms verspaetet an
+MOCK_CLOCK_SKEW_MS = float(os.getenv('MOCK_CLOCK_SKEW_MS', '0'))  # Serverzeit des Stand-ins geht um N ms vor (-: nach)
+DEFAULT_RECV_WINDOW_MS = 5000
+GTD_MIN_SECONDS = 600  # goodTillDate (auf Sekunden abgeschnitten) muss mehr als 600s nach Eingang liegen
+MAX_RECV_WINDOW_MS = 60000
+
+# symbol -> (Startpreis, tickSize, stepSize, minNotional)
+DEFAULT_SYMBOLS = {
+    'BTCUSDT': ('65000', '0.10', '0.001', '100'),
+    'ETHUSDT': ('3200', '0.01', '0.001', '20'),
+    'SOLUSDT': ('150', '0.0100', '1', '5'),
+    'XRPUSDT': ('0.55', '0.0001', '0.1', '5'),
+}
+
+REQUEST_WEIGHTS = {('GET', 'account'): 5, ('GET', 'positionRisk'): 5, ('POST', 'batchOrders'): 5, ('GET', 'allOrders'): 5}
+
+
+class MockError(Exception):
+    """Binance-artiger Fehler: HTTP-Status plus {'code', 'msg'}"""
+
+    def __init__(self, code, msg, status=400):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+
+def _fmt(value):
+    return format(Decimal(str(value)).normalize(), 'f')
+
+
+def _decimals(step):
+    return max(0, -Decimal(step).normalize().as_tuple().exponent)
+
+
+class FaultInjector:
+    """Latenz und zufaellige Fehler pro REST-Request"""
+
+    def __init__(self):
+        self.latency_ms = MOCK_LATENCY_MS
+        self.latency_jitter_ms = MOCK_LATENCY_JITTER_MS
+        self.error_rate = MOCK_ERROR_RATE
+        self.timeout_rate = MOCK_TIMEOUT_RATE
+        self.timeout_seconds = MOCK_TIMEOUT_SECONDS
+        self.error_paths = list(MOCK_ERROR_PATHS)
+        self.stream_delay_ms = MOCK_STREAM_DELAY_MS
+        self.injected_errors = 0
+        self.injected_timeouts = 0
+
+    def configure(self, **settings):
+        for name, value in settings.items():
+            if not hasattr(self, name) or name.startswith('injected_'):
+                raise MockError(-1102, f"Unknown mock setting '{name}'")
+            setattr(self, name, list(value) if name == 'error_paths' else float(value))
+
+    def apply(self, path):
+        """Sleep for the configured latency; raise MockError for an injected failure"""
+        delay = self.latency_ms + random.uniform(0, self.latency_jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self.error_paths and path not in self.error_paths:
+            return
+        roll = random.random()
+        if roll < self.timeout_rate:
+            self.injected_timeouts += 1
+            time.sleep(self.timeout_seconds)
+        elif roll < self.timeout_rate + self.error_rate:
+            self.injected_errors += 1
+            raise MockError(-1001, 'Internal error; unable to process your request. Please try again.', 503)
+
+    def snapshot(self):
+        return {name: value for name, value in vars(self).items()}
+
+
+class MockExchange:
+    """
+    Zustand eines einzelnen Futures-Accounts: Symbole, Mark-Preise, Orders,
+    Positionen (One-Way 'BOTH' oder Hedge 'LONG'/'SHORT') und Wallet.
+    LIMIT-Orders fuellen zum Limit-Preis, sobald der Mark-Preis sie kreuzt;
+    MARKET-Orders sofort zum Mark-Preis; STOP_/TAKE_PROFIT_MARKET beim
+    Ueberschreiten des stopPrice. Alle Aenderungen erzeugen die passenden
+    ORDER_TRADE_UPDATE / ACCOUNT_UPDATE Events fuer den User-Data-Stream.
+    """
+
+    def __init__(self, balance=MOCK_BALANCE, symbol_count=MOCK_SYMBOL_COUNT):
+        self._lock = threading.RLock()
+        self._subscribers = set()  # queue.SimpleQueue je User-Data-Verbindung
+        self._initial_balance = balance
+        self._symbol_count = symbol_count
+        self.clock_skew_ms = MOCK_CLOCK_SKEW_MS
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.symbols = {}
+            for symbol, spec in DEFAULT_SYMBOLS.items():
+                self.add_symbol(symbol, *spec)
+            for i in range(self._symbol_count):
+                self.add_symbol(f"MOCK{i}USDT", '10', '0.001', '1', '5')
+            self.wallet_balance = Decimal(str(self._initial_balance))
+            self.orders = {}  # orderId -> Order im Binance-Schema
+            self.open_order_ids = set()
+            self.client_order_ids = {}  # clientOrderId -> orderId (offene Orders)
+            self.positions = {}  # (symbol, positionSide) -> {'amount', 'entry'}
+            self.listen_keys = set()
+            self.next_order_id = 1000000
+            self.requests = 0
+
+    def add_symbol(self, symbol, price, tick_size=None, step_size=None, min_notional='5'):
+        """List a symbol; tick/step default to sizes that fit the price magnitude"""
+        price = Decimal(str(price))
+        magnitude = price.adjusted()  # Zehnerpotenz des Preises
+        tick_size = tick_size or Decimal(1).scaleb(min(0, magnitude - 5))
+        step_size = step_size or Decimal(1).scaleb(min(0, 1 - magnitude))
+        self.symbols[symbol] = {
+            'price': Decimal(price),
+            'tick': Decimal(tick_size),
+            'step': Decimal(step_size),
+            'min_notional': Decimal(min_notional),
+        }
+
+    # ── Markt ────────────────────────────────────────────────────────────────
+
+    def exchange_info(self):
+        symbols = []
+        for symbol, s in self.symbols.items():
+            symbols.append({
+                'symbol': symbol,
+                'status': 'TRADING',
+                'contractType': 'PERPETUAL',
+                'baseAsset': symbol[:-4],
+                'quoteAsset': 'USDT',
+                'pricePrecision': _decimals(s['tick']),
+                'quantityPrecision': _decimals(s['step']),
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'tickSize': _fmt(s['tick']), 'minPrice': _fmt(s['tick']),
+                     'maxPrice': '1000000'},
+                    {'filterType': 'LOT_SIZE', 'stepSize': _fmt(s['step']), 'minQty': _fmt(s['step']),
+                     'maxQty': '1000000'},
+                    {'filterType': 'MARKET_LOT_SIZE', 'stepSize': _fmt(s['step']), 'minQty': _fmt(s['step']),
+                     'maxQty': '100000'},
+                    {'filterType': 'MIN_NOTIONAL', 'notional': _fmt(s['min_notional'])},
+                    {'filterType': 'PERCENT_PRICE', 'multiplierUp': '1.0500', 'multiplierDown': '0.9500',
+                     'multiplierDecimal': '4'},
+                ]
+            })
+        return {'timezone': 'UTC', 'serverTime': self.now_ms(), 'rateLimits': [], 'assets': [], 'symbols': symbols}
+
+    def now_ms(self):
+        return int(time.time() * 1000 + self.clock_skew_ms)
+
+    def check_timestamp(self, params):
+        """Binance's window for signed requests: at most 1s ahead of server time, at most recvWindow behind"""
+        if 'timestamp' not in params:
+            return
+        now, timestamp = self.now_ms(), int(params['timestamp'])
+        recv_window = min(int(params.get('recvWindow') or DEFAULT_RECV_WINDOW_MS), MAX_RECV_WINDOW_MS)
+        if timestamp > now + 1000:
+            raise MockError(-1021, "Timestamp for this request was 1000ms ahead of the server's time.")
+        if now - timestamp > recv_window:
+            raise MockError(-1021, 'Timestamp for this request is outside of the recvWindow.')
+
+    def _symbol(self, symbol):
+        s = self.symbols.get(symbol)
+        if s is None:
+            raise MockError(-1121, 'Invalid symbol.')
+        return s
+
+    def ticker(self, symbol=None):
+        with self._lock:
+            if symbol:
+                return {'symbol': symbol, 'price': _fmt(self._symbol(symbol)['price']), 'time': self.now_ms()}
+            return [{'symbol': sym, 'price': _fmt(s['price']), 'time': self.now_ms()} for sym, s in self.symbols.items()]
+
+    def mark_prices(self):
+        """Payload of one !markPrice@arr@1s message"""
+        now = self.now_ms()
+        with self._lock:
+            return [
+                {'e': 'markPriceUpdate', 'E': now, 's': symbol, 'p': _fmt(s['price']), 'P': _fmt(s['price']),
+                 'r': '0.00010000', 'T': now}
+                for symbol, s in self.symbols.items()
+            ]
+
+    def set_price(self, symbol, price):
+        with self._lock:
+            s = self._symbol(symbol)
+            s['price'] = (Decimal(str(price)) / s['tick']).quantize(Decimal(1)) * s['tick']
+            events = self._match(symbol)
+        self._publish(events)
+
+    def tick(self):
+        """Advance every mark price by one random-walk step and run matching"""
+        events = []
+        with self._lock:
+            for symbol, s in self.symbols.items():
+                move = Decimal(str(random.gauss(0, MOCK_VOLATILITY_BPS / 10000)))
+                price = (s['price'] * (1 + move) / s['tick']).quantize(Decimal(1)) * s['tick']
+                s['price'] = max(price, s['tick'])
+                events += self._match(symbol)
+            events += self._expire_gtd()
+        self._publish(events)
+
+    # ── Account ──────────────────────────────────────────────────────────────
+
+    def _unrealized(self, symbol, pos):
+        return (self.symbols[symbol]['price'] - pos['entry']) * pos['amount']
+
+    def _position_rows(self):
+        rows = []
+        for (symbol, side), pos in self.positions.items():
+            rows.append({
+                'symbol': symbol,
+                'positionSide': side,
+                'positionAmt': _fmt(pos['amount']),
+                'entryPrice': _fmt(pos['entry']),
+                'markPrice': _fmt(self.symbols[symbol]['price']),
+                'unrealizedProfit': _fmt(self._unrealized(symbol, pos)),
+                'unRealizedProfit': _fmt(self._unrealized(symbol, pos)),
+                'leverage': str(MOCK_LEVERAGE),
+                'marginType': 'cross',
+                'isolatedMargin': '0',
+                'updateTime': self.now_ms()
+            })
+        return rows
+
+    def account(self):
+        with self._lock:
+            unrealized = sum((self._unrealized(s, p) for (s, _), p in self.positions.items()), Decimal(0))
+            margin = sum((abs(p['amount']) * p['entry'] / MOCK_LEVERAGE for p in self.positions.values()), Decimal(0))
+            available = max(Decimal(0), self.wallet_balance + unrealized - margin)
+            positions = self._position_rows()
+            known = {p['symbol'] for p in positions}
+            positions += [
+                {'symbol': symbol, 'positionSide': 'BOTH', 'positionAmt': '0', 'entryPrice': '0',
+                 'unrealizedProfit': '0', 'leverage': str(MOCK_LEVERAGE)}
+                for symbol in self.symbols if symbol not in known
+            ]
+            return {
+                'totalWalletBalance': _fmt(self.wallet_balance),
+                'totalUnrealizedProfit': _fmt(unrealized),
+                'totalMarginBalance': _fmt(self.wallet_balance + unrealized),
+                'availableBalance': _fmt(available),
+                'maxWithdrawAmount': _fmt(available),
+                'assets': [{
+                    'asset': 'USDT',
+                    'walletBalance': _fmt(self.wallet_balance),
+                    'unrealizedProfit': _fmt(unrealized),
+                    'availableBalance': _fmt(available)
+                }],
+                'positions': positions
+            }
+
+    def position_risk(self, symbol=None):
+        with self._lock:
+            if symbol:
+                self._symbol(symbol)
+            rows = [r for r in self._position_rows() if symbol is None or r['symbol'] == symbol]
+            if symbol and not rows:
+                rows = [{'symbol': symbol, 'positionSide': 'BOTH', 'positionAmt': '0', 'entryPrice': '0',
+                         'markPrice': _fmt(self.symbols[symbol]['price']), 'unRealizedProfit': '0',
+                         'leverage': str(MOCK_LEVERAGE)}]
+            return rows
+
+    # ── Orders ───────────────────────────────────────────────────────────────
+
+    def create_order(self, params):
+        with self._lock:
+            order, events = self._create_order(params)
+        self._publish(events)
+        return order
+
+    def batch_orders(self, batch):
+        results, events = [], []
+        with self._lock:
+            for params in batch:
+                try:
+                    order, order_events = self._create_order(params)
+                    results.append(order)
+                    events += order_events
+                except MockError as e:
+                    results.append({'code': e.code, 'msg': e.msg})
+        self._publish(events)
+        return results
+
+    def _create_order(self, params):
+        symbol = params.get('symbol')
+        s = self._symbol(symbol)
+        side = params.get('side')
+        order_type = params.get('type')
+        if side not in ('BUY', 'SELL'):
+            raise MockError(-1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        if order_type not in ('LIMIT', 'MARKET', 'STOP_MARKET', 'TAKE_PROFIT_MARKET'):
+            raise MockError(-1116, 'Invalid orderType.')
+
+        client_order_id = params.get('newClientOrderId') or f"mock-{self.next_order_id}"
+        if client_order_id in self.client_order_ids:
+            raise MockError(-4116, 'ClientOrderId is duplicated.')
+
+        close_position = str(params.get('closePosition', 'false')).lower() == 'true'
+        reduce_only = str(params.get('reduceOnly', 'false')).lower() == 'true'
+        quantity = Decimal(str(params.get('quantity') or '0'))
+        if not close_position:
+            if quantity <= 0 or quantity % s['step'] != 0:
+                raise MockError(-1111, 'Precision is over the maximum defined for this asset.')
+
+        price = Decimal(str(params.get('price') or '0'))
+        stop_price = Decimal(str(params.get('stopPrice') or '0'))
+        time_in_force = params.get('timeInForce', 'GTC' if order_type == 'LIMIT' else None)
+        if order_type == 'LIMIT':
+            if price <= 0 or price % s['tick'] != 0:
+                raise MockError(-1111, 'Precision is over the maximum defined for this asset.')
+            if not reduce_only and price * quantity < s['min_notional']:
+                raise MockError(-4164, f"Order's notional must be no smaller than {_fmt(s['min_notional'])}")
+            good_till_date = int(params.get('goodTillDate') or 0) // 1000 * 1000
+            if time_in_force == 'GTD' and good_till_date <= self.now_ms() + GTD_MIN_SECONDS * 1000:
+                raise MockError(-5040, 'The goodTillDate timestamp must be greater than the current time '
+                                       'plus 600 seconds and smaller than 253402300799000.')
+        if order_type in ('STOP_MARKET', 'TAKE_PROFIT_MARKET') and stop_price <= 0:
+            raise MockError(-1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.")
+
+        position_side = params.get('positionSide', 'BOTH')
+        if reduce_only and not self._reduces(symbol, position_side, side):
+            raise MockError(-2022, 'ReduceOnly Order is rejected.')
+
+        self.next_order_id += 1
+        now = self.now_ms()
+        order = {
+            'orderId': self.next_order_id,
+            'symbol': symbol,
+            'status': 'NEW',
+            'clientOrderId': client_order_id,
+            'price': _fmt(price),
+            'avgPrice': '0',
+            'origQty': _fmt(quantity),
+            'executedQty': '0',
+            'cumQuote': '0',
+            'timeInForce': time_in_force or 'GTC',
+            'type': order_type,
+            'origType': order_type,
+            'reduceOnly': reduce_only,
+            'closePosition': close_position,
+            'side': side,
+            'positionSide': position_side,
+            'stopPrice': _fmt(stop_price),
+            'workingType': params.get('workingType', 'CONTRACT_PRICE'),
+            'goodTillDate': int(params.get('goodTillDate') or 0),
+            'time': now,
+            'updateTime': now
+        }
+        self.orders[order['orderId']] = order
+        self.open_order_ids.add(order['orderId'])
+        self.client_order_ids[client_order_id] = order['orderId']
+        events = [self._order_event(order, 'NEW')]
+
+        if order_type == 'MARKET':
+            events += self._fill(order, s['price'])
+        elif order_type == 'LIMIT' and self._crosses(order, s['price']):
+            events += self._fill(order, price)
+        return dict(order), events
+
+    def _reduces(self, symbol, position_side, side):
+        pos = self.positions.get((symbol, position_side))
+        if pos is None:
+            return False
+        return (pos['amount'] > 0 and side == 'SELL') or (pos['amount'] < 0 and side == 'BUY')
+
+    @staticmethod
+    def _crosses(order, mark):
+        if order['type'] == 'LIMIT':
+            limit = Decimal(order['price'])
+            return mark <= limit if order['side'] == 'BUY' else mark >= limit
+        stop = Decimal(order['stopPrice'])
+        rising = (order['type'] == 'STOP_MARKET') == (order['side'] == 'BUY')
+        return mark >= stop if rising else mark <= stop
+
+    def _match(self, symbol):
+        mark = self.symbols[symbol]['price']
+        events = []
+        for order_id in sorted(self.open_order_ids):
+            order = self.orders[order_id]
+            if order['symbol'] != symbol or order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+                continue
+            if self._crosses(order, mark):
+                fill_price = Decimal(order['price']) if order['type'] == 'LIMIT' else mark
+                events += self._fill(order, fill_price)
+        return events
+
+    def _expire_gtd(self):
+        now = self.now_ms()
+        events = []
+        for order_id in list(self.open_order_ids):
+            order = self.orders[order_id]
+            if order['timeInForce'] == 'GTD' and order['goodTillDate'] and now >= order['goodTillDate']:
+                events.append(self._finish(order, 'EXPIRED'))
+        return events
+
+    def _fill(self, order, price):
+        quantity = Decimal(order['origQty'])
+        key = (order['symbol'], order['positionSide'])
+        if order['closePosition']:
+            pos = self.positions.get(key)
+            closes = pos is not None and self._reduces(order['symbol'], order['positionSide'], order['side'])
+            if not closes:
+                return [self._finish(order, 'EXPIRED')]
+            quantity = abs(pos['amount'])
+            order['origQty'] = _fmt(quantity)
+
+        signed = quantity if order['side'] == 'BUY' else -quantity
+        if order['reduceOnly'] or order['closePosition']:
+            pos = self.positions.get(key)
+            held = pos['amount'] if pos else Decimal(0)
+            signed = max(signed, -held) if held > 0 else min(signed, -held)
+            quantity = abs(signed)
+        if quantity == 0:
+            return [self._finish(order, 'EXPIRED')]
+
+        self._apply_fill(key, signed, price)
+        order['executedQty'] = _fmt(quantity)
+        order['avgPrice'] = _fmt(price)
+        order['cumQuote'] = _fmt(quantity * price)
+        events = [self._finish(order, 'FILLED', last_qty=quantity, last_price=price)]
+        events.append(self._account_event(key))
+        return events
+
+    def _apply_fill(self, key, signed, price):
+        pos = self.positions.get(key) or {'amount': Decimal(0), 'entry': Decimal(0)}
+        amount, entry = pos['amount'], pos['entry']
+        if amount == 0 or (amount > 0) == (signed > 0):
+            new_amount = amount + signed
+            entry = (abs(amount) * entry + abs(signed) * price) / abs(new_amount)
+        else:
+            closed = min(abs(amount), abs(signed))
+            direction = 1 if amount > 0 else -1
+            self.wallet_balance += (price - entry) * closed * direction
+            new_amount = amount + signed
+            if new_amount != 0 and (new_amount > 0) != (amount > 0):
+                entry = price  # Rest der Order eroeffnet die Gegenposition
+        if new_amount == 0:
+            self.positions.pop(key, None)
+        else:
+            self.positions[key] = {'amount': new_amount, 'entry': entry}
+
+    def _finish(self, order, status, last_qty=Decimal(0), last_price=Decimal(0)):
+        order['status'] = status
+        order['updateTime'] = self.now_ms()
+        self.open_order_ids.discard(order['orderId'])
+        self.client_order_ids.pop(order['clientOrderId'], None)
+        return self._order_event(order, 'TRADE' if status == 'FILLED' else status, last_qty, last_price)
+
+    def _order_event(self, order, execution_type, last_qty=Decimal(0), last_price=Decimal(0)):
+        now = self.now_ms()
+        return {
+            'e': 'ORDER_TRADE_UPDATE', 'E': now, 'T': now,
+            'o': {
+                's': order['symbol'], 'c': order['clientOrderId'], 'S': order['side'], 'o': order['type'],
+                'f': order['timeInForce'], 'q': order['origQty'], 'p': order['price'], 'ap': order['avgPrice'],
+                'sp': order['stopPrice'], 'x': execution_type, 'X': order['status'], 'i': order['orderId'],
+                'l': _fmt(last_qty), 'z': order['executedQty'], 'L': _fmt(last_price), 'T': now,
+                'R': order['reduceOnly'], 'ps': order['positionSide'], 'cp': order['closePosition']
+            }
+        }
+
+    def _account_event(self, key):
+        symbol, side = key
+        pos = self.positions.get(key)
+        return {
+            'e': 'ACCOUNT_UPDATE', 'E': self.now_ms(), 'T': self.now_ms(),
+            'a': {
+                'm': 'ORDER',
+                'B': [{'a': 'USDT', 'wb': _fmt(self.wallet_balance), 'cw': _fmt(self.wallet_balance), 'bc': '0'}],
+                'P': [{
+                    's': symbol,
+                    'pa': _fmt(pos['amount']) if pos else '0',
+                    'ep': _fmt(pos['entry']) if pos else '0',
+                    'up': _fmt(self._unrealized(symbol, pos)) if pos else '0',
+                    'mt': 'cross',
+                    'ps': side
+                }]
+            }
+        }
+
+    def _find_order(self, params):
+        order_id = params.get('orderId')
+        if order_id:
+            order = self.orders.get(int(order_id))
+        else:
+            order = next((o for o in self.orders.values()
+                          if o['clientOrderId'] == params.get('origClientOrderId')), None)
+        if order is None or order['symbol'] != params.get('symbol'):
+            raise MockError(-2013, 'Order does not exist.')
+        return order
+
+    def get_order(self, params):
+        with self._lock:
+            return dict(self._find_order(params))
+
+    def cancel_order(self, params):
+        with self._lock:
+            order = self._find_order(params)
+            if order['orderId'] not in self.open_order_ids:
+                raise MockError(-2011, 'Unknown order sent.')
+            event = self._finish(order, 'CANCELED')
+        self._publish([event])
+        return dict(order)
+
+    def cancel_orders(self, params):
+        order_ids = json.loads(params.get('orderIdList') or '[]')
+        results, events = [], []
+        with self._lock:
+            for order_id in order_ids:
+                order = self.orders.get(int(order_id))
+                if order is None or order['orderId'] not in self.open_order_ids:
+                    results.append({'code': -2011, 'msg': 'Unknown order sent.'})
+                    continue
+                events.append(self._finish(order, 'CANCELED'))
+                results.append(dict(order))
+        self._publish(events)
+        return results
+
+    def open_orders(self, symbol=None):
+        with self._lock:
+            return [
+                dict(self.orders[oid]) for oid in sorted(self.open_order_ids)
+                if symbol is None or self.orders[oid]['symbol'] == symbol
+            ]
+
+    def all_orders(self, symbol, start_time=0):
+        with self._lock:
+            self._symbol(symbol)
+            return [
+                dict(order) for oid, order in sorted(self.orders.items())
+                if order['symbol'] == symbol and order['time'] >= start_time
+            ]
+
+    # ── User-Data-Stream ─────────────────────────────────────────────────────
+
+    def new_listen_key(self):
+        listen_key = '%064x' % random.getrandbits(256)
+        with self._lock:
+            self.listen_keys.add(listen_key)
+        return listen_key
+
+    def subscribe(self):
+        events = queue.SimpleQueue()
+        with self._lock:
+            self._subscribers.add(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self._lock:
+            self._subscribers.discard(events)
+
+    def _publish(self, events):
+        if not events:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        published_at = time.monotonic()
+        for subscriber in subscribers:
+            for event in events:
+                subscriber.put((published_at, event))
+
+    def state(self):
+        with self._lock:
+            return {
+                'wallet_balance': float(self.wallet_balance),
+                'open_orders': len(self.open_order_ids),
+                'orders_total': len(self.orders),
+                'positions': self._position_rows(),
+                'subscribers': len(self._subscribers),
+                'requests': self.requests
+            }
+
+
+class RequestCounter:
+    """Minuten-Zaehler fuer die X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-* Header"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows = {}  # (art, intervall) -> [fensterstart, verbraucht]
+
+    def add(self, kind, interval, amount):
+        now = time.time()
+        start = now - now % interval
+        with self._lock:
+            window = self._windows.setdefault((kind, interval), [start, 0])
+            if window[0] != start:
+                window[0], window[1] = start, 0
+            window[1] += amount
+            return window[1]
+
+
+def create_app(exchange, faults):
+    """Flask app serving the futures REST endpoints for one MockExchange"""
+    app = Flask('binance_mock')
+    counter = RequestCounter()
+
+    def params():
+        merged = request.args.to_dict()
+        merged.update(request.form.to_dict())
+        return merged
+
+    @app.errorhandler(MockError)
+    def mock_error(e):
+        return jsonify({'code': e.code, 'msg': e.msg}), e.status
+
+    @app.before_request
+    def before():
+        if request.path.startswith('/mock/'):
+            return None
+        exchange.requests += 1
+        faults.apply(request.path.split('/', 3)[-1])
+        exchange.check_timestamp(params())  # nach der Latenz — wie ein Request, der spaet ankommt
+        return None
+
+    @app.after_request
+    def rate_headers(response):
+        if request.path.startswith('/fapi/'):
+            path = request.path.split('/', 3)[-1]
+            weight = REQUEST_WEIGHTS.get((request.method, path), 1)
+            response.headers['X-MBX-USED-WEIGHT-1M'] = str(counter.add('weight', 60, weight))
+            if request.method == 'POST' and path in ('order', 'batchOrders'):
+                orders = len(json.loads(params().get('batchOrders', '[]'))) if path == 'batchOrders' else 1
+                response.headers['X-MBX-ORDER-COUNT-10S'] = str(counter.add('orders', 10, orders))
+                response.headers['X-MBX-ORDER-COUNT-1M'] = str(counter.add('orders', 60, orders))
+        return response
+
+    @app.route('/api/v3/ping', methods=['GET'])
+    @app.route('/fapi/v1/ping', methods=['GET'])
+    def ping():
+        return jsonify({})
+
+    @app.route('/api/v3/time', methods=['GET'])
+    @app.route('/fapi/v1/time', methods=['GET'])
+    def server_time():
+        return jsonify({'serverTime': exchange.now_ms()})
+
+    @app.route('/fapi/v1/exchangeInfo', methods=['GET'])
+    def exchange_info():
+        return jsonify(exchange.exchange_info())
+
+    @app.route('/fapi/v1/ticker/price', methods=['GET'])
+    def ticker_price():
+        return jsonify(exchange.ticker(params().get('symbol')))
+
+    @app.route('/fapi/v2/account', methods=['GET'])
+    def account():
+        return jsonify(exchange.account())
+
+    @app.route('/fapi/v2/positionRisk', methods=['GET'])
+    def position_risk():
+        return jsonify(exchange.position_risk(params().get('symbol')))
+
+    @app.route('/fapi/v1/order', methods=['POST', 'GET', 'DELETE'])
+    def order():
+        if request.method == 'POST':
+            return jsonify(exchange.create_order(params()))
+        if request.method == 'GET':
+            return jsonify(exchange.get_order(params()))
+        return jsonify(exchange.cancel_order(params()))
+
+    @app.route('/fapi/v1/batchOrders', methods=['POST', 'DELETE'])
+    def batch_orders():
+        if request.method == 'POST':
+            batch = json.loads(params().get('batchOrders', '[]'))
+            if not 0 < len(batch) <= 5:
+                raise MockError(-1102, 'batchOrders must contain 1 to 5 orders.')
+            return jsonify(exchange.batch_orders(batch))
+        return jsonify(exchange.cancel_orders(params()))
+
+    @app.route('/fapi/v1/openOrders', methods=['GET'])
+    def open_orders():
+        return jsonify(exchange.open_orders(params().get('symbol')))
+
+    @app.route('/fapi/v1/allOrders', methods=['GET'])
+    def all_orders():
+        return jsonify(exchange.all_orders(params().get('symbol'), int(params().get('startTime') or 0)))
+
+    @app.route('/fapi/v1/listenKey', methods=['POST', 'PUT', 'DELETE'])
+    def listen_key():
+        if request.method == 'POST':
+            return jsonify({'listenKey': exchange.new_listen_key()})
+        if params().get('listenKey') not in exchange.listen_keys:
+            raise MockError(-1125, 'This listenKey does not exist.')
+        return jsonify({})
+
+    @app.route('/mock/config', methods=['GET', 'POST'])
+    def mock_config():
+        if request.method == 'POST':
+            settings = dict(request.get_json(silent=True) or {})
+            if 'clock_skew_ms' in settings:
+                exchange.clock_skew_ms = float(settings.pop('clock_skew_ms'))
+            faults.configure(**settings)
+        return jsonify(dict(faults.snapshot(), clock_skew_ms=exchange.clock_skew_ms))
+
+    @app.route('/mock/price', methods=['POST'])
+    def mock_price():
+        data = request.get_json(silent=True) or {}
+        exchange.set_price(data.get('symbol'), data.get('price'))
+        return jsonify(exchange.ticker(data.get('symbol')))
+
+    @app.route('/mock/reset', methods=['POST'])
+    def mock_reset():
+        exchange.reset()
+        return jsonify(exchange.state())
+
+    @app.route('/mock/state', methods=['GET'])
+    def mock_state():
+        return jsonify(exchange.state())
+
+    return app
+
+
+class MockBinanceServer:
+    """
+    Startet REST-Server, Websocket-Server und Preis-Ticker in Daemon-
+    Threads. Port 0 waehlt freie Ports (fuer Benchmarks/Tests im selben
+    Prozess); `url` / `stream_url` sind danach die Werte fuer
+    BINANCE_MOCK_URL / BINANCE_MOCK_STREAM_URL.
+    """
+
+    def __init__(self, host=MOCK_HOST, port=MOCK_PORT, stream_port=MOCK_STREAM_PORT,
+                 exchange=None, faults=None, tick_seconds=MOCK_PRICE_TICK_SECONDS):
+        self.host = host
+        self.exchange = exchange or MockExchange()
+        self.faults = faults or FaultInjector()
+        self.tick_seconds = tick_seconds
+        self._stop = threading.Event()
+        self._http = make_server(host, port, create_app(self.exchange, self.faults), threaded=True)
+        self._ws = ws_serve(self._handle_stream, host, stream_port, compression=None)
+        self._threads = []
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self._http.server_port}"
+
+    @property
+    def stream_url(self):
+        return f"ws://{self.host}:{self._ws.socket.getsockname()[1]}"
+
+    def start(self):
+        for target, name in ((self._http.serve_forever, 'mock-rest'), (self._ws.serve_forever, 'mock-ws'),
+                             (self._tick_loop, 'mock-ticker')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"🧪 Binance mock listening: REST {self.url}, streams {self.stream_url}")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._http.shutdown()
+        self._ws.shutdown()
+
+    def _tick_loop(self):
+        while not self._stop.wait(self.tick_seconds):
+            self.exchange.tick()
+
+    def _handle_stream(self, connection):
+        path = connection.request.path
+        if path == '/ws/!markPrice@arr@1s':
+            try:
+                while not self._stop.is_set():
+                    connection.send(json.dumps(self.exchange.mark_prices()))
+                    self._stop.wait(self.tick_seconds)
+            except ConnectionClosed:
+                pass
+            return
+
+        listen_key = path.rsplit('/', 1)[-1]
+        if listen_key not in self.exchange.listen_keys:
+            connection.close(code=1008, reason='unknown listen key')
+            return
+        events = self.exchange.subscribe()
+        try:
+            while not self._stop.is_set():
+                try:
+                    published_at, event = events.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                delay = published_at + self.faults.stream_delay_ms / 1000 - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                connection.send(json.dumps(event))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.exchange.unsubscribe(events)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = MockBinanceServer().start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
@@ -8,33 +8,2739 @@ EXIT handled by TradingView webhooks (CLOSE_LONG/CLOSE_SHORT)
 
 import os
 import sys
+import json
 import time
+import hashlib
+import random
+import heapq
 import threading
 import logging
+import logging.handlers
+import atexit
+import copy
+import gzip
+import queue
+import shutil
+import re
+import sqlite3
+import uuid
+import contextvars
+import fcntl
+import glob
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
-from flask import Flask, request, jsonify
+from decimal import Decimal, ROUND_CEILING, ROUND_DOWN, ROUND_HALF_UP
+from urllib.parse import unquote_plus
+from flask import Flask, Response, request, jsonify
 from binance.client import Client
-from binance.exceptions import BinanceAPIException
+from binance.exceptions import BinanceAPIException, BinanceRequestException
 from dotenv import load_dotenv
+from requests.exceptions import RequestException
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from websockets.sync.client import connect as ws_connect
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('binance_trading.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# ── Konfiguration Logging ───────────────────────────────────────────────────
+LOG_FILE = os.getenv('LOG_FILE', 'binance_trading.log')  # leer = nur stdout; unter gunicorn ein File pro Worker
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()  # text | json (eine JSON-Zeile pro Record)
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(50 * 1024 * 1024)))  # Groessen-Rotation (0 = aus)
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', '')  # z.B. 'midnight' → Zeit- statt Groessen-Rotation
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '10'))
+
+
+class JsonFormatter(logging.Formatter):
+    """Structured log output: one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.utcfromtimestamp(record.created).isoformat(timespec='milliseconds') + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text  # bereits vom LogQueueHandler formatiert
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler fuer einen Listener im selben Prozess: der Request-Thread
+    setzt nur die Message zusammen, Zeitstempel-/JSON-Formatierung und
+    Disk-I/O passieren im Listener-Thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _compress_rotated(source, dest):
+    """Rotator: umbenennen sofort, gzip im Hintergrund-Thread"""
+    pending = dest[:-3] + '.tmp'
+    os.replace(source, pending)
+
+    def compress():
+        try:
+            with open(pending, 'rb') as src, gzip.open(dest, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(pending)
+        except OSError as e:
+            sys.stderr.write(f"Log compression failed for {pending}: {e}\n")
+
+    threading.Thread(target=compress, name='log-compress', daemon=True).start()
+
+
+def log_file_path(path=LOG_FILE):
+    """
+    Unter gunicorn bekommt jeder Worker sein eigenes File (`<name>.<pid><ext>`):
+    die Rotation eines Handlers kennt nur den eigenen Prozess — rotieren
+    mehrere Worker dasselbe File, gehen Zeilen verloren.
+    """
+    if path and 'gunicorn' in sys.modules:
+        root, ext = os.path.splitext(path)
+        return f"{root}.{os.getpid()}{ext}"
+    return path
+
+
+def setup_logging():
+    """Route all log records through a queue; file/stdout writes happen on the listener thread"""
+    handlers = [logging.StreamHandler(sys.stdout)]
+    path = log_file_path()
+    if path and LOG_ROTATE_WHEN:
+        handlers.append(logging.handlers.TimedRotatingFileHandler(
+            path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        ))
+    elif path:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        ))
+    for file_handler in handlers[1:]:
+        file_handler.namer = lambda name: name + '.gz'
+        file_handler.rotator = _compress_rotated
+
+    formatter = JsonFormatter() if LOG_FORMAT == 'json' else \
+        logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Queue beim Beenden noch leeren
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(LogQueueHandler(log_queue))
+    return listener
+
+
+log_listener = setup_logging()
+
+
+def _restart_logging_after_fork():
+    """gunicorn --preload: im Worker fehlt der Listener-Thread des Masters, und das File gehoert dem Master"""
+    global log_listener
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, LogQueueHandler)]:
+        root.removeHandler(handler)
+    log_listener = setup_logging()
+
+
+os.register_at_fork(after_in_child=_restart_logging_after_fork)
 
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# ── Metriken (Prometheus, GET /metrics) ─────────────────────────────────────
+# Mehrere gunicorn-Worker: PROMETHEUS_MULTIPROC_DIR (leeres, beschreibbares Verzeichnis) setzen —
+# jeder Worker schreibt seine Werte dorthin, /metrics liefert die Summe ueber alle Worker
+PROMETHEUS_MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR', '')
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+WEBHOOK_LATENCY = Histogram(
+    'webhook_request_duration_seconds', 'Total /webhook handling time', ['signal', 'status'], buckets=LATENCY_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    'webhook_stage_duration_seconds', 'Webhook processing time per stage', ['stage'], buckets=LATENCY_BUCKETS
+)
+EXCHANGE_LATENCY = Histogram(
+    'binance_request_duration_seconds', 'Binance futures REST latency per endpoint', ['method', 'endpoint'],
+    buckets=LATENCY_BUCKETS
+)
+EXCHANGE_ERRORS = Counter('binance_request_errors_total', 'Failed Binance futures REST calls', ['method', 'endpoint', 'code'])
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by result (hit/miss)', ['cache', 'result'])
+PENDING_MONITORS = Gauge('pending_order_monitors', 'Entry orders awaiting fill or timeout', multiprocess_mode='livesum')
+CLOCK_OFFSET = Gauge('binance_clock_offset_seconds', 'Binance server time minus local clock, applied to signed requests',
+                     multiprocess_mode='liveall')
+CLOCK_DRIFT = Gauge('binance_clock_drift_seconds', 'Change of the clock offset between the last two syncs',
+                    multiprocess_mode='liveall')
+CLOCK_RTT = Gauge('binance_clock_sync_rtt_seconds', 'Round-trip time of the sample the last clock sync used',
+                  multiprocess_mode='liveall')
+RECV_WINDOW = Gauge('binance_recv_window_seconds', 'recvWindow sent with signed requests', multiprocess_mode='livemax')
+EXCHANGE_RETRIES = Counter('binance_request_retries_total', 'Binance futures REST calls retried after a transient failure', ['method', 'endpoint'])
+EXCHANGE_HEDGES = Counter('binance_request_hedges_total', 'Hedged duplicate reads by the request that answered first', ['endpoint', 'winner'])
+ORDERS_RECOVERED = Counter('binance_orders_recovered_total', 'Order creations with unknown outcome found on Binance by client order ID')
+CIRCUIT_STATE = Gauge('binance_circuit_state', 'Exchange circuit breaker: 0 closed, 1 half-open, 2 open',
+                      multiprocess_mode='livemax')
+KNOWN_SIGNALS = {'LONG', 'SHORT', 'CLOSE_LONG', 'CLOSE_SHORT'}  # begrenzt die Label-Kardinalitaet
+
+
+def render_metrics():
+    """Prometheus-Textformat — mit PROMETHEUS_MULTIPROC_DIR ueber alle Worker-Prozesse aggregiert"""
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def observe_stages(timings_ms):
+    """Record a timings dict (stage -> ms) into the stage histogram"""
+    for stage, elapsed_ms in timings_ms.items():
+        if stage != 'total':
+            STAGE_LATENCY.labels(stage).observe(elapsed_ms / 1000)
+
+
 # ── Konfiguration Limit-Entry ───────────────────────────────────────────────
 ENTRY_FILL_TIMEOUT_SECONDS = int(os.getenv('ENTRY_FILL_TIMEOUT_SECONDS', '300'))  # 5 Minuten Standard
 ENTRY_FILL_POLL_INTERVAL = 0.5  # Sekunden zwischen Fill-Checks
+# GTC: eigener Auto-Cancel nach Timeout | GTD: Binance laesst die Order selbst ablaufen (ueberlebt Restarts)
+ENTRY_TIME_IN_FORCE = os.getenv('ENTRY_TIME_IN_FORCE', 'GTC').upper()
+GTD_MIN_SECONDS = 600  # Binance: goodTillDate muss mehr als 600s nach Eingang der Order liegen
+GTD_MARGIN_SECONDS = 5  # Reserve ueber recvWindow hinaus (Latenz, Uhren-Drift)
+GTD_OBSERVE_GRACE_SECONDS = 10  # nach Ablauf noch so lange auf das EXPIRED-Event warten
+
+# ── Konfiguration Pre-Trade ──────────────────────────────────────────────────
+PRETRADE_WORKERS = int(os.getenv('PRETRADE_WORKERS', '8'))
+pretrade_pool = ThreadPoolExecutor(max_workers=PRETRADE_WORKERS, thread_name_prefix='pretrade')
+
+
+def timed_call(fn, *args):
+    """Run `fn(*args)` and return (result, error, elapsed_ms)"""
+    started = time.perf_counter()
+    try:
+        return fn(*args), None, (time.perf_counter() - started) * 1000
+    except Exception as e:
+        return None, e, (time.perf_counter() - started) * 1000
+
+
+# ── Konfiguration Positions-Umkehr ──────────────────────────────────────────
+# close_then_open: Gegenposition per MARKET schliessen, dann LIMIT-Entry (Standard)
+# net: gleichgerichtete Position nur um die Differenz anpassen; eine Umkehr schliesst per MARKET
+#      und wartet mit dem neuen Entry wie close_then_open am Signal-Preis
+REVERSAL_MODE = os.getenv('REVERSAL_MODE', 'close_then_open').lower()
+HEDGE_MODE = os.getenv('HEDGE_MODE', 'false').lower() == 'true'  # Account im Dual-Side-Modus (positionSide)
+
+# ── Konfiguration Order-Ausfuehrung ─────────────────────────────────────────
+USE_BATCH_ORDERS = os.getenv('USE_BATCH_ORDERS', 'true').lower() == 'true'
+BATCH_ORDER_LIMIT = 5  # Binance: max. 5 Orders pro batchOrders-Request
+PLACE_PROTECTIVE_ORDERS = os.getenv('PLACE_PROTECTIVE_ORDERS', 'false').lower() == 'true'  # SL/TP mit dem Entry senden
+
+
+class OrderRejected(Exception):
+    """Einzelne Order eines batchOrders-Requests wurde von Binance abgelehnt"""
+
+    def __init__(self, code, message):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+        self.message = message
+
+
+# ── Konfiguration Exchange-Info-Cache ───────────────────────────────────────
+EXCHANGE_INFO_TTL_SECONDS = int(os.getenv('EXCHANGE_INFO_TTL_SECONDS', '3600'))  # 1 Stunde Standard
+EXCHANGE_INFO_MISS_REFRESH_SECONDS = 60  # unbekanntes Symbol loest hoechstens alle 60s einen Reload aus
+
+
+class OrderRuleViolation(ValueError):
+    """Order verletzt einen Symbol-Filter und wird lokal abgelehnt"""
+
+
+def _to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def _round_to_step(value, step, rounding):
+    if not step:
+        return value
+    return (value / step).to_integral_value(rounding=rounding) * step
+
+
+class SymbolRules:
+    """
+    Aus den Exchange-Info-Filtern kompilierte Order-Regeln eines Symbols
+    (PRICE_FILTER, LOT_SIZE, MARKET_LOT_SIZE, MIN_NOTIONAL, PERCENT_PRICE).
+    Rechnet komplett in Decimal, damit Tick-/Step-Rundung exakt ist und
+    ungueltige Orders lokal abgelehnt werden, bevor ein Request rausgeht.
+    """
+
+    def __init__(self, symbol_info):
+        self.symbol = symbol_info['symbol']
+        filters = {f['filterType']: f for f in symbol_info.get('filters', [])}
+
+        price_filter = filters.get('PRICE_FILTER', {})
+        self.tick_size = Decimal(price_filter.get('tickSize', '0'))
+        self.min_price = Decimal(price_filter.get('minPrice', '0'))
+        self.max_price = Decimal(price_filter.get('maxPrice', '0'))  # 0 = kein Limit
+
+        lot_size = filters.get('LOT_SIZE', {})
+        self.step_size = Decimal(lot_size.get('stepSize', '0'))
+        self.min_qty = Decimal(lot_size.get('minQty', '0'))
+        self.max_qty = Decimal(lot_size.get('maxQty', '0'))
+
+        market_lot_size = filters.get('MARKET_LOT_SIZE', lot_size)
+        self.market_step_size = Decimal(market_lot_size.get('stepSize', '0')) or self.step_size
+        self.market_min_qty = Decimal(market_lot_size.get('minQty', '0'))
+        self.market_max_qty = Decimal(market_lot_size.get('maxQty', '0'))
+
+        min_notional = filters.get('MIN_NOTIONAL', {})
+        self.min_notional = Decimal(min_notional.get('notional', min_notional.get('minNotional', '5')))
+
+        percent_price = filters.get('PERCENT_PRICE')
+        if percent_price:
+            self.multiplier_up = Decimal(percent_price['multiplierUp'])
+            self.multiplier_down = Decimal(percent_price['multiplierDown'])
+        else:
+            self.multiplier_up = None
+            self.multiplier_down = None
+
+    def normalize_price(self, price):
+        """Round a price to the nearest tick"""
+        return _round_to_step(_to_decimal(price), self.tick_size, ROUND_HALF_UP)
+
+    def normalize_quantity(self, quantity, market=False):
+        """Round a quantity DOWN to the (market) step size"""
+        step = self.market_step_size if market else self.step_size
+        return _round_to_step(_to_decimal(quantity), step, ROUND_DOWN)
+
+    def min_quantity_for_notional(self, price):
+        """Smallest step-aligned quantity that satisfies MIN_NOTIONAL at `price`"""
+        quantity = _round_to_step(self.min_notional / _to_decimal(price), self.step_size, ROUND_CEILING)
+        return max(quantity, self.min_qty)
+
+    def max_quantity(self, market=False):
+        return self.market_max_qty if market else self.max_qty
+
+    def validate(self, side, quantity, price=None, mark_price=None, reduce_only=False):
+        """
+        Raise OrderRuleViolation if the order would be rejected by Binance.
+        `price=None` means MARKET order.
+        """
+        market = price is None
+        quantity = _to_decimal(quantity)
+        step = self.market_step_size if market else self.step_size
+        min_qty = self.market_min_qty if market else self.min_qty
+        max_qty = self.max_quantity(market)
+
+        if quantity <= 0:
+            raise OrderRuleViolation(f"{self.symbol}: quantity {quantity} must be positive")
+        if step and quantity % step != 0:
+            raise OrderRuleViolation(f"{self.symbol}: quantity {quantity} not a multiple of step {step}")
+        if quantity < min_qty:
+            raise OrderRuleViolation(f"{self.symbol}: quantity {quantity} below minQty {min_qty}")
+        if max_qty and quantity > max_qty:
+            raise OrderRuleViolation(f"{self.symbol}: quantity {quantity} above maxQty {max_qty}")
+
+        if market:
+            return
+
+        price = _to_decimal(price)
+        if price <= 0:
+            raise OrderRuleViolation(f"{self.symbol}: price {price} must be positive")
+        if self.tick_size and price % self.tick_size != 0:
+            raise OrderRuleViolation(f"{self.symbol}: price {price} not a multiple of tick {self.tick_size}")
+        if price < self.min_price:
+            raise OrderRuleViolation(f"{self.symbol}: price {price} below minPrice {self.min_price}")
+        if self.max_price and price > self.max_price:
+            raise OrderRuleViolation(f"{self.symbol}: price {price} above maxPrice {self.max_price}")
+
+        if not reduce_only and price * quantity < self.min_notional:
+            raise OrderRuleViolation(
+                f"{self.symbol}: notional {price * quantity} below minimum {self.min_notional}"
+            )
+
+        if mark_price and self.multiplier_up is not None:
+            mark_price = _to_decimal(mark_price)
+            if side == 'BUY' and price > mark_price * self.multiplier_up:
+                raise OrderRuleViolation(
+                    f"{self.symbol}: BUY price {price} above {self.multiplier_up} x mark {mark_price}"
+                )
+            if side == 'SELL' and price < mark_price * self.multiplier_down:
+                raise OrderRuleViolation(
+                    f"{self.symbol}: SELL price {price} below {self.multiplier_down} x mark {mark_price}"
+                )
+
+
+class SymbolInfoCache:
+    """
+    Haelt futures_exchange_info() nach Symbol indiziert im Speicher.
+    Wird einmal beim Start geladen und danach im Hintergrund alle
+    `ttl_seconds` erneuert. Gleichzeitige Refreshes teilen sich einen
+    einzigen REST-Call (single-flight), damit parallele Webhooks den
+    Endpoint nicht mehrfach treffen.
+    """
+
+    def __init__(self, client, ttl_seconds=EXCHANGE_INFO_TTL_SECONDS):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self._symbols = {}
+        self._rules = {}
+        self._loaded_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._refresher = None
+        self._stop = threading.Event()
+
+    @property
+    def loaded_at(self):
+        return self._loaded_at
+
+    def refresh(self):
+        """Reload exchange info; concurrent callers wait for the in-flight load"""
+        seen_loaded_at = self._loaded_at
+        with self._refresh_lock:
+            if self._loaded_at != seen_loaded_at:
+                # Ein anderer Thread hat waehrend wir gewartet haben bereits geladen
+                return
+            self.load(self.client.futures_exchange_info())
+
+    def load(self, exchange_info):
+        """Index an exchange info response and compile the symbol rules"""
+        symbols = {s['symbol']: s for s in exchange_info['symbols']}
+        rules = {symbol: SymbolRules(s) for symbol, s in symbols.items()}
+        self._symbols, self._rules = symbols, rules
+        self._loaded_at = time.time()
+        logger.info(f"🔄 Exchange info loaded: {len(self._symbols)} symbols")
+
+    def start(self):
+        """Initial load plus background refresh thread"""
+        self.refresh()
+        if self._refresher is None and not self._stop.is_set():
+            self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._refresher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        _request_priority.set(PRIORITY_LOW)  # Hintergrund-Refresh darf Orders nie verdraengen
+        while not self._stop.wait(self.ttl_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Exchange info refresh failed, keeping cached data: {e}")
+
+    def get(self, symbol):
+        """Return the raw symbol dict from exchange info, or None"""
+        symbol_info = self._symbols.get(symbol)
+        CACHE_REQUESTS.labels('exchange_info', 'miss' if symbol_info is None else 'hit').inc()
+        if symbol_info is None and self.client is not None \
+                and time.time() - self._loaded_at > EXCHANGE_INFO_MISS_REFRESH_SECONDS:
+            # Evtl. neu gelistetes Symbol — einmal nachladen
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Exchange info refresh failed: {e}")
+            symbol_info = self._symbols.get(symbol)
+        return symbol_info
+
+    def rules(self, symbol):
+        """Return the compiled SymbolRules for a symbol, or None"""
+        if self.get(symbol) is None:
+            return None
+        return self._rules.get(symbol)
+
+
+# ── Deadline-Scheduler ──────────────────────────────────────────────────────
+SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', '4'))  # Threads fuer faellige Callbacks
+
+
+class ScheduledCall:
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class DeadlineScheduler:
+    """
+    Ein einzelner Thread mit Min-Heap fuer alle Deadlines (z.B. Unfilled-
+    Timeouts), statt eines schlafenden Threads pro Order. Abgebrochene
+    Eintraege werden lazy beim Erreichen der Heap-Spitze verworfen.
+    Der Scheduler-Thread verwaltet nur den Heap; faellige Callbacks (oft
+    REST-Calls) laufen auf einem kleinen Worker-Pool, damit ein langsamer
+    Call die uebrigen Deadlines nicht verzoegert.
+    """
+
+    def __init__(self, name='deadline-scheduler', workers=SCHEDULER_WORKERS):
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'{name}-worker')
+        self._heap = []
+        self._seq = 0
+        self._live = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler thread; pending calls never fire, running ones finish"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def schedule(self, delay_seconds, callback, *args):
+        """Run `callback(*args)` after `delay_seconds`; returns a handle for cancel()"""
+        call = ScheduledCall(time.monotonic() + delay_seconds, callback, args)
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (call.deadline, self._seq, call))
+            self._live += 1
+            self._cond.notify()
+        return call
+
+    def cancel(self, call):
+        with self._cond:
+            if call is not None and not call.cancelled:
+                call.cancelled = True
+                self._live -= 1
+
+    def depth(self):
+        """Number of scheduled, not yet fired or cancelled calls"""
+        return self._live
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    timeout = self._heap[0][0] - time.monotonic()
+                    if timeout <= 0:
+                        call = heapq.heappop(self._heap)[2]
+                        call.cancelled = True
+                        self._live -= 1
+                        break
+                    self._cond.wait(timeout)
+
+            try:
+                self._pool.submit(self._fire, call)
+            except RuntimeError:
+                return  # stop() hat den Pool waehrenddessen heruntergefahren
+
+    def _fire(self, call):
+        try:
+            call.callback(*call.args)
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.name}] Scheduled call failed: {e}")
+
+
+# ── Konfiguration User-Data-Stream ──────────────────────────────────────────
+USE_USER_DATA_STREAM = os.getenv('USE_USER_DATA_STREAM', 'true').lower() == 'true'
+FUTURES_STREAM_URL = 'wss://fstream.binance.com'
+FUTURES_TESTNET_STREAM_URL = 'wss://stream.binancefuture.com'
+USER_STREAM_KEEPALIVE_SECONDS = 30 * 60  # Listen-Key laeuft nach 60 Min ohne Keepalive ab
+STREAM_RECV_TIMEOUT = 5.0  # Sekunden, danach Keepalive/Health-Check
+STREAM_RECONNECT_MAX_WAIT = 30.0
+ORDER_FALLBACK_POLL_INTERVAL = 2.0  # REST-Polling nur solange der Stream getrennt ist
+
+# ── Konfiguration lokaler Exchange-Stand-in (binance_mock_server.py) ────────
+BINANCE_MOCK_URL = os.getenv('BINANCE_MOCK_URL', '').rstrip('/')  # z.B. http://127.0.0.1:18080
+BINANCE_MOCK_STREAM_URL = os.getenv('BINANCE_MOCK_STREAM_URL', '').rstrip('/')  # Standard: Port + 1 von BINANCE_MOCK_URL
+
+
+def futures_stream_url(testnet):
+    """Websocket base URL: local stand-in if BINANCE_MOCK_URL is set, else testnet/live"""
+    if BINANCE_MOCK_URL:
+        if BINANCE_MOCK_STREAM_URL:
+            return BINANCE_MOCK_STREAM_URL
+        host, port = BINANCE_MOCK_URL.split('://', 1)[1].rsplit(':', 1)
+        return f"ws://{host}:{int(port) + 1}"
+    return FUTURES_TESTNET_STREAM_URL if testnet else FUTURES_STREAM_URL
+
+
+def use_mock_endpoints(client):
+    """Point a python-binance client at BINANCE_MOCK_URL (call before the client pings)"""
+    client.API_URL = client.API_TESTNET_URL = f"{BINANCE_MOCK_URL}/api"
+    client.FUTURES_URL = client.FUTURES_TESTNET_URL = f"{BINANCE_MOCK_URL}/fapi"
+
+
+TERMINAL_ORDER_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH')
+
+
+class StreamConsumer(ABC):
+    """
+    Websocket-Consumer in einem eigenen Daemon-Thread mit automatischem
+    Reconnect (exponentieller Backoff). Subklassen liefern die URL und
+    verarbeiten die Nachrichten.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.connected = False
+        self.last_message_at = 0.0
+        self.reconnects = 0
+        self._reconnect_requested = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @abstractmethod
+    def url(self):
+        """Websocket URL, re-evaluated on every (re)connect"""
+
+    @abstractmethod
+    def on_message(self, msg):
+        """Handle one decoded JSON message"""
+
+    def on_connect(self):
+        pass
+
+    def on_tick(self):
+        """Called after every message and every recv timeout"""
+        pass
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def request_reconnect(self):
+        self._reconnect_requested = True
+
+    def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            try:
+                with ws_connect(self.url(), open_timeout=10, max_size=None) as ws:
+                    self.connected = True
+                    self._reconnect_requested = False
+                    attempt = 0
+                    logger.info(f"🔌 [{self.name}] Stream connected")
+                    self.on_connect()
+
+                    while not self._stop.is_set() and not self._reconnect_requested:
+                        try:
+                            raw = ws.recv(timeout=STREAM_RECV_TIMEOUT)
+                        except TimeoutError:
+                            self.on_tick()
+                            continue
+
+                        self.last_message_at = time.time()
+                        try:
+                            self.on_message(json.loads(raw))
+                        except Exception as e:
+                            logger.warning(f"⚠️ [{self.name}] Error handling stream message: {e}")
+                        self.on_tick()
+
+            except Exception as e:
+                logger.warning(f"⚠️ [{self.name}] Stream error: {e}")
+            finally:
+                if self.connected:
+                    logger.warning(f"🔌 [{self.name}] Stream disconnected")
+                self.connected = False
+
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            wait = min(STREAM_RECONNECT_MAX_WAIT, 0.5 * (2 ** attempt))
+            attempt += 1
+            self._stop.wait(wait)
+
+
+class OrderTracker:
+    """
+    In-Memory Order-Status, gespeist aus ORDER_TRADE_UPDATE Events.
+    Fuer getrackte Orders wird `on_done(symbol, order_id, status)` genau
+    einmal aufgerufen, sobald die Order einen End-Status erreicht. Die Zahl
+    getrackter Orders steht direkt im Gauge (kein Callback — der waere im
+    Multiprocess-Modus unsichtbar).
+    Mit `store` landet jeder Statuswechsel auch im OrderStore.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._lock = threading.Lock()
+        self._orders = {}  # orderId -> {'symbol', 'status', 'filled_qty', 'updated_at'}
+        self._watchers = {}  # orderId -> on_done Callback fuer getrackte, offene Orders
+
+    def track(self, symbol, order_id, on_done):
+        with self._lock:
+            # Das Stream-Event kann vor der REST-Antwort ankommen — vorhandenen Status nicht ueberschreiben
+            state = self._orders.setdefault(order_id, {
+                'symbol': symbol, 'status': 'NEW', 'filled_qty': 0.0, 'updated_at': time.time()
+            })
+            status = state['status']
+            if status not in TERMINAL_ORDER_STATUSES:
+                self._watchers[order_id] = on_done
+            PENDING_MONITORS.set(len(self._watchers))
+        if status in TERMINAL_ORDER_STATUSES:
+            on_done(symbol, order_id, status)
+
+    def update(self, symbol, order_id, status, filled_qty=None):
+        watcher = None
+        with self._lock:
+            state = self._orders.setdefault(order_id, {'symbol': symbol, 'filled_qty': 0.0})
+            state['status'] = status
+            state['updated_at'] = time.time()
+            if filled_qty is not None:
+                state['filled_qty'] = filled_qty
+            if status in TERMINAL_ORDER_STATUSES:
+                watcher = self._watchers.pop(order_id, None)
+                PENDING_MONITORS.set(len(self._watchers))
+            if len(self._orders) > 1000:
+                self._prune()
+        if watcher is not None:
+            watcher(symbol, order_id, status)
+        if self.store is not None:
+            self.store.update(symbol, order_id, status, filled_qty)
+
+    def _prune(self):
+        """Drop finished, unwatched orders (e.g. manual orders) older than an hour"""
+        cutoff = time.time() - 3600
+        for order_id in [
+            oid for oid, st in self._orders.items()
+            if oid not in self._watchers and st['status'] in TERMINAL_ORDER_STATUSES and st['updated_at'] < cutoff
+        ]:
+            del self._orders[order_id]
+
+    def on_order_update(self, msg):
+        o = msg['o']
+        self.update(o['s'], o['i'], o['X'], float(o.get('z', 0)))
+
+    def status(self, order_id):
+        state = self._orders.get(order_id)
+        return state['status'] if state else None
+
+    def filled_qty(self, order_id):
+        state = self._orders.get(order_id)
+        return state['filled_qty'] if state else 0.0
+
+    def is_tracked(self, order_id):
+        return order_id in self._watchers
+
+    def pending(self):
+        with self._lock:
+            return [(self._orders[oid]['symbol'], oid) for oid in self._watchers]
+
+    def forget(self, order_id):
+        with self._lock:
+            self._orders.pop(order_id, None)
+            self._watchers.pop(order_id, None)
+            PENDING_MONITORS.set(len(self._watchers))
+
+
+class UserDataStream(StreamConsumer):
+    """
+    Futures User-Data-Stream ueber einen Listen-Key. Events werden nach
+    Event-Typ an `handlers` verteilt; nach jedem (Re-)Connect wird
+    `on_resync` aufgerufen, um Events aus der Verbindungsluecke per REST
+    nachzuholen.
+    """
+
+    def __init__(self, client, base_url, handlers, on_resync=None):
+        super().__init__('user-data-stream')
+        self.client = client
+        self.base_url = base_url
+        self.handlers = handlers
+        self.on_resync = on_resync
+        self.listen_key = None
+        self._last_keepalive = 0.0
+
+    def url(self):
+        self.listen_key = self.client.futures_stream_get_listen_key()
+        self._last_keepalive = time.time()
+        return f"{self.base_url}/ws/{self.listen_key}"
+
+    def on_connect(self):
+        if self.on_resync:
+            try:
+                self.on_resync()
+            except Exception as e:
+                logger.warning(f"⚠️ [{self.name}] Resync after connect failed: {e}")
+
+    def on_message(self, msg):
+        event_type = msg.get('e')
+        if event_type == 'listenKeyExpired':
+            logger.warning(f"⚠️ [{self.name}] Listen key expired — reconnecting")
+            self.request_reconnect()
+            return
+        handler = self.handlers.get(event_type)
+        if handler:
+            handler(msg)
+
+    def on_tick(self):
+        if time.time() - self._last_keepalive < USER_STREAM_KEEPALIVE_SECONDS:
+            return
+        self._last_keepalive = time.time()
+        try:
+            self.client.futures_stream_keepalive(listenKey=self.listen_key)
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.name}] Listen key keepalive failed: {e}")
+            self.request_reconnect()
+
+
+# ── Konfiguration Account-Cache ─────────────────────────────────────────────
+ACCOUNT_RECONCILE_SECONDS = int(os.getenv('ACCOUNT_RECONCILE_SECONDS', '300'))  # REST-Abgleich alle 5 Minuten
+ACCOUNT_ASSET = os.getenv('ACCOUNT_ASSET', 'USDT')
+ACCOUNT_PENDING_MAX_SECONDS = 10  # ohne passendes ACCOUNT_UPDATE gilt das Buch danach wieder
+
+
+class AccountBook:
+    """
+    Balances und Positionen im Speicher, aktuell gehalten durch
+    ACCOUNT_UPDATE / ACCOUNT_CONFIG_UPDATE Events aus dem User-Data-Stream.
+    `availableBalance` ist nicht Teil der Events und wird aus Wallet, PnL,
+    Positions-Margin und der Margin offener LIMIT-Orders fortgeschrieben;
+    ein periodischer REST-Abgleich (futures_account) korrigiert die
+    Abweichung. Offene Orders kommen aus ORDER_TRADE_UPDATE Events und den
+    REST-Antworten eigener Orders (track_orders). Mit `mark_price` (z.B.
+    MarkPriceStream.get) wird der uPnL zum aktuellen Mark-Preis bewertet
+    statt zum Stand des letzten ACCOUNT_UPDATE.
+    Positionen werden im Schema von futures_position_information geliefert.
+    Nach eigenen Orders ist ein Symbol "pending", bis das ACCOUNT_UPDATE
+    mit spaeterer Transaktionszeit eintrifft — bis dahin liest der Trader
+    dessen Positionen per REST (siehe is_current).
+    """
+
+    def __init__(self, client, asset=ACCOUNT_ASSET, mark_price=None):
+        self.client = client
+        self.asset = asset
+        self.mark_price = mark_price  # symbol -> Mark-Preis oder None
+        self._lock = threading.Lock()
+        self._wallet_balance = 0.0  # walletBalance des Asset
+        self._wallet_offset = 0.0  # totalWalletBalance - walletBalance beim letzten Abgleich
+        self._available_offset = 0.0  # REST availableBalance - Schaetzung beim letzten Abgleich
+        self._positions = {}  # (symbol, positionSide) -> Position im positionRisk-Schema
+        self._leverage = {}  # symbol -> Leverage
+        self._pending = {}  # symbol -> (Sendezeit ms in Exchange-Zeit, monotonic) der letzten eigenen Order
+        self._open_orders = {}  # orderId -> (symbol, offenes Notional) offener LIMIT-Orders, die Margin binden
+        self._finished_orders = OrderedDict()  # zuletzt beendete orderIds — spaete REST-Antworten ignorieren
+        self.reconciled_at = 0.0
+        self.updated_at = 0.0
+
+    def reconcile(self):
+        """Replace the in-memory state with a fresh futures_account() snapshot"""
+        self.apply_snapshot(self.client.futures_account())
+
+    def apply_snapshot(self, account):
+        """Replace the in-memory state with a futures_account() response"""
+        asset = next((a for a in account.get('assets', []) if a['asset'] == self.asset), None)
+        wallet_balance = float(asset['walletBalance']) if asset else float(account['totalWalletBalance'])
+
+        positions = {}
+        leverage = {}
+        for p in account.get('positions', []):
+            leverage[p['symbol']] = int(p['leverage'])
+            if float(p['positionAmt']) != 0:
+                positions[(p['symbol'], p.get('positionSide', 'BOTH'))] = {
+                    'symbol': p['symbol'],
+                    'positionSide': p.get('positionSide', 'BOTH'),
+                    'positionAmt': float(p['positionAmt']),
+                    'entryPrice': float(p['entryPrice']),
+                    'unRealizedProfit': float(p['unrealizedProfit']),
+                    'leverage': int(p['leverage'])
+                }
+
+        with self._lock:
+            self._wallet_balance = wallet_balance
+            self._wallet_offset = float(account['totalWalletBalance']) - wallet_balance
+            self._positions = positions
+            self._leverage = leverage
+            self._available_offset = float(account['availableBalance']) - self._estimate_available()
+            self.reconciled_at = self.updated_at = time.time()
+
+    def _unrealized(self, position):
+        mark = self.mark_price(position['symbol']) if self.mark_price else None
+        if mark is None:
+            return position['unRealizedProfit']
+        return (mark - position['entryPrice']) * position['positionAmt']
+
+    def _estimate_available(self):
+        unrealized = sum(self._unrealized(p) for p in self._positions.values())
+        initial_margin = sum(
+            abs(p['positionAmt']) * p['entryPrice'] / (p['leverage'] or 1)
+            for p in self._positions.values()
+        )
+        order_margin = sum(
+            notional / (self._leverage.get(symbol) or 20)
+            for symbol, notional in self._open_orders.values()
+        )
+        return self._wallet_balance + unrealized - initial_margin - order_margin
+
+    def _apply_order(self, symbol, order_id, order_type, status, quantity, filled_qty, price, reduce_only,
+                     from_stream=True):
+        if status in TERMINAL_ORDER_STATUSES:
+            self._open_orders.pop(order_id, None)
+            self._finished_orders[order_id] = True
+            while len(self._finished_orders) > 1000:
+                self._finished_orders.popitem(last=False)
+            return
+        if order_type != 'LIMIT' or reduce_only:
+            return
+        # Die REST-Antwort kann nach dem FILLED-Event eintreffen
+        if not from_stream and order_id in self._finished_orders:
+            return
+        self._open_orders[order_id] = (symbol, (float(quantity) - float(filled_qty or 0)) * float(price))
+
+    def on_order_update(self, msg):
+        o = msg['o']
+        with self._lock:
+            self._apply_order(o['s'], o['i'], o['o'], o['X'], o['q'], o.get('z'), o.get('p', 0),
+                              o.get('R') or o.get('cp'))
+
+    def track_orders(self, orders):
+        """Book own orders from REST responses (futures_create_order, openOrders) before their events arrive"""
+        with self._lock:
+            for o in orders:
+                reduce_only = str(o.get('reduceOnly')).lower() == 'true' or str(o.get('closePosition')).lower() == 'true'
+                self._apply_order(o['symbol'], o['orderId'], o['type'], o['status'], o['origQty'],
+                                  o.get('executedQty'), o.get('price', 0), reduce_only, from_stream=False)
+
+    def on_account_update(self, msg):
+        update = msg['a']
+        transaction_time = msg.get('T', 0)
+        with self._lock:
+            for b in update.get('B', []):
+                if b['a'] == self.asset:
+                    self._wallet_balance = float(b['wb'])
+            for p in update.get('P', []):
+                pending = self._pending.get(p['s'])
+                if pending and transaction_time >= pending[0]:
+                    del self._pending[p['s']]
+                key = (p['s'], p.get('ps', 'BOTH'))
+                amount = float(p['pa'])
+                if amount == 0:
+                    self._positions.pop(key, None)
+                    continue
+                self._positions[key] = {
+                    'symbol': p['s'],
+                    'positionSide': p.get('ps', 'BOTH'),
+                    'positionAmt': amount,
+                    'entryPrice': float(p['ep']),
+                    'unRealizedProfit': float(p['up']),
+                    'leverage': self._leverage.get(p['s'], 20)
+                }
+            self.updated_at = time.time()
+
+    def on_account_config_update(self, msg):
+        config = msg.get('ac')
+        if not config:
+            return
+        with self._lock:
+            self._leverage[config['s']] = int(config['l'])
+            for key, p in self._positions.items():
+                if key[0] == config['s']:
+                    p['leverage'] = int(config['l'])
+
+    def mark_pending(self, symbol, sent_at_ms):
+        """An own order that may change `symbol`'s position was sent at `sent_at_ms` (exchange time)"""
+        with self._lock:
+            self._pending[symbol] = (sent_at_ms, time.monotonic())
+
+    def is_current(self, symbol=None):
+        """False while an own order for `symbol` (any symbol if None) still awaits its ACCOUNT_UPDATE"""
+        now = time.monotonic()
+        with self._lock:
+            for s, (_, marked_at) in list(self._pending.items()):
+                if now - marked_at > ACCOUNT_PENDING_MAX_SECONDS:
+                    del self._pending[s]
+            return not self._pending if symbol is None else symbol not in self._pending
+
+    @property
+    def loaded(self):
+        return self.reconciled_at > 0
+
+    def balances(self):
+        with self._lock:
+            return {
+                'balance': self._wallet_balance + self._wallet_offset,
+                'available': max(0.0, self._estimate_available() + self._available_offset)
+            }
+
+    def positions(self, symbol=None):
+        with self._lock:
+            return [
+                dict(p, unRealizedProfit=self._unrealized(p)) for (s, _), p in self._positions.items()
+                if symbol is None or s == symbol
+            ]
+
+
+# ── Konfiguration Mark-Price-Stream ─────────────────────────────────────────
+USE_MARK_PRICE_STREAM = os.getenv('USE_MARK_PRICE_STREAM', 'true').lower() == 'true'
+PRICE_STALE_SECONDS = float(os.getenv('PRICE_STALE_SECONDS', '5'))  # aelter => REST-Fallback
+
+
+class MarkPriceStream(StreamConsumer):
+    """
+    Abonniert `!markPrice@arr@1s` und haelt den letzten Mark-Preis aller
+    Symbole in einer Tabelle. Jeder Eintrag wird als Tupel (Preis,
+    Empfangszeit) ersetzt — Leser brauchen daher kein Lock.
+    """
+
+    def __init__(self, base_url):
+        super().__init__('mark-price-stream')
+        self.base_url = base_url
+        self._prices = {}  # symbol -> (price, received_at)
+
+    def url(self):
+        return f"{self.base_url}/ws/!markPrice@arr@1s"
+
+    def on_message(self, msg):
+        received_at = time.time()
+        prices = self._prices
+        for update in msg:
+            prices[update['s']] = (float(update['p']), received_at)
+
+    def get(self, symbol, max_age=PRICE_STALE_SECONDS):
+        """Latest mark price, or None if unknown or older than `max_age` seconds"""
+        entry = self._prices.get(symbol)
+        if entry is None or time.time() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    def age(self, symbol):
+        entry = self._prices.get(symbol)
+        return time.time() - entry[1] if entry else None
+
+
+POSITION_ROLES = ('close', 'reduce', 'entry')  # Plan-Rollen, die die Position aendern
+
+
+def exchange_time_ms(client):
+    """Current Binance server time estimate (ms) from the client's clock offset"""
+    return int(time.time() * 1000 + client.timestamp_offset)
+
+
+def good_till_date_ms(exchange_time, timeout_seconds, recv_window_ms):
+    """
+    goodTillDate (ms) fuer einen GTD-Entry, `timeout_seconds` nach
+    `exchange_time`. Binance verlangt mehr als GTD_MIN_SECONDS nach Eingang
+    der Order und schneidet auf ganze Sekunden ab — die Order kann bis zu
+    `recv_window_ms` spaeter ankommen. Deshalb mindestens GTD_MIN_SECONDS +
+    GTD_MARGIN_SECONDS nach dem spaetesten Eingang, aufgerundet auf Sekunden.
+    """
+    earliest = exchange_time + recv_window_ms + (GTD_MIN_SECONDS + GTD_MARGIN_SECONDS) * 1000
+    good_till_date = max(exchange_time + int(timeout_seconds * 1000), earliest)
+    return -(-good_till_date // 1000) * 1000
+
+
+def position_size_for_risk(entry_price, stop_loss, risk_usd, available_balance, rules, leverage=20):
+    """
+    Positionsgroesse, die bis zum Stop-Loss `risk_usd` riskiert — begrenzt auf
+    95 % der mit `leverage` verfuegbaren Margin, auf LOT_SIZE gerundet, hoechstens
+    maxQty und mindestens MIN_NOTIONAL. Returns Decimal oder None (ungueltiger SL).
+    """
+    risk_per_unit = abs(entry_price - stop_loss)
+    if risk_per_unit <= 0:
+        logger.error("❌ Invalid Stop Loss")
+        return None
+
+    position_size = risk_usd / risk_per_unit
+    max_position_size = available_balance * leverage * 0.95 / entry_price
+    if position_size > max_position_size:
+        logger.warning(f"⚠️ Position capped from {position_size:.6f} to {max_position_size:.6f}")
+        position_size = max_position_size
+
+    quantity = rules.normalize_quantity(position_size)
+    if rules.max_qty and quantity > rules.max_qty:
+        logger.warning(f"⚠️ Position capped to maxQty {rules.max_qty}")
+        quantity = rules.max_qty
+
+    notional_value = quantity * rules.normalize_price(entry_price)
+    if notional_value < rules.min_notional:
+        logger.warning(f"⚠️ Position too small (${notional_value:.2f}), adjusting to minimum ${rules.min_notional}")
+        quantity = rules.min_quantity_for_notional(entry_price)
+    return quantity
+
+
+def mark_positions_pending(account_book, client, plan):
+    """Before sending a plan: its symbols' booked positions are stale until the fills' ACCOUNT_UPDATE"""
+    sent_at_ms = exchange_time_ms(client)
+    for symbol in {params['symbol'] for role, params in plan if role in POSITION_ROLES}:
+        account_book.mark_pending(symbol, sent_at_ms)
+
+
+def plan_entry_orders(signal, symbol, positions, quantity, limit_price, rules,
+                      reversal_mode=None, hedge_mode=None, good_till_date=None):
+    """
+    Bestimmt die minimale Order-Liste, um vom aktuellen Positionsstand auf
+    das Signal zu kommen. Returns eine Liste von (role, params) mit role
+    'close', 'reduce' oder 'entry'; params gehen direkt an
+    futures_create_order.
+
+    close_then_open: jede Gegen-/Bestandsposition per MARKET schliessen,
+                     danach LIMIT-Entry ueber die volle Menge.
+    net:             Gegenposition per MARKET schliessen, danach LIMIT-Entry
+                     zum Signal-Preis (mit Unfilled-Timeout); eine
+                     gleichgerichtete Position nur um die Differenz
+                     aufstocken (LIMIT) bzw. reduzieren (MARKET reduceOnly).
+                     Im Hedge-Modus gilt das je Leg (positionSide).
+    Close-Legs sind reduceOnly, damit ein veralteter Positionsstand keine
+    Gegenposition eroeffnet. Eine Differenz unter einem Step ergibt einen
+    leeren Plan (Position bereits am Ziel).
+    Mit `good_till_date` (ms) werden LIMIT-Entries als GTD statt GTC gesendet.
+    """
+    reversal_mode = reversal_mode or REVERSAL_MODE
+    hedge_mode = HEDGE_MODE if hedge_mode is None else hedge_mode
+    side = 'BUY' if signal == 'LONG' else 'SELL'
+    opposite_side = 'SELL' if side == 'BUY' else 'BUY'
+    quantity = _to_decimal(quantity)
+    netting = reversal_mode == 'net'
+
+    def order(order_side, order_type, qty, direction, reduce=False):
+        params = {'symbol': symbol, 'side': order_side, 'type': order_type, 'quantity': format(qty, 'f')}
+        if order_type == 'LIMIT':
+            params['price'] = format(_to_decimal(limit_price), 'f')
+            if good_till_date:
+                params['timeInForce'] = 'GTD'
+                params['goodTillDate'] = good_till_date
+            else:
+                params['timeInForce'] = 'GTC'
+        if hedge_mode:
+            params['positionSide'] = direction
+        elif reduce:
+            params['reduceOnly'] = 'true'
+        return params
+
+    plan = []
+    same_direction_qty = Decimal(0)
+    for pos in positions:
+        amount = _to_decimal(pos['positionAmt'])
+        if amount == 0:
+            continue
+        if hedge_mode:
+            direction = pos.get('positionSide', 'BOTH')
+        else:
+            direction = 'LONG' if amount > 0 else 'SHORT'
+
+        if netting and direction == signal:
+            same_direction_qty += abs(amount)
+            continue
+
+        close_side = 'SELL' if direction == 'LONG' else 'BUY'
+        plan.append(('close', order(close_side, 'MARKET', abs(amount), direction, reduce=True)))
+
+    if netting and same_direction_qty:
+        delta = quantity - same_direction_qty
+        if delta > 0:
+            entry_qty = rules.normalize_quantity(delta)
+            if entry_qty > 0:
+                plan.append(('entry', order(side, 'LIMIT', entry_qty, signal)))
+        elif delta < 0:
+            reduce_qty = rules.normalize_quantity(-delta, market=True)
+            if reduce_qty > 0:
+                plan.append(('reduce', order(opposite_side, 'MARKET', reduce_qty, signal, reduce=True)))
+        return plan
+
+    plan.append(('entry', order(side, 'LIMIT', quantity, signal)))
+    return plan
+
+
+def plan_protective_orders(signal, symbol, sl, tp, rules, hedge_mode=None):
+    """STOP_MARKET / TAKE_PROFIT_MARKET mit closePosition fuer SL und TP"""
+    hedge_mode = HEDGE_MODE if hedge_mode is None else hedge_mode
+    exit_side = 'SELL' if signal == 'LONG' else 'BUY'
+    plan = []
+    for role, order_type, price in (('sl', 'STOP_MARKET', sl), ('tp', 'TAKE_PROFIT_MARKET', tp)):
+        params = {
+            'symbol': symbol,
+            'side': exit_side,
+            'type': order_type,
+            'stopPrice': format(rules.normalize_price(price), 'f'),
+            'closePosition': 'true',
+            'workingType': 'MARK_PRICE'
+        }
+        if hedge_mode:
+            params['positionSide'] = signal
+        plan.append((role, params))
+    return plan
+
+
+def build_entry_plan(signal, symbol, positions, quantity, limit_price, rules, sl, tp, mark_price,
+                     good_till_date=None):
+    """
+    Order-Plan eines Entry-Signals, wie ihn beide Trader senden: plan_entry_orders,
+    lokal gegen die Symbol-Filter geprueft (raises OrderRuleViolation) und mit
+    SL/TP, falls PLACE_PROTECTIVE_ORDERS und der Plan einen Entry enthaelt.
+    """
+    plan = plan_entry_orders(
+        signal, symbol, positions, quantity, limit_price, rules, good_till_date=good_till_date
+    )
+    # Lokal gegen die Symbol-Filter pruefen statt Binance ablehnen zu lassen
+    for role, params in plan:
+        rules.validate(
+            params['side'], params['quantity'],
+            price=params.get('price'),
+            mark_price=mark_price,
+            reduce_only=role in ('close', 'reduce')
+        )
+    if PLACE_PROTECTIVE_ORDERS and any(role == 'entry' for role, _ in plan):
+        plan += plan_protective_orders(signal, symbol, sl, tp, rules)
+    return plan
+
+
+def split_position_legs(plan):
+    """
+    Teilt einen Plan in die MARKET-Legs, die die bestehende Position schliessen
+    oder reduzieren, und den Rest. Binance fuehrt die Orders einer Batch
+    parallel aus — die Position-Legs muessen vorher durch sein, sonst kann ein
+    Entry gegen die alte Position verrechnet werden.
+    """
+    leading = [(role, params) for role, params in plan if role in ('close', 'reduce')]
+    rest = [(role, params) for role, params in plan if role not in ('close', 'reduce')]
+    return leading, rest
+
+
+def stale_protective_order_ids(open_orders, position_side=None, exclude=()):
+    """
+    orderIds offener closePosition-Orders (SL/TP) — gehoeren zur Position und
+    sind verwaist, sobald sie geschlossen oder gedreht wurde. Im Hedge-Modus
+    nur die des Legs `position_side`; `exclude` schuetzt gerade platzierte.
+    """
+    return [
+        o['orderId'] for o in open_orders
+        if str(o.get('closePosition')).lower() == 'true'
+        and (position_side is None or o.get('positionSide', 'BOTH') == position_side)
+        and o['orderId'] not in exclude
+    ]
+
+
+CLIENT_ORDER_ROLE_CODES = {'close': 'c', 'reduce': 'r', 'entry': 'e', 'sl': 's', 'tp': 't'}
+
+
+def assign_client_order_ids(plan, client_id):
+    """
+    Deterministische newClientOrderId je Order (`<client_id>-<rolle><index>`),
+    damit sich die Orders eines Signals wiederfinden lassen (Replay, Retry).
+    Binance lehnt eine doppelte ID nur ab, solange die erste Order offen ist —
+    vor dem erneuten Senden muss der Aufrufer daher per signal_orders()
+    pruefen, ob der fruehere Versuch bereits Orders platziert hat.
+    """
+    if not client_id:
+        return plan
+    for i, (role, params) in enumerate(plan):
+        params['newClientOrderId'] = f"{client_id}-{CLIENT_ORDER_ROLE_CODES.get(role, 'o')}{i}"
+    return plan
+
+
+# ── Konfiguration Order-Store ───────────────────────────────────────────────
+ORDER_STORE_FILE = os.getenv('ORDER_STORE_FILE', 'order_state.db')  # leer = aus; SQLite im WAL-Modus
+ORDER_STORE_RETENTION_DAYS = int(os.getenv('ORDER_STORE_RETENTION_DAYS', '7'))  # beendete Orders so lange behalten
+OPEN_ORDER_STATUSES = ('NEW', 'PARTIALLY_FILLED')
+ORDER_CLOSED_UNOBSERVED = 'CLOSED'  # nicht mehr offen, End-Status aber nicht beobachtet (z.B. waehrend eines Restarts)
+# Von assign_client_order_ids vergebene IDs — erkennt Bot-Orders, die vor dem Speichern verwaist sind
+CLIENT_ORDER_ID_PATTERN = re.compile(r'^(tv-[0-9a-f]{24})-([a-z])\d+$')
+CLIENT_ORDER_ROLES = {code: role for role, code in CLIENT_ORDER_ROLE_CODES.items()}
+
+ORDER_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    symbol TEXT NOT NULL,
+    order_id INTEGER NOT NULL,
+    client_order_id TEXT,
+    role TEXT NOT NULL,
+    side TEXT,
+    type TEXT,
+    quantity TEXT,
+    price TEXT,
+    status TEXT NOT NULL,
+    filled_qty REAL NOT NULL DEFAULT 0,
+    parent_id INTEGER,
+    timeout_seconds INTEGER,
+    deadline REAL,
+    exchange_expiry INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (symbol, order_id)
+);
+CREATE INDEX IF NOT EXISTS orders_open ON orders (symbol) WHERE status IN ('NEW', 'PARTIALLY_FILLED');
+CREATE TABLE IF NOT EXISTS order_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    order_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    filled_qty REAL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS order_events_order ON order_events (symbol, order_id);
+"""
+
+
+class OrderStore:
+    """
+    Persistenter Order-Zustand in SQLite (WAL): jede platzierte Order mit
+    Rolle, Entry-Deadline und SL/TP-Zuordnung, dazu jeder Statuswechsel als
+    Event. Ueberlebt Redeploys und Worker-Restarts — reconcile_stored_orders
+    gleicht beim Start gegen Binance ab und liefert die wieder zu
+    ueberwachenden Entries.
+    synchronous=NORMAL: ein Commit kostet kein fsync und uebersteht
+    Prozess-Abstuerze; nur ein OS-Crash kann die letzten Commits kosten.
+    Schreibfehler werden geloggt, blockieren aber nie den Order-Pfad.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(ORDER_STORE_SCHEMA)
+        atexit.register(self.close)
+
+    def record(self, symbol, orders, tracker=None, timeout_seconds=None, exchange_expiry=False, created_at=None):
+        """
+        Store the orders of one plan ({role: order response}) in one transaction.
+        The entry gets a deadline when `timeout_seconds` is given; SL/TP point at it.
+        Already stored orders are left untouched.
+        """
+        now = time.time()
+        created_at = created_at or now
+        entry_id = orders['entry']['orderId'] if 'entry' in orders else None
+        rows, events = [], []
+        for role, order in orders.items():
+            order_id = order['orderId']
+            status, filled_qty = order.get('status') or 'NEW', float(order.get('executedQty') or 0)
+            if tracker is not None and tracker.status(order_id):
+                # Das Stream-Event kann vor der REST-Antwort angekommen sein
+                status, filled_qty = tracker.status(order_id), tracker.filled_qty(order_id)
+            watched = role == 'entry' and timeout_seconds is not None
+            rows.append((
+                symbol, order_id, order.get('clientOrderId'), role, order.get('side'), order.get('type'),
+                order.get('origQty'), order.get('price'), status, filled_qty,
+                entry_id if role in ('sl', 'tp') else None,
+                timeout_seconds if watched else None,
+                created_at + timeout_seconds if watched else None,
+                int(watched and exchange_expiry), created_at, now
+            ))
+            events.append((symbol, order_id, status, filled_qty, now))
+        try:
+            with self._lock, self._db:
+                inserted = self._db.executemany(
+                    'INSERT OR IGNORE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+                ).rowcount
+                if inserted:
+                    self._db.executemany(
+                        'INSERT INTO order_events (symbol, order_id, status, filled_qty, at) VALUES (?, ?, ?, ?, ?)',
+                        events
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Order store write failed for {[o['orderId'] for o in orders.values()]}: {e}")
+
+    def update(self, symbol, order_id, status, filled_qty=None):
+        """Record a status change of a stored, not yet finished order (unknown orders are ignored)"""
+        now = time.time()
+        try:
+            with self._lock, self._db:
+                changed = self._db.execute(
+                    'UPDATE orders SET status = ?, filled_qty = COALESCE(?, filled_qty), updated_at = ? '
+                    'WHERE symbol = ? AND order_id = ? AND status IN (?, ?, ?) '
+                    'AND (status != ? OR filled_qty != COALESCE(?, filled_qty))',
+                    (status, filled_qty, now, symbol, order_id, *OPEN_ORDER_STATUSES, ORDER_CLOSED_UNOBSERVED,
+                     status, filled_qty)
+                ).rowcount
+                if changed:
+                    self._db.execute(
+                        'INSERT INTO order_events (symbol, order_id, status, filled_qty, at) VALUES (?, ?, ?, ?, ?)',
+                        (symbol, order_id, status, filled_qty, now)
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Order store update failed for order {order_id}: {e}")
+
+    def update_orders(self, symbol, orders):
+        """Apply order responses (e.g. from a cancel) — per-order errors in batch results are skipped"""
+        for order in orders:
+            if 'orderId' in order:
+                self.update(symbol, order['orderId'], order.get('status'), float(order.get('executedQty') or 0))
+
+    def open_orders(self):
+        with self._lock:
+            return [dict(row) for row in self._db.execute(
+                "SELECT * FROM orders WHERE status IN ('NEW', 'PARTIALLY_FILLED')"
+            )]
+
+    def prune(self, retention_days=ORDER_STORE_RETENTION_DAYS):
+        """Delete finished orders (and their events) not updated for `retention_days`"""
+        finished = "status NOT IN ('NEW', 'PARTIALLY_FILLED') AND updated_at < ?"
+        cutoff = (time.time() - retention_days * 86400,)
+        with self._lock, self._db:
+            self._db.execute(
+                f'DELETE FROM order_events WHERE (symbol, order_id) IN (SELECT symbol, order_id FROM orders WHERE {finished})',
+                cutoff
+            )
+            return self._db.execute(f'DELETE FROM orders WHERE {finished}', cutoff).rowcount
+
+    def snapshot(self):
+        with self._lock:
+            total, open_count = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(status IN ('NEW', 'PARTIALLY_FILLED')), 0) FROM orders"
+            ).fetchone()
+        return {'path': self.path, 'orders': total, 'open': open_count}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def reconcile_stored_orders(store, open_orders, entry_timeout_seconds):
+    """
+    Startup-Abgleich des Order-Stores mit Binance' openOrders (ein Call fuer
+    alle Symbole):
+    - offene Bot-Orders, die nie gespeichert wurden (Absturz zwischen
+      Platzieren und Speichern), werden ueber ihre newClientOrderId erkannt
+      und samt SL/TP uebernommen (Deadline ab Order-Zeitpunkt)
+    - noch offene gespeicherte Orders uebernehmen den aktuellen Status
+    - verschwundene Orders werden als beendet markiert; nur verschwundene
+      Entries mit noch offenen SL/TP brauchen ihren echten End-Status
+    Returns (watches, lookups): [(symbol, order_id, status, filled_qty,
+    timeout_seconds, protective_ids, exchange_expiry, remaining_seconds)]
+    und [(symbol, order_id, protective_ids)].
+    """
+    live = {(o['symbol'], o['orderId']): o for o in open_orders}
+
+    groups = {}
+    for order in open_orders:
+        match = CLIENT_ORDER_ID_PATTERN.match(order.get('clientOrderId') or '')
+        if match and CLIENT_ORDER_ROLES.get(match.group(2)) in ('entry', 'sl', 'tp'):
+            groups.setdefault((order['symbol'], match.group(1)), {})[CLIENT_ORDER_ROLES[match.group(2)]] = order
+    for (symbol, _), orders in groups.items():
+        entry = orders.get('entry')
+        if entry is None:
+            continue
+        created_at = (entry.get('time') or entry.get('updateTime') or time.time() * 1000) / 1000
+        exchange_expiry = entry.get('timeInForce') == 'GTD'
+        # GTD-Entries laufen zu ihrem goodTillDate ab, nicht nach dem konfigurierten Timeout
+        timeout_seconds = entry_timeout_seconds
+        if exchange_expiry and entry.get('goodTillDate'):
+            timeout_seconds = max(0.0, int(entry['goodTillDate']) / 1000 - created_at)
+        store.record(
+            symbol, orders, timeout_seconds=timeout_seconds, exchange_expiry=exchange_expiry, created_at=created_at
+        )
+
+    stored = store.open_orders()
+    protective = {}
+    for row in stored:
+        if row['parent_id'] is not None and (row['symbol'], row['order_id']) in live:
+            protective.setdefault((row['symbol'], row['parent_id']), []).append(row['order_id'])
+
+    now = time.time()
+    watches, lookups = [], []
+    for row in stored:
+        key = (row['symbol'], row['order_id'])
+        order = live.get(key)
+        if order is not None:
+            status, filled_qty = order['status'], float(order.get('executedQty') or 0)
+            store.update(*key, status, filled_qty)
+            if row['deadline'] is not None:
+                watches.append((
+                    *key, status, filled_qty, row['timeout_seconds'], protective.get(key, []),
+                    bool(row['exchange_expiry']), max(0.0, row['deadline'] - now)
+                ))
+        elif row['role'] == 'entry' and protective.get(key):
+            lookups.append((*key, protective[key]))
+        else:
+            store.update(*key, ORDER_CLOSED_UNOBSERVED)
+    return watches, lookups
+
+
+# ── Konfiguration Ausfuehrungs-Queues ───────────────────────────────────────
+EXECUTION_WORKERS = int(os.getenv('EXECUTION_WORKERS', str(min(32, (os.cpu_count() or 1) * 4))))
+
+
+class SymbolExecutor:
+    """
+    Fuehrt Signale pro Symbol strikt nacheinander (FIFO) aus, verschiedene
+    Symbole parallel auf einem begrenzten Worker-Pool. Ein Symbol belegt
+    hoechstens einen Worker gleichzeitig (Actor-Prinzip) — zwei Alerts fuer
+    dasselbe Symbol koennen sich so nicht mehr in place_order ueberholen.
+    """
+
+    def __init__(self, max_workers=EXECUTION_WORKERS):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='exec')
+        self._lock = threading.Lock()
+        self._queues = {}  # symbol -> deque[(fn, args, future, context)]
+        self._active = set()  # Symbole, die gerade einen Worker belegen
+
+    def submit(self, symbol, fn, *args):
+        """Queue `fn(*args)` behind earlier work for `symbol`; returns a Future"""
+        future = Future()
+        context = contextvars.copy_context()  # Prioritaet/Recording des Aufrufers mitnehmen
+        with self._lock:
+            self._queues.setdefault(symbol, deque()).append((fn, args, future, context))
+            if symbol not in self._active:
+                self._active.add(symbol)
+                self._pool.submit(self._drain, symbol)
+        return future
+
+    def _drain(self, symbol):
+        while True:
+            with self._lock:
+                queue = self._queues.get(symbol)
+                if not queue:
+                    self._queues.pop(symbol, None)
+                    self._active.discard(symbol)
+                    return
+                fn, args, future, context = queue.popleft()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(context.run(fn, *args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def depths(self):
+        """Waiting signals per symbol (the one currently executing is not counted)"""
+        with self._lock:
+            return {symbol: len(queue) for symbol, queue in self._queues.items()}
+
+    def active(self):
+        return len(self._active)
+
+
+# ── Konfiguration Rate-Limits ───────────────────────────────────────────────
+# Binance Futures Standard-Limits; die X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* Header sind massgeblich
+RATE_LIMIT_WEIGHT_1M = int(os.getenv('RATE_LIMIT_WEIGHT_1M', '2400'))
+RATE_LIMIT_ORDERS_1M = int(os.getenv('RATE_LIMIT_ORDERS_1M', '1200'))
+RATE_LIMIT_ORDERS_10S = int(os.getenv('RATE_LIMIT_ORDERS_10S', '300'))
+RATE_LIMIT_MAX_DELAY_SECONDS = float(os.getenv('RATE_LIMIT_MAX_DELAY_SECONDS', '10'))  # laenger warten → Call abweisen
+RATE_LIMIT_BACKOFF_SECONDS = 60  # Fallback, falls ein 429/418 keinen Retry-After Header hat
+
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW = 0, 1, 2
+# Anteil eines Limits, den eine Prioritaet ausschoepfen darf — der Rest bleibt fuer Orders/Closes reserviert
+RATE_LIMIT_SHARE = {PRIORITY_HIGH: 1.0, PRIORITY_NORMAL: 0.9, PRIORITY_LOW: 0.7}
+# Order-Endpoints (ausser GET) laufen immer mit PRIORITY_HIGH; listenKey haelt den User-Data-Stream am Leben
+HIGH_PRIORITY_PATHS = {'order', 'batchOrders', 'allOpenOrders', 'listenKey'}
+ORDER_COUNT_PATHS = {'order', 'batchOrders'}
+# IP-Weights laut Binance-Doku; nicht gelistete Endpoints zaehlen 1
+FUTURES_REQUEST_WEIGHTS = {
+    ('post', 'order'): 0,
+    ('post', 'batchOrders'): 5,
+    ('get', 'account'): 5,
+    ('get', 'positionRisk'): 5,
+    ('get', 'allOrders'): 5,
+}
+
+_request_priority = contextvars.ContextVar('request_priority', default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def request_priority(priority):
+    """Run the enclosed exchange calls with the given gate priority (thread/task local)"""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class RateLimitExceeded(Exception):
+    """Call was shed by the RateLimitGate before reaching Binance"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _parse_interval(suffix):
+    """'1m' → 60, '10s' → 10; None for unknown suffixes"""
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    if len(suffix) < 2 or suffix[-1] not in units or not suffix[:-1].isdigit():
+        return None
+    return int(suffix[:-1]) * units[suffix[-1]]
+
+
+class RateLimitGate:
+    """
+    Zentrale Sperre vor jedem Futures-REST-Call. Haelt pro Limit-Fenster
+    (Weight/1m, Orders/10s, Orders/1m) einen Token-Bucket, der zum
+    Fensterwechsel voll aufgefuellt wird, und gleicht den Verbrauch mit den
+    Response-Headern ab. Niedrige Prioritaeten duerfen nur einen Teil des
+    Limits nutzen: LOW wird abgewiesen, NORMAL/HIGH warten bis zum
+    naechsten Fenster. Nach 429/418 ruhen alle Calls bis Retry-After.
+    """
+
+    def __init__(self, weight_1m=RATE_LIMIT_WEIGHT_1M, orders_1m=RATE_LIMIT_ORDERS_1M,
+                 orders_10s=RATE_LIMIT_ORDERS_10S, max_delay=RATE_LIMIT_MAX_DELAY_SECONDS):
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        # (art, intervall) -> [limit, fensterstart, verbraucht]
+        self._windows = {
+            ('weight', 60): [weight_1m, 0, 0],
+            ('orders', 10): [orders_10s, 0, 0],
+            ('orders', 60): [orders_1m, 0, 0],
+        }
+        self.backoff_until = 0
+        self.delayed = 0
+        self.shed = 0
+
+    def _window(self, key, now):
+        window = self._windows[key]
+        start = now - now % key[1]  # Binance-Fenster sind an der Uhr ausgerichtet
+        if window[1] != start:
+            window[1], window[2] = start, 0
+        return window
+
+    @staticmethod
+    def costs(method, path, data=None):
+        """Return (priority, [(window_key, cost), ...]) for a futures request"""
+        data = data or {}
+        priority = _request_priority.get()
+        if method != 'get' and path in HIGH_PRIORITY_PATHS:
+            priority = PRIORITY_HIGH
+
+        if path == 'openOrders' and not data.get('symbol'):
+            weight = 40
+        elif path == 'ticker/price' and not data.get('symbol'):
+            weight = 2
+        else:
+            weight = FUTURES_REQUEST_WEIGHTS.get((method, path), 1)
+        costs = [(('weight', 60), weight)]
+
+        if method == 'post' and path in ORDER_COUNT_PATHS:
+            orders = len(json.loads(unquote_plus(data['batchOrders']))) if path == 'batchOrders' else 1
+            costs += [(('orders', 10), orders), (('orders', 60), orders)]
+        return priority, costs
+
+    def reserve(self, method, path, data=None):
+        """
+        Take tokens for one request. Returns 0 when the call may proceed,
+        otherwise the seconds to wait before trying again. Raises
+        RateLimitExceeded when the call is shed.
+        """
+        priority, costs = self.costs(method, path, data)
+        now = time.time()
+        with self._lock:
+            if now < self.backoff_until:
+                self.shed += 1
+                raise RateLimitExceeded(
+                    f"Rate limit backoff active for {self.backoff_until - now:.0f}s — {method.upper()} {path} not sent",
+                    self.backoff_until - now
+                )
+
+            delay = 0
+            share = RATE_LIMIT_SHARE[priority]
+            for key, cost in costs:
+                limit, start, used = self._window(key, now)
+                if cost and used + cost > limit * share:
+                    delay = max(delay, start + key[1] - now)
+
+            if not delay:
+                for key, cost in costs:
+                    self._windows[key][2] += cost
+                return 0
+
+            if priority == PRIORITY_LOW or delay > self.max_delay:
+                self.shed += 1
+                raise RateLimitExceeded(
+                    f"Rate limit headroom exhausted — {method.upper()} {path} shed (retry in {delay:.1f}s)", delay
+                )
+            self.delayed += 1
+            return delay + 0.05  # kleiner Puffer gegen Uhr-Abweichung zum Server
+
+    def acquire(self, method, path, data=None):
+        """Blocking reserve() for sync clients"""
+        while True:
+            delay = self.reserve(method, path, data)
+            if not delay:
+                return
+            logger.warning(f"⏳ Rate limit headroom low — delaying {method.upper()} {path} by {delay:.1f}s")
+            time.sleep(delay)
+
+    def observe(self, headers, status_code):
+        """Sync bucket usage with the X-MBX-* response headers; start backoff on 429/418"""
+        now = time.time()
+        with self._lock:
+            for name, value in headers.items():
+                name = name.lower()
+                if name.startswith('x-mbx-used-weight-'):
+                    kind = 'weight'
+                elif name.startswith('x-mbx-order-count-'):
+                    kind = 'orders'
+                else:
+                    continue
+                key = (kind, _parse_interval(name.rsplit('-', 1)[1]))
+                if key in self._windows and str(value).isdigit():
+                    window = self._window(key, now)
+                    window[2] = max(window[2], int(value))
+
+            if status_code in (418, 429):
+                retry_after = headers.get('Retry-After')
+                seconds = float(retry_after) if retry_after and str(retry_after).isdigit() else RATE_LIMIT_BACKOFF_SECONDS
+                self.backoff_until = max(self.backoff_until, now + seconds)
+                logger.error(f"🚫 Binance rate limit hit (HTTP {status_code}) — pausing REST calls for {seconds:.0f}s")
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            usage = {}
+            for key in self._windows:
+                limit, _, used = self._window(key, now)
+                usage[f"{key[0]}_{key[1]}s"] = {'used': used, 'limit': limit}
+            return {
+                'usage': usage,
+                'delayed': self.delayed,
+                'shed': self.shed,
+                'backoff_seconds': max(0, round(self.backoff_until - now, 1))
+            }
+
+
+# ── Konfiguration Webhook-Recording ─────────────────────────────────────────
+WEBHOOK_RECORD_FILE = os.getenv('WEBHOOK_RECORD_FILE', '')  # leer = aus; JSON-Lines, wird nur angehaengt
+RECORD_IGNORED_PARAMS = {'timestamp', 'signature', 'recvWindow'}
+
+_exchange_calls = contextvars.ContextVar('exchange_calls', default=None)
+
+
+@contextmanager
+def capture_exchange_calls():
+    """Collect every futures REST call made in this context (incl. executor/pretrade threads)"""
+    calls = []
+    token = _exchange_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _exchange_calls.reset(token)
+
+
+def record_exchange_call(method, path, params, status, body=None, error=None):
+    calls = _exchange_calls.get()
+    if calls is None:
+        return
+    calls.append({
+        'at': time.time(),
+        'method': method.upper(),
+        'path': path,
+        'params': {k: v for k, v in (params or {}).items() if k not in RECORD_IGNORED_PARAMS},
+        'status': status,
+        'body': body,
+        'error': error
+    })
+
+
+class WebhookRecorder:
+    """
+    Schreibt jeden authentifizierten Webhook (Payload ohne Secret, Antwort,
+    ausgeloeste Exchange-Calls) als JSON-Zeile in eine Append-only-Datei.
+    Serialisierung und Disk-I/O laufen auf einem eigenen Thread; Grundlage
+    fuer replay_webhooks.py.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.recorded = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='webhook-recorder', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, data, status, response, calls, received_at, duration_ms, duplicate=False):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        self._queue.put({
+            'seq': seq,
+            'received_at': received_at,
+            'duration_ms': round(duration_ms, 3),
+            'payload': {k: v for k, v in data.items() if k != 'secret'},
+            'duplicate': duplicate,
+            'status': status,
+            'response': response,
+            'exchange_calls': calls
+        })
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    return
+                for call in entry['exchange_calls']:
+                    if isinstance(call['body'], str):
+                        try:
+                            call['body'] = json.loads(call['body'])
+                        except ValueError:
+                            pass
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+                self.recorded += 1
+                if self._queue.empty():
+                    f.flush()
+
+
+# ── Konfiguration Zeit-Sync ─────────────────────────────────────────────────
+CLOCK_SYNC_INTERVAL_SECONDS = int(os.getenv('CLOCK_SYNC_INTERVAL_SECONDS', '60'))
+CLOCK_SYNC_SAMPLES = 4  # GET /time pro Sync; das Sample mit der kuerzesten RTT zaehlt
+CLOCK_DRIFT_WARN_MS = 500
+RECV_WINDOW_MIN_MS = int(os.getenv('RECV_WINDOW_MIN_MS', '5000'))  # Binance-Default
+RECV_WINDOW_MAX_MS = min(int(os.getenv('RECV_WINDOW_MAX_MS', '15000')), 60000)  # Binance erlaubt hoechstens 60s
+RECV_WINDOW_LATENCY_FACTOR = 3  # recvWindow >= Faktor x p99 der signierten Request-Latenz
+RECV_WINDOW_LATENCY_SAMPLES = 500
+TIMESTAMP_ERROR_CODE = -1021
+
+
+class ClockSync:
+    """
+    Offset zwischen lokaler Uhr und Binance-Serverzeit (NTP-Prinzip): pro
+    Sync mehrere GET /time, das Sample mit der kuerzesten RTT gewinnt und
+    wird auf die Mitte seines Round-Trips bezogen. Der Offset geht ueber
+    client.timestamp_offset in jeden signierten Timestamp ein. recvWindow
+    folgt der Latenz signierter Requests (p99 x Faktor plus halbe RTT als
+    Messunsicherheit), begrenzt auf [RECV_WINDOW_MIN_MS, RECV_WINDOW_MAX_MS].
+    Gemessen wird von GatedClient.sync_clock() bzw. der Async-Variante.
+    """
+
+    def __init__(self):
+        self.offset_ms = 0
+        self.rtt_ms = None
+        self.recv_window_ms = RECV_WINDOW_MIN_MS
+        self.synced_at = 0.0
+        self.syncs = 0
+        self.timestamp_errors = 0
+        self._lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=RECV_WINDOW_LATENCY_SAMPLES)
+
+    @staticmethod
+    def sample(sent_at, server_time_ms, received_at):
+        """(offset_ms, rtt_ms) of one GET /time round-trip; sent_at/received_at from time.time()"""
+        rtt_ms = (received_at - sent_at) * 1000
+        return server_time_ms - (sent_at * 1000 + rtt_ms / 2), rtt_ms
+
+    def apply(self, client, samples):
+        """Adopt the lowest-RTT sample as the client's timestamp offset"""
+        offset_ms, rtt_ms = min(samples, key=lambda s: s[1])
+        drift_ms = offset_ms - self.offset_ms if self.syncs else 0.0
+        if self.syncs and abs(drift_ms) > CLOCK_DRIFT_WARN_MS:
+            logger.warning(f"⏱️ Clock offset to Binance moved by {drift_ms:+.0f}ms (now {offset_ms:+.0f}ms)")
+        self.offset_ms = round(offset_ms)
+        self.rtt_ms = rtt_ms
+        self.synced_at = time.time()
+        self.syncs += 1
+        client.timestamp_offset = self.offset_ms
+        CLOCK_OFFSET.set(offset_ms / 1000)
+        CLOCK_DRIFT.set(drift_ms / 1000)
+        CLOCK_RTT.set(rtt_ms / 1000)
+        self.tune_recv_window()
+
+    def observe(self, seconds):
+        """Latency of one signed request"""
+        with self._lock:
+            self._latencies_ms.append(seconds * 1000)
+
+    def tune_recv_window(self):
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+        p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+        window = RECV_WINDOW_LATENCY_FACTOR * p99 + (self.rtt_ms or 0) / 2
+        self.recv_window_ms = int(min(max(window, RECV_WINDOW_MIN_MS), RECV_WINDOW_MAX_MS))
+        RECV_WINDOW.set(self.recv_window_ms / 1000)
+        return self.recv_window_ms
+
+    def snapshot(self):
+        return {
+            'offset_ms': self.offset_ms,
+            'rtt_ms': round(self.rtt_ms, 2) if self.rtt_ms is not None else None,
+            'recv_window_ms': self.recv_window_ms,
+            'synced_at': self.synced_at,
+            'syncs': self.syncs,
+            'timestamp_errors': self.timestamp_errors
+        }
+
+
+# ── Konfiguration Request-Policy ────────────────────────────────────────────
+REQUEST_TIMEOUT_SECONDS = float(os.getenv('REQUEST_TIMEOUT_SECONDS', '5'))  # python-binance-Default waeren 10s
+# Engere Timeouts fuer den Order-Pfad; nicht aufgefuehrte Endpoints nutzen REQUEST_TIMEOUT_SECONDS
+ENDPOINT_TIMEOUTS = {
+    ('get', 'time'): 2.0,
+    ('get', 'ticker/price'): 2.0,
+    ('get', 'account'): 3.0,
+    ('get', 'positionRisk'): 3.0,
+    ('get', 'order'): 3.0,
+    ('get', 'exchangeInfo'): 10.0,
+}
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))  # inkl. erstem Versuch
+RETRY_BASE_DELAY = 0.1  # Full Jitter: uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2^n))
+RETRY_MAX_DELAY = 2.0
+# Lesende Calls im Order-Pfad: dauert die Antwort laenger als das p95 des Endpoints, geht ein zweiter
+# identischer Request raus — die erste Antwort gewinnt
+HEDGE_READS = os.getenv('HEDGE_READS', 'true').lower() == 'true'
+HEDGED_ENDPOINTS = {('get', 'ticker/price'), ('get', 'account'), ('get', 'positionRisk'), ('get', 'order')}
+HEDGE_DEFAULT_DELAY = 0.25  # bis HEDGE_MIN_SAMPLES Latenzen vorliegen
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MIN_SAMPLES = 20
+HEDGE_LATENCY_SAMPLES = 200
+HEDGE_WORKERS = 32
+CIRCUIT_WINDOW = 20  # die letzten N Requests zaehlen
+CIRCUIT_MIN_CALLS = 10
+CIRCUIT_FAILURE_RATIO = 0.5
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+ORDER_NOT_FOUND_CODE = -2013
+
+hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge')
+
+
+class CircuitOpen(Exception):
+    """Exchange gilt als ungesund — Request ohne Netzwerk-Call abgelehnt"""
+
+
+class CircuitBreaker:
+    """
+    Merkt sich das Ergebnis der letzten CIRCUIT_WINDOW Exchange-Requests.
+    Sind mindestens CIRCUIT_FAILURE_RATIO davon transient gescheitert
+    (Netzwerk, Timeout, HTTP 5xx), oeffnet er fuer CIRCUIT_OPEN_SECONDS:
+    Requests scheitern sofort mit CircuitOpen, statt jeden Webhook auf
+    Timeouts warten zu lassen. Danach darf ein Probe-Request durch
+    (half-open) — Erfolg schliesst, ein Fehler oeffnet erneut.
+    """
+
+    def __init__(self, window=CIRCUIT_WINDOW, min_calls=CIRCUIT_MIN_CALLS,
+                 failure_ratio=CIRCUIT_FAILURE_RATIO, open_seconds=CIRCUIT_OPEN_SECONDS):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._results = deque(maxlen=window)
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self._probe_started = None
+        self.opens = 0
+        self.rejected = 0
+
+    def allow(self):
+        """Raises CircuitOpen while open; half-open lets one probe through at a time"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == 'closed':
+                return
+            if self.state == 'open' and now - self.opened_at >= self.open_seconds:
+                self._set_state('half_open')
+            # Ein Probe, dessen Ergebnis nie ankam (z.B. vom Rate-Gate abgewiesen), blockiert nicht ewig
+            if self.state == 'half_open' and (self._probe_started is None or now - self._probe_started > self.open_seconds):
+                self._probe_started = now
+                return
+            self.rejected += 1
+            remaining = max(0.0, self.opened_at + self.open_seconds - now)
+        raise CircuitOpen(f"Binance circuit open — failing fast (next probe in {remaining:.0f}s)")
+
+    def record(self, success):
+        with self._lock:
+            if self.state == 'half_open':
+                if success:
+                    self._results.clear()
+                    self._set_state('closed')
+                    logger.info("✅ Binance circuit closed — probe request succeeded")
+                else:
+                    self._open()
+                return
+            if self.state == 'open':
+                return  # spaete Ergebnisse von Requests, die vor dem Oeffnen gestartet sind
+            self._results.append(success)
+            failures = self._results.count(False)
+            if len(self._results) >= self.min_calls and failures >= self.failure_ratio * len(self._results):
+                logger.error(
+                    f"🚫 Binance circuit OPEN after {failures}/{len(self._results)} failed requests — "
+                    f"failing fast for {self.open_seconds:.0f}s"
+                )
+                self._open()
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self.opens += 1
+        self._set_state('open')
+
+    def _set_state(self, state):
+        self.state = state
+        self._probe_started = None
+        CIRCUIT_STATE.set({'closed': 0, 'half_open': 1, 'open': 2}[state])
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'recent_failures': self._results.count(False),
+                'recent_calls': len(self._results),
+                'opens': self.opens,
+                'rejected': self.rejected
+            }
+
+
+class RequestPolicy:
+    """
+    Timeouts, Retries und Hedging pro Endpoint — geteilt von GatedClient
+    und AsyncGatedClient. Transient sind Fehler, die nichts ueber den
+    Request selbst aussagen: Netzwerkfehler, Timeouts, HTTP 5xx. Lesende
+    Calls werden mit Jitter-Backoff wiederholt, Order-Anlagen nur mit
+    Client-Order-IDs (siehe GatedClient._request_futures_api).
+    """
+
+    def __init__(self, transient_errors, breaker=None):
+        self.transient_errors = tuple(transient_errors) + (BinanceRequestException,)
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self._latencies = {}  # (method, path) -> deque der letzten Latenzen (s)
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.recovered_orders = 0
+
+    @staticmethod
+    def timeout(method, path):
+        return ENDPOINT_TIMEOUTS.get((method, path), REQUEST_TIMEOUT_SECONDS)
+
+    def is_transient(self, error):
+        if isinstance(error, BinanceAPIException):
+            return error.status_code >= 500
+        return isinstance(error, self.transient_errors)
+
+    @staticmethod
+    def backoff(attempt):
+        """Full-jitter exponential delay before retry number `attempt` (1 = first retry)"""
+        return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def retry_kind(method, path, data):
+        """'read', 'create' (order creation where every order carries a client order ID) or None"""
+        if method == 'get':
+            return 'read'
+        if method == 'post' and path == 'order' and data.get('newClientOrderId'):
+            return 'create'
+        if method == 'post' and path == 'batchOrders':
+            if all(o.get('newClientOrderId') for o in json.loads(unquote_plus(data['batchOrders']))):
+                return 'create'
+        return None
+
+    def observe(self, method, path, seconds):
+        if (method, path) not in HEDGED_ENDPOINTS:
+            return
+        with self._lock:
+            self._latencies.setdefault((method, path), deque(maxlen=HEDGE_LATENCY_SAMPLES)).append(seconds)
+
+    def hedge_delay(self, method, path):
+        """Seconds to wait before sending a duplicate read (p95 of the endpoint), None if not hedged"""
+        if not HEDGE_READS or (method, path) not in HEDGED_ENDPOINTS:
+            return None
+        with self._lock:
+            latencies = sorted(self._latencies.get((method, path), ()))
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(latencies[int(len(latencies) * 0.95)], HEDGE_MIN_DELAY)
+
+    def snapshot(self):
+        return {
+            'retries': self.retries,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'recovered_orders': self.recovered_orders,
+            'circuit': self.breaker.snapshot()
+        }
+
+
+def merge_batch_results(found, results):
+    """Batch response where orders already found on Binance replace the resend's (duplicate-ID) results"""
+    return [order if order is not None else result for order, result in zip(found, results)]
+
+
+class GatedClient(Client):
+    """
+    python-binance Client, dessen Futures-Requests durch RequestPolicy,
+    CircuitBreaker und RateLimitGate laufen. Signierte Requests tragen das
+    recvWindow der ClockSync; eine -1021-Ablehnung (Timestamp ausserhalb
+    des Fensters) loest einen Resync aus und wird genau einmal wiederholt —
+    Binance hat den Request dann nicht ausgefuehrt.
+    """
+
+    def __init__(self, *args, rate_gate=None, **kwargs):
+        self.rate_gate = rate_gate or RateLimitGate()
+        self.policy = RequestPolicy((RequestException,))
+        self.clock = ClockSync()
+        self._clock_lock = threading.Lock()
+        if BINANCE_MOCK_URL:
+            use_mock_endpoints(self)
+        super().__init__(*args, **kwargs)
+
+    def sync_clock(self, seen_syncs=None):
+        """
+        Measure the offset to Binance server time and apply it. With `seen_syncs`
+        only if nobody re-synced since — concurrent -1021s share one measurement.
+        """
+        with self._clock_lock:
+            if seen_syncs is not None and self.clock.syncs != seen_syncs:
+                return
+            samples = []
+            for _ in range(CLOCK_SYNC_SAMPLES):
+                sent_at = time.time()
+                server_time = self.futures_time()['serverTime']
+                samples.append(ClockSync.sample(sent_at, server_time, time.time()))
+            self.clock.apply(self, samples)
+
+    def _request_futures_api(self, method, path, signed=False, version: int = 1, **kwargs):
+        """
+        Retries after transient failures: reads with jittered backoff (and
+        hedged, see RequestPolicy.hedge_delay), order creation only with client
+        order IDs. Its outcome is unknown, so the orders are looked up once the
+        original's recvWindow has passed (Binance can no longer accept it then);
+        a batch is only resent if orders are missing, and Binance's duplicate-ID
+        rejections in the resend are replaced by the orders already found.
+        """
+        if signed:
+            kwargs.setdefault('data', {}).setdefault('recvWindow', self.clock.recv_window_ms)
+        data = dict(kwargs.get('data') or {})  # wird beim Signieren veraendert — pro Versuch neu kopieren
+        kind = self.policy.retry_kind(method, path, data)
+        hedge_delay = self.policy.hedge_delay(method, path)
+        found = None  # batchOrders: bereits bei Binance gefundene Orders (None = nicht gefunden)
+        for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
+            sent_at = time.time()
+            request = dict(kwargs, data=dict(data))
+            try:
+                if hedge_delay is not None:
+                    result = self._hedged_request(hedge_delay, method, path, signed, version, request)
+                else:
+                    result = self._timestamped_request(method, path, signed, version, **request)
+                return merge_batch_results(found, result) if found else result
+            except Exception as e:
+                if kind is None or attempt == RETRY_MAX_ATTEMPTS or not self.policy.is_transient(e):
+                    raise
+                delay = self.policy.backoff(attempt)
+                if kind == 'create':
+                    delay = max(delay, sent_at + data['recvWindow'] / 1000 - time.time())
+                self.policy.retries += 1
+                EXCHANGE_RETRIES.labels(method, path).inc()
+                logger.warning(f"🔁 {method.upper()} {path} failed ({e or type(e).__name__}) — retry {attempt}/{RETRY_MAX_ATTEMPTS - 1} in {delay:.2f}s")
+                time.sleep(delay)
+            if kind == 'create':
+                found = self._created_orders(path, data)
+                if found if path == 'order' else all(found):
+                    self.policy.recovered_orders += 1
+                    ORDERS_RECOVERED.inc()
+                    logger.info(f"♻️ {method.upper()} {path}: orders reached Binance despite the error — not resending")
+                    return found
+                if path == 'batchOrders' and not any(found):
+                    found = None
+
+    def _created_orders(self, path, data):
+        """Orders of a create request that reached Binance, by client order ID (None where not found)"""
+        if path == 'order':
+            return self._order_by_client_id(data['symbol'], data['newClientOrderId'])
+        orders = json.loads(unquote_plus(data['batchOrders']))
+        return [self._order_by_client_id(o['symbol'], o['newClientOrderId']) for o in orders]
+
+    def _order_by_client_id(self, symbol, client_order_id):
+        try:
+            return self.futures_get_order(symbol=symbol, origClientOrderId=client_order_id)
+        except BinanceAPIException as e:
+            if e.code == ORDER_NOT_FOUND_CODE:
+                return None
+            raise
+
+    def _hedged_request(self, delay, method, path, signed, version, request):
+        """Send a read; if it has not answered after `delay`, send it again — the first success wins"""
+        def send():
+            return self._timestamped_request(method, path, signed, version, **dict(request, data=dict(request['data'])))
+
+        primary = hedge_pool.submit(contextvars.copy_context().run, send)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        self.policy.hedges += 1
+        hedge = hedge_pool.submit(contextvars.copy_context().run, send)
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = 'hedge' if future is hedge else 'primary'
+                    if winner == 'hedge':
+                        self.policy.hedge_wins += 1
+                    EXCHANGE_HEDGES.labels(path, winner).inc()
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _timestamped_request(self, method, path, signed, version, **kwargs):
+        """One request; a -1021 rejection resyncs the clock and sends it once more"""
+        data = dict(kwargs.get('data') or {})
+        seen_syncs = self.clock.syncs
+        try:
+            return self._send_futures_request(method, path, signed, version, **kwargs)
+        except BinanceAPIException as e:
+            if not signed or e.code != TIMESTAMP_ERROR_CODE:
+                raise
+            self.clock.timestamp_errors += 1
+            logger.warning(f"⏱️ {method.upper()} {path} rejected with -1021 — resyncing clock and retrying once")
+            self.sync_clock(seen_syncs)
+            data['recvWindow'] = max(data['recvWindow'], self.clock.recv_window_ms)
+            return self._send_futures_request(method, path, signed, version, **dict(kwargs, data=data))
+
+    def _send_futures_request(self, method, path, signed, version, **kwargs):
+        try:
+            self.policy.breaker.allow()
+        except CircuitOpen:
+            EXCHANGE_ERRORS.labels(method, path, 'circuit_open').inc()
+            raise
+        try:
+            self.rate_gate.acquire(method, path, kwargs.get('data'))
+        except RateLimitExceeded:
+            EXCHANGE_ERRORS.labels(method, path, 'shed').inc()
+            raise
+        params = dict(kwargs.get('data') or {})  # vor der Signatur kopieren (fuers Recording)
+        uri = self._create_futures_api_uri(path, version)
+        kwargs = self._get_request_kwargs(method, signed, True, **kwargs)
+        kwargs['timeout'] = self.policy.timeout(method, path)
+
+        started = time.perf_counter()
+        try:
+            response = getattr(self.session, method)(uri, **kwargs)
+        except Exception as e:
+            EXCHANGE_ERRORS.labels(method, path, 'network').inc()
+            record_exchange_call(method, path, params, None, error=str(e))
+            self.policy.breaker.record(False)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            EXCHANGE_LATENCY.labels(method, path).observe(elapsed)
+        self.policy.breaker.record(response.status_code < 500)
+        self.policy.observe(method, path, elapsed)
+        if signed:
+            self.clock.observe(elapsed)
+        self.response = response
+        self.rate_gate.observe(response.headers, response.status_code)
+        if not 200 <= response.status_code < 300:
+            EXCHANGE_ERRORS.labels(method, path, str(response.status_code)).inc()
+        if _exchange_calls.get() is not None:
+            record_exchange_call(method, path, params, response.status_code, response.text)
+        return self._handle_response(response)
+
+
+# ── Konfiguration Duplikat-Erkennung ────────────────────────────────────────
+DEDUP_TTL_SECONDS = int(os.getenv('DEDUP_TTL_SECONDS', '600'))  # gleiche alert_id 10 Min lang unterdruecken
+# Ohne alert_id nur echte Retries abfangen — ein gleichlautender Alert danach ist ein neues Signal
+DEDUP_CONTENT_TTL_SECONDS = int(os.getenv('DEDUP_CONTENT_TTL_SECONDS', '5'))
+DEDUP_MAX_ENTRIES = int(os.getenv('DEDUP_MAX_ENTRIES', '10000'))
+DEDUP_WAIT_SECONDS = 30  # so lange wartet ein Duplikat auf das Ergebnis des laufenden Originals
+
+
+class IdempotencyCache:
+    """
+    Begrenzter TTL/LRU-Cache fuer Webhook-Ergebnisse. Schluessel ist die
+    optionale `alert_id` oder ein Hash des Payloads (ohne Secret).
+    Duplikate erhalten das Ergebnis des Originals — laeuft das Original
+    noch, wird darauf gewartet. 5xx-Ergebnisse werden nicht gemerkt, damit
+    ein Retry nach einem transienten Fehler erneut ausgefuehrt wird.
+    Ohne `alert_id` ist der Inhalt kein Beweis fuer ein Duplikat: zwei
+    CLOSE_LONG fuer dasselbe Symbol sind zwei Signale. Solche Entries werden
+    nur DEDUP_CONTENT_TTL_SECONDS lang zusammengefasst, CLOSE_* gar nicht
+    (siehe ttl_for).
+    Jeder Eintrag bekommt eine eigene `client_id` fuer die newClientOrderIds.
+    Binance lehnt eine doppelte newClientOrderId nur ab, solange die erste
+    Order offen ist — deshalb merkt sich der Cache fehlgeschlagene Versuche:
+    der neue Eintrag traegt dann `retry_since` und die client_id des ersten
+    Versuchs, und der Aufrufer prueft vor dem erneuten Senden, ob Orders
+    dieses Versuchs schon existieren.
+    """
+
+    def __init__(self, ttl_seconds=DEDUP_TTL_SECONDS, max_entries=DEDUP_MAX_ENTRIES,
+                 content_ttl_seconds=DEDUP_CONTENT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.content_ttl_seconds = content_ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> {'created_at', 'ttl', 'done': Event, 'response', 'retry_since', 'client_id'}
+        self._entries = OrderedDict()
+        self._failed = OrderedDict()  # key -> (Start des ersten fehlgeschlagenen Versuchs, client_id, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(data):
+        alert_id = data.get('alert_id')
+        if alert_id:
+            material = f"id:{alert_id}"
+        else:
+            material = json.dumps({k: v for k, v in data.items() if k != 'secret'}, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def ttl_for(self, data):
+        """Dedup window for this alert in seconds — 0 means every request executes"""
+        if data.get('alert_id'):
+            return self.ttl_seconds
+        if data.get('signal') in ('CLOSE_LONG', 'CLOSE_SHORT'):
+            return 0
+        return self.content_ttl_seconds
+
+    def begin(self, key, ttl=None):
+        """Returns (entry, is_new). A new entry must be finished with complete() or discard()"""
+        ttl = self.ttl_seconds if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            if ttl <= 0:
+                # Nicht gemerkt — complete()/discard() finden den Eintrag nicht und lassen ihn in Ruhe
+                self.misses += 1
+                return self._new_entry(now, ttl), True
+
+            entry = self._entries.get(key)
+            if entry is not None and now - entry['created_at'] <= entry['ttl']:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, False
+
+            failed = self._failed.get(key)
+            if failed is not None and now - failed[0] > failed[2]:
+                del self._failed[key]
+                failed = None
+            entry = self._new_entry(now, ttl)
+            if failed is not None:
+                entry['retry_since'], entry['client_id'] = failed[0], failed[1]
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.misses += 1
+            return entry, True
+
+    def complete(self, key, payload, status):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['response'] = (payload, status)
+            if status >= 500:
+                del self._entries[key]
+                self._remember_failed(key, entry)
+            else:
+                self._failed.pop(key, None)
+        self._settle(entry)
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._remember_failed(key, entry)
+        if entry is not None:
+            self._settle(entry)
+
+    def wait(self, entry, timeout=DEDUP_WAIT_SECONDS):
+        """Block until the original finished; returns (payload, status) or None"""
+        entry['done'].wait(timeout)
+        return entry['response']
+
+    def _new_entry(self, now, ttl):
+        return {
+            'created_at': now,
+            'ttl': ttl,
+            'done': threading.Event(),
+            'response': None,
+            'retry_since': None,
+            'client_id': f"tv-{uuid.uuid4().hex[:24]}"
+        }
+
+    def _settle(self, entry):
+        entry['done'].set()
+
+    def _remember_failed(self, key, entry):
+        # Der frueheste Versuch zaehlt — dessen Orders sucht der naechste Retry
+        self._failed.setdefault(key, (entry['retry_since'] or entry['created_at'], entry['client_id'], entry['ttl']))
+        self._failed.move_to_end(key)
+        while len(self._failed) > self.max_entries:
+            self._failed.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ── Konfiguration Signal-WAL ────────────────────────────────────────────────
+SIGNAL_WAL_FILE = os.getenv('SIGNAL_WAL_FILE', 'signal_wal.jsonl')  # leer = aus; jeder Prozess schreibt <name>.<pid><ext>
+SIGNAL_WAL_SYNC_TIMEOUT = 5.0  # laenger auf das fsync warten → ohne Crash-Schutz ausfuehren
+SIGNAL_WAL_COMPACT_BYTES = int(os.getenv('SIGNAL_WAL_COMPACT_BYTES', str(8 * 1024 * 1024)))
+SIGNAL_REPLAY_MAX_AGE_SECONDS = int(os.getenv('SIGNAL_REPLAY_MAX_AGE_SECONDS', '300'))  # aeltere Signale verfallen
+
+
+class SignalLog:
+    """
+    Write-ahead log fuer angenommene Signale (JSON-Lines, append-only).
+    accept() liefert ein Future, das erst erfuellt ist, wenn der Eintrag per
+    fsync auf der Platte liegt — alles, was waehrend eines fsync eintrifft,
+    teilt sich das naechste (Group Commit, kein fester Wartezeitraum).
+    complete() markiert ein Signal als ausgefuehrt, ohne auf die Platte zu
+    warten: ein verlorenes Done faengt der Replay ueber die Client-Order-IDs
+    ab. Beim Oeffnen wird das File auf die offenen Eintraege kompaktiert,
+    pending() liefert sie fuer den Replay nach einem Absturz.
+    Jeder Prozess (gunicorn-/uvicorn-Worker) schreibt sein eigenes File
+    `<name>.<pid><ext>` und haelt solange einen flock auf `<file>.lock`.
+    Files, deren Lock frei ist, gehoeren beendeten Prozessen: genau ein neuer
+    Prozess uebernimmt ihre offenen Eintraege in sein eigenes File und
+    loescht sie — ein Signal wird so von hoechstens einem Worker nachgeholt.
+    """
+
+    def __init__(self, path, compact_bytes=SIGNAL_WAL_COMPACT_BYTES):
+        root, ext = os.path.splitext(path)
+        self.base_path = path
+        self.path = f"{root}.{os.getpid()}{ext}"
+        self.compact_bytes = compact_bytes
+        self.commits = 0
+        self.accepted = 0
+        self._file_lock = self._try_lock(self.path, blocking=True)  # bis close() bzw. Prozessende gehalten
+        self._open = self._load(self.path)  # id -> accept-Record; gehoert nach dem Start nur dem Writer-Thread
+        adopted = self._adopt_orphans()
+        self._recovered = sorted(self._open.values(), key=lambda r: r['at'])
+        self._file = None
+        self._rewrite()
+        # Erst jetzt liegen die uebernommenen Eintraege im eigenen File
+        for orphan, lock in adopted:
+            os.remove(orphan)
+            os.remove(f"{orphan}.lock")
+            lock.close()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='signal-wal', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _try_lock(path, blocking=False):
+        """Exclusive flock on `<path>.lock`; the open lock file, or None while another process holds it"""
+        lock = open(f"{path}.lock", 'a')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            lock.close()
+            return None
+        return lock
+
+    def _adopt_orphans(self):
+        """Merge the open entries of WAL files no live process holds; returns [(path, lock)]"""
+        root, ext = os.path.splitext(self.base_path)
+        pattern = re.compile(rf"{re.escape(root)}(\.\d+)?{re.escape(ext)}")
+        adopted = []
+        for orphan in sorted(glob.glob(f"{glob.escape(root)}*{glob.escape(ext)}")):
+            if orphan == self.path or not pattern.fullmatch(orphan):
+                continue
+            lock = self._try_lock(orphan)
+            if lock is None:
+                continue  # Gehoert einem laufenden Worker
+            if not os.path.exists(orphan):
+                lock.close()  # Ein anderer Prozess hat es inzwischen uebernommen
+                continue
+            records = self._load(orphan)
+            if records:
+                logger.warning(f"♻️ Signal WAL: adopting {len(records)} open signal(s) from {orphan}")
+            self._open.update(records)
+            adopted.append((orphan, lock))
+        return adopted
+
+    @staticmethod
+    def _load(path):
+        records = {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # beim Absturz abgeschnittene letzte Zeile
+                    if record.get('op') == 'accept':
+                        records[record['id']] = record
+                    else:
+                        records.pop(record.get('id'), None)
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _rewrite(self):
+        """Replace the file with only the open entries (atomic rename, then reopen for appending)"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in self._open.values():
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file:
+            self._file.close()
+        os.replace(tmp_path, self.path)
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def pending(self):
+        """Signals accepted but never completed before the last shutdown, oldest first"""
+        return list(self._recovered)
+
+    def accept(self, key, client_id, data, signal_id=None):
+        """Queue a signal; returns a Future resolving to its id once it is durable"""
+        record = {
+            'op': 'accept',
+            'id': signal_id or uuid.uuid4().hex,
+            'at': time.time(),
+            'key': key,
+            'client_id': client_id,
+            'payload': {k: v for k, v in data.items() if k != 'secret'}
+        }
+        future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def complete(self, signal_id, status):
+        self._queue.put(({'op': 'done', 'id': signal_id, 'at': time.time(), 'status': status}, None))
+
+    def snapshot(self):
+        return {'path': self.path, 'open': len(self._open), 'accepted': self.accepted, 'commits': self.commits}
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+        self._file_lock.close()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = None in batch
+            batch = [item for item in batch if item is not None]
+            waiting = [(record, future) for record, future in batch if future is not None]
+            try:
+                for record, _ in batch:
+                    self._file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                    if record['op'] == 'accept':
+                        self._open[record['id']] = record
+                    else:
+                        self._open.pop(record['id'], None)
+                self._file.flush()
+                if waiting:
+                    os.fsync(self._file.fileno())
+                    self.commits += 1
+                    self.accepted += len(waiting)
+                for record, future in waiting:
+                    future.set_result(record['id'])
+                if self._file.tell() > self.compact_bytes:
+                    self._rewrite()
+            except OSError as e:
+                logger.error(f"❌ Signal WAL write failed: {e}")
+                for _, future in waiting:
+                    if not future.done():
+                        future.set_exception(e)
+            if closing:
+                self._file.close()
+                return
+
+
+# ── Konfiguration 202-Accepted-Modus ────────────────────────────────────────
+WEBHOOK_ACCEPT_ASYNC = os.getenv('WEBHOOK_ACCEPT_ASYNC', 'false').lower() == 'true'  # 202 + Tracking-ID statt warten
+SIGNAL_INDEX_MAX_ENTRIES = int(os.getenv('SIGNAL_INDEX_MAX_ENTRIES', '10000'))
+SIGNAL_INDEX_SYMBOL_LIMIT = 50  # GET /orders?symbol= liefert die neuesten N Signale
+
+
+class SignalIndex:
+    """
+    In-Memory-Index der angenommenen Signale fuer GET /orders/<id> und
+    GET /orders?symbol=. Ein Eintrag durchlaeuft queued → running →
+    done/failed und haelt am Ende die Webhook-Antwort (inkl. Order-IDs).
+    Begrenzt auf die neuesten `max_entries` Signale; die Tracking-ID ist
+    zugleich die ID des Signals im WAL.
+    """
+
+    def __init__(self, max_entries=SIGNAL_INDEX_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # id -> Eintrag, aelteste zuerst
+        self._by_symbol = {}  # symbol -> OrderedDict[id, None]
+
+    def add(self, signal_id, data, received_at):
+        entry = {
+            'id': signal_id,
+            'state': 'queued',
+            'signal': data.get('signal'),
+            'symbol': data.get('symbol'),
+            'received_at': received_at,
+            'started_at': None,
+            'finished_at': None,
+            'http_status': None,
+            'response': None
+        }
+        with self._lock:
+            self._entries[signal_id] = entry
+            self._by_symbol.setdefault(entry['symbol'], OrderedDict())[signal_id] = None
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                ids = self._by_symbol.get(evicted['symbol'])
+                if ids is not None:
+                    ids.pop(evicted['id'], None)
+                    if not ids:
+                        del self._by_symbol[evicted['symbol']]
+
+    def started(self, signal_id):
+        with self._lock:
+            entry = self._entries.get(signal_id)
+            if entry is not None:
+                entry['state'] = 'running'
+                entry['started_at'] = time.time()
+
+    def finish(self, signal_id, payload, status):
+        with self._lock:
+            entry = self._entries.get(signal_id)
+            if entry is not None:
+                entry['state'] = 'done' if status < 400 else 'failed'
+                entry['finished_at'] = time.time()
+                entry['http_status'] = status
+                entry['response'] = payload
+
+    def get(self, signal_id):
+        with self._lock:
+            entry = self._entries.get(signal_id)
+            return dict(entry) if entry is not None else None
+
+    def for_symbol(self, symbol, limit=SIGNAL_INDEX_SYMBOL_LIMIT):
+        """Newest first"""
+        with self._lock:
+            ids = list(self._by_symbol.get(symbol, ()))[-limit:]
+            return [dict(self._entries[signal_id]) for signal_id in reversed(ids)]
+
+    def states(self):
+        with self._lock:
+            counts = {}
+            for entry in self._entries.values():
+                counts[entry['state']] = counts.get(entry['state'], 0) + 1
+            return counts
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def with_order_status(entry, tracker):
+    """Index entry plus the live status of its orders as far as the user stream knows it"""
+    order_ids = (entry['response'] or {}).get('order_ids') or {}
+    entry['orders'] = {
+        role: {'order_id': order_id, 'status': tracker.status(order_id) if tracker else None}
+        for role, order_id in order_ids.items()
+    }
+    return entry
+
+
+# ── Konfiguration Start ─────────────────────────────────────────────────────
+TRADER_INIT_RETRY_MAX_WAIT = float(os.getenv('TRADER_INIT_RETRY_MAX_WAIT', '60'))  # max. Backoff zwischen Versuchen
+
+
+class ConfigurationError(ValueError):
+    """Fehlende/ungueltige Konfiguration — ein erneuter Verbindungsversuch hilft nicht"""
+
+
+class TraderInitializer:
+    """
+    Baut den Trader im Hintergrund auf, damit Import und Worker-Boot nicht
+    auf Binance warten. Fehlgeschlagene Verbindungsversuche werden mit
+    exponentiellem Backoff wiederholt, ConfigurationError ist endgueltig.
+    Der Zustand (pending/starting/replaying/ready/failed) wird von /healthz
+    gemeldet; Webhooks werden erst ab `ready` angenommen, also nach dem
+    WAL-Replay — nachgeholte Signale laufen vor allen neuen.
+    Die ASGI-Variante nutzt dieselbe Buchfuehrung aus ihrem Event-Loop.
+    """
+
+    def __init__(self, max_wait=TRADER_INIT_RETRY_MAX_WAIT):
+        self.max_wait = max_wait
+        self.state = 'pending'
+        self.attempts = 0
+        self.last_error = None
+        self.started_at = time.time()
+        self.ready_at = None
+        self._thread = None
+
+    def attempt_started(self):
+        self.state = 'starting'
+        self.attempts += 1
+
+    def replaying(self):
+        self.state = 'replaying'
+
+    def succeeded(self):
+        self.state = 'ready'
+        self.last_error = None
+        self.ready_at = time.time()
+        logger.info(f"✅ Trader initialized after {self.attempts} attempt(s) in {self.ready_at - self.started_at:.1f}s")
+
+    def failed(self, error):
+        """Record a failed attempt; returns the seconds to wait before retrying, or None to give up"""
+        self.last_error = str(error)
+        if isinstance(error, ConfigurationError):
+            self.state = 'failed'
+            logger.error(f"❌ Failed to initialize trader: {error}")
+            return None
+        self.state = 'pending'
+        wait = min(self.max_wait, 2 ** (self.attempts - 1))
+        logger.error(f"❌ Failed to initialize trader (attempt {self.attempts}): {error} — retrying in {wait:.0f}s")
+        return wait
+
+    def start(self, factory, on_ready):
+        """Run `on_ready(factory())` on a daemon thread, retrying until it succeeds"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, args=(factory, on_ready), name='trader-init', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, factory, on_ready):
+        while True:
+            self.attempt_started()
+            try:
+                instance = factory()
+            except Exception as e:
+                wait = self.failed(e)
+                if wait is None:
+                    return
+                time.sleep(wait)
+                continue
+            on_ready(instance)
+            self.succeeded()
+            return
+
+    def snapshot(self):
+        return {
+            'state': self.state,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'uptime_seconds': round(time.time() - self.started_at, 1)
+        }
 
 
 class BinanceTrader:
@@ -46,42 +2752,198 @@ class BinanceTrader:
 
         if not all([self.api_key, self.api_secret, self.webhook_secret]):
             logger.error("❌ Missing required environment variables!")
-            raise ValueError("BINANCE_API_KEY, BINANCE_SECRET_KEY, and WEBHOOK_SECRET must be set")
+            raise ConfigurationError("BINANCE_API_KEY, BINANCE_SECRET_KEY, and WEBHOOK_SECRET must be set")
 
         try:
+            if BINANCE_MOCK_URL:
+                logger.info(f"🧪 Using local Binance stand-in at {BINANCE_MOCK_URL}")
             if self.testnet:
                 logger.info("🧪 Binance TESTNET Mode ENABLED")
-                self.client = Client(
+                self.client = GatedClient(
                     self.api_key,
                     self.api_secret,
                     testnet=True
                 )
-                self.client.API_URL = 'https://testnet.binancefuture.com'
+                if not BINANCE_MOCK_URL:
+                    self.client.API_URL = 'https://testnet.binancefuture.com'
             else:
                 logger.info("💰 Binance LIVE Mode ENABLED")
-                self.client = Client(self.api_key, self.api_secret)
+                self.client = GatedClient(self.api_key, self.api_secret)
+
+            self.entry_time_in_force = ENTRY_TIME_IN_FORCE
+            if self.entry_time_in_force == 'GTD' and ENTRY_FILL_TIMEOUT_SECONDS <= GTD_MIN_SECONDS:
+                logger.warning(
+                    f"⚠️ GTD needs ENTRY_FILL_TIMEOUT_SECONDS > {GTD_MIN_SECONDS} — falling back to GTC with background cancel"
+                )
+                self.entry_time_in_force = 'GTC'
+
+            # Erst die Uhr abgleichen — alle folgenden signierten Requests nutzen den Offset
+            self.client.sync_clock()
+
+            # Account-Snapshot, Exchange-Info und offene Orders (Margin, Order-Store) parallel laden
+            self.price_stream = MarkPriceStream(futures_stream_url(self.testnet))
+            self.account_book = AccountBook(self.client, mark_price=self.price_stream.get)
+            self.symbol_cache = SymbolInfoCache(self.client)
+            self.order_store = OrderStore(ORDER_STORE_FILE) if ORDER_STORE_FILE else None
+            warmup = [
+                pretrade_pool.submit(self.client.futures_account),
+                pretrade_pool.submit(self.symbol_cache.start),
+                pretrade_pool.submit(self.client.futures_get_open_orders)
+            ]
+            wait(warmup)  # auch bei einem Fehler alle abwarten — close() raeumt sonst zu frueh auf
+            results = [future.result() for future in warmup]
+            # Offene Orders vor dem Snapshot buchen — sonst steckt ihre Margin doppelt im Abgleich
+            self.account_book.track_orders(results[2])
+            self.account_book.apply_snapshot(results[0])
+            balance = self.account_book.balances()['balance']
+
+            self.scheduler = DeadlineScheduler()
+            self.scheduler.start()
+
+            self.order_tracker = OrderTracker(self.order_store)
+            self._protective_pairs = {}  # orderId -> orderId des Geschwister-Legs (SL <-> TP)
+            self._fallback_poll_lock = threading.Lock()
+            self._fallback_poll_armed = False
+            if self.order_store:
+                self.recover_orders(results[2])
+            self.user_stream = UserDataStream(
+                self.client,
+                futures_stream_url(self.testnet),
+                handlers={
+                    'ORDER_TRADE_UPDATE': self._on_order_update,
+                    'ACCOUNT_UPDATE': self.account_book.on_account_update,
+                    'ACCOUNT_CONFIG_UPDATE': self.account_book.on_account_config_update
+                },
+                on_resync=self._on_user_stream_connect
+            )
+            if USE_USER_DATA_STREAM:
+                self.user_stream.start()
+            self.scheduler.schedule(ACCOUNT_RECONCILE_SECONDS, self._reconcile_account)
+            if CLOCK_SYNC_INTERVAL_SECONDS > 0:
+                self.scheduler.schedule(CLOCK_SYNC_INTERVAL_SECONDS, self._sync_clock)
 
-            account = self.client.futures_account()
-            balance = float(account['totalWalletBalance'])
+            if USE_MARK_PRICE_STREAM:
+                self.price_stream.start()
 
             logger.info("✅ Connected to Binance successfully")
             logger.info(f"   Account Balance: ${balance:.2f} USDT")
             logger.info(f"   Testnet: {self.testnet}")
             logger.info(f"   Entry Fill Timeout: {ENTRY_FILL_TIMEOUT_SECONDS}s")
+            logger.info(f"   Entry Time in Force: {self.entry_time_in_force}")
+            logger.info(f"   Order Store: {ORDER_STORE_FILE or 'disabled'}")
+            logger.info(
+                f"   Clock Offset: {self.client.clock.offset_ms:+d}ms (RTT {self.client.clock.rtt_ms:.0f}ms), "
+                f"recvWindow {self.client.clock.recv_window_ms}ms"
+            )
 
         except Exception as e:
             logger.error(f"❌ Failed to connect to Binance: {e}")
+            self.close()
             raise
 
+    def close(self):
+        """
+        Stop all background threads and release connections. Also runs after a
+        failed __init__ — only the parts built so far exist then.
+        """
+        for name in ('price_stream', 'user_stream', 'scheduler', 'symbol_cache'):
+            component = getattr(self, name, None)
+            if component is not None:
+                component.stop()
+        if getattr(self, 'order_store', None):
+            self.order_store.close()
+        if getattr(self, 'client', None):
+            self.client.close_connection()
+
+    def _on_order_update(self, msg):
+        self.account_book.on_order_update(msg)
+        self.order_tracker.on_order_update(msg)
+        o = msg['o']
+        if o['X'] in TERMINAL_ORDER_STATUSES:
+            sibling = self._protective_pairs.pop(o['i'], None)
+            if sibling is not None:
+                self._protective_pairs.pop(sibling, None)
+                if o['X'] == 'FILLED':
+                    # OCO: SL oder TP hat die Position geschlossen — das andere Leg ist verwaist
+                    logger.info("🔗 %s protective order %s filled — cancelling its sibling %s", o['s'], o['i'], sibling)
+                    self.scheduler.schedule(0, self._cancel_orders, o['s'], [sibling])
+
+    def link_protective_orders(self, sl_order_id, tp_order_id):
+        """Pair SL and TP as one-cancels-the-other (see _on_order_update)"""
+        self._protective_pairs[sl_order_id] = tp_order_id
+        self._protective_pairs[tp_order_id] = sl_order_id
+
+    def cancel_protective_orders(self, symbol, position_side=None, exclude=()):
+        """
+        Cancel the SL/TP orders left behind once `symbol`'s position was closed
+        or reversed — sonst schliessen sie spaeter eine neue Position zu alten
+        Preisen. Laeuft im Signal-Thread, damit ein nachfolgendes Signal fuer
+        das Symbol nicht seine frischen SL/TP verliert.
+        """
+        try:
+            open_orders = self.client.futures_get_open_orders(symbol=symbol)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not list open orders of {symbol} to cancel its SL/TP: {e}")
+            return
+        self._cancel_orders(symbol, stale_protective_order_ids(open_orders, position_side, exclude))
+
+    def _on_user_stream_connect(self):
+        """Nach (Re-)Connect: Account und offene Orders aus der Verbindungsluecke nachholen"""
+        if self.user_stream.reconnects:
+            self.account_book.reconcile()
+        self.resync_pending_orders()
+
+    def _reconcile_account(self):
+        try:
+            with request_priority(PRIORITY_LOW):
+                self.account_book.reconcile()
+        except Exception as e:
+            logger.warning(f"⚠️ Account reconciliation failed: {e}")
+        finally:
+            self.scheduler.schedule(ACCOUNT_RECONCILE_SECONDS, self._reconcile_account)
+
+    def _sync_clock(self):
+        try:
+            with request_priority(PRIORITY_LOW):
+                self.client.sync_clock()
+        except Exception as e:
+            logger.warning(f"⚠️ Clock sync failed, keeping offset {self.client.clock.offset_ms:+d}ms: {e}")
+        finally:
+            self.scheduler.schedule(CLOCK_SYNC_INTERVAL_SECONDS, self._sync_clock)
+
+    def _account_book_is_live(self):
+        return self.user_stream.connected and self.account_book.loaded
+
+    def readiness(self):
+        """Warm-cache checks for /readyz — reads only in-memory state"""
+        return {
+            'exchange_info': self.symbol_cache.loaded_at > 0,
+            'account': self.account_book.loaded,
+            'prices': not USE_MARK_PRICE_STREAM or self.price_stream.last_message_at > 0
+        }
+
+    def get_positions(self, symbol=None):
+        """
+        Open positions (positionRisk schema) — from the account book while the
+        stream is live and no own order for the symbol awaits its ACCOUNT_UPDATE, else REST
+        """
+        if self._account_book_is_live() and self.account_book.is_current(symbol):
+            return self.account_book.positions(symbol)
+        if symbol:
+            positions = self.client.futures_position_information(symbol=symbol)
+        else:
+            positions = self.client.futures_position_information()
+        return [p for p in positions if float(p['positionAmt']) != 0]
+
     def get_account_info(self):
         try:
-            account = self.client.futures_account()
-            balance = float(account['totalWalletBalance'])
-            available = float(account['availableBalance'])
+            if not self._account_book_is_live():
+                self.account_book.reconcile()
+            balances = self.account_book.balances()
 
             return {
-                'balance': balance,
-                'available': available,
+                'balance': balances['balance'],
+                'available': balances['available'],
                 'testnet': self.testnet
             }
         except Exception as e:
@@ -89,6 +2951,12 @@ class BinanceTrader:
             return None
 
     def get_current_price(self, symbol):
+        price = self.price_stream.get(symbol)
+        CACHE_REQUESTS.labels('mark_price', 'miss' if price is None else 'hit').inc()
+        if price is not None:
+            return price
+
+        # Stream veraltet oder Symbol noch nicht gesehen — REST-Fallback
         try:
             ticker = self.client.futures_symbol_ticker(symbol=symbol)
             return float(ticker['price'])
@@ -99,11 +2967,7 @@ class BinanceTrader:
     def get_symbol_precision(self, symbol):
         """Get quantity AND price precision/tick size for a symbol"""
         try:
-            exchange_info = self.client.futures_exchange_info()
-            symbol_info = next(
-                (s for s in exchange_info['symbols'] if s['symbol'] == symbol),
-                None
-            )
+            symbol_info = self.symbol_cache.get(symbol)
             if not symbol_info:
                 return None, None, None, None
 
@@ -125,67 +2989,42 @@ class BinanceTrader:
         """Round price to the symbol's allowed tick size"""
         if not tick_size or tick_size == 0:
             return price
-        return round(round(price / tick_size) * tick_size, 8)
+        return float(_round_to_step(_to_decimal(price), _to_decimal(tick_size), ROUND_HALF_UP))
+
+    def get_available_balance(self):
+        live = self._account_book_is_live()
+        CACHE_REQUESTS.labels('account', 'hit' if live else 'miss').inc()
+        if not live:
+            self.account_book.reconcile()
+        return self.account_book.balances()['available']
 
-    def calculate_position_size(self, symbol, entry_price, stop_loss, risk_usd):
+    def calculate_position_size(self, symbol, entry_price, stop_loss, risk_usd, available_balance=None, rules=None):
         """
-        Calculate position size based on risk AND available margin.
+        Calculate position size based on risk AND available margin (position_size_for_risk).
+        `available_balance` / `rules` koennen aus dem Pre-Trade-Fan-Out uebergeben werden.
         """
         try:
-            exchange_info = self.client.futures_exchange_info()
-            symbol_info = next(
-                (s for s in exchange_info['symbols'] if s['symbol'] == symbol),
-                None
-            )
+            if rules is None:
+                rules = self.symbol_cache.rules(symbol)
 
-            if not symbol_info:
+            if not rules:
                 logger.error(f"❌ Symbol {symbol} not found")
                 return None
 
-            quantity_precision = symbol_info['quantityPrecision']
-
-            risk_per_unit = abs(entry_price - stop_loss)
+            if available_balance is None:
+                available_balance = self.get_available_balance()
 
-            if risk_per_unit <= 0:
-                logger.error("❌ Invalid Stop Loss")
+            quantity = position_size_for_risk(entry_price, stop_loss, risk_usd, available_balance, rules)
+            if quantity is None:
                 return None
 
-            position_size = risk_usd / risk_per_unit
-
-            account = self.client.futures_account()
-            available_balance = float(account['availableBalance'])
-
-            leverage = 20
+            position_size = float(quantity)
 
-            max_position_value = available_balance * leverage * 0.95
-            max_position_size = max_position_value / entry_price
-
-            if position_size > max_position_size:
-                logger.warning(
-                    f"⚠️ Position capped from {position_size:.6f} to {max_position_size:.6f}"
-                )
-                position_size = max_position_size
-
-            position_size = round(position_size, quantity_precision)
-
-            min_notional = 5.0
-            notional_value = position_size * entry_price
-
-            if notional_value < min_notional:
-                logger.warning(
-                    f"⚠️ Position too small (${notional_value:.2f}), adjusting to minimum"
-                )
-                position_size = round(
-                    min_notional / entry_price,
-                    quantity_precision
-                )
-
-            logger.info(f"📊 Position Size: {position_size} {symbol}")
-            logger.info(f"   Notional Value: ${position_size * entry_price:.2f}")
-            logger.info(f"   Risk per Unit: ${risk_per_unit:.2f}")
-            logger.info(f"   Total Risk: ${risk_usd:.2f}")
-            logger.info(f"   Available Balance: ${available_balance:.2f}")
-            logger.info(f"   Leverage: {leverage}x")
+            logger.info("📊 Position Size: %s %s", position_size, symbol)
+            logger.info("   Notional Value: $%.2f", position_size * entry_price)
+            logger.info("   Risk per Unit: $%.2f", abs(entry_price - stop_loss))
+            logger.info("   Total Risk: $%.2f", risk_usd)
+            logger.info("   Available Balance: $%.2f", available_balance)
 
             return position_size
 
@@ -193,31 +3032,37 @@ class BinanceTrader:
             logger.error(f"❌ Error calculating position size: {e}")
             return None
 
-    def close_position(self, symbol):
+    def close_position(self, symbol, position_side=None, client_id=None):
         """
         Close all positions for a symbol using MARKET order.
         (Exit bleibt Market — hier zaehlt schnelles Rauskommen mehr als Slippage-Schutz)
+        Im Hedge-Modus wird nur das Leg `position_side` ('LONG'/'SHORT') geschlossen.
         """
         try:
-            positions = self.client.futures_position_information(symbol=symbol)
+            positions = self.get_positions(symbol)
 
             for pos in positions:
+                if HEDGE_MODE and position_side and pos.get('positionSide') != position_side:
+                    continue
                 pos_amt = float(pos['positionAmt'])
 
                 if pos_amt != 0:
                     side = 'SELL' if pos_amt > 0 else 'BUY'
                     quantity = abs(pos_amt)
 
-                    logger.info(f"📤 Closing position: {quantity} {symbol} (Side: {side})")
+                    logger.info("📤 Closing position: %s %s (Side: %s)", quantity, symbol, side)
 
-                    order = self.client.futures_create_order(
-                        symbol=symbol,
-                        side=side,
-                        type='MARKET',
-                        quantity=quantity
-                    )
+                    params = {'symbol': symbol, 'side': side, 'type': 'MARKET', 'quantity': quantity}
+                    if HEDGE_MODE:
+                        params['positionSide'] = pos.get('positionSide', 'BOTH')
+                    if client_id:
+                        params['newClientOrderId'] = f"{client_id}-x"
+                    self.account_book.mark_pending(symbol, exchange_time_ms(self.client))
+                    order = self.client.futures_create_order(**params)
+                    self._store_orders(symbol, {'close': order})
 
-                    logger.info(f"✅ Position closed: Order ID {order['orderId']}")
+                    logger.info("✅ Position closed: Order ID %s", order['orderId'])
+                    self.cancel_protective_orders(symbol, params.get('positionSide'))
                     return order
 
             logger.warning(f"⚠️ No open position found for {symbol}")
@@ -230,140 +3075,366 @@ class BinanceTrader:
             logger.error(f"❌ Error closing position: {e}")
             return None
 
-    def monitor_and_cancel_if_unfilled(self, symbol, order_id, timeout_seconds, signal, entry, sl, tp, position_size):
-        """
-        Laeuft in einem Hintergrund-Thread: wartet bis zu `timeout_seconds`,
-        prueft dann den Order-Status und storniert die Order falls sie noch
-        nicht (vollstaendig) gefuellt ist. Blockiert NICHT den Webhook-Request.
-        """
-        poll_interval = 2.0
-        elapsed = 0.0
-
-        while elapsed < timeout_seconds:
+    def fetch_order_status(self, symbol, order_id):
+        """REST lookup of an order's status; also feeds the order tracker"""
+        order = self.client.futures_get_order(symbol=symbol, orderId=order_id)
+        status = order.get('status')
+        self.order_tracker.update(symbol, order_id, status, float(order.get('executedQty', 0)))
+        return status
+
+    def signal_orders(self, symbol, client_id, since):
+        """Orders Binance has for one signal (newClientOrderId prefix) since `since` — one allOrders call"""
+        orders = self.client.futures_get_all_orders(symbol=symbol, startTime=int((since - 60) * 1000))
+        return [o for o in orders if (o.get('clientOrderId') or '').startswith(f"{client_id}-")]
+
+    def resync_pending_orders(self):
+        """Nach (Re-)Connect des User-Data-Streams verpasste Events per REST nachholen"""
+        for symbol, order_id in self.order_tracker.pending():
             try:
-                order = self.client.futures_get_order(symbol=symbol, orderId=order_id)
-                status = order.get('status')
+                self.fetch_order_status(symbol, order_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Resync failed for order {order_id}: {e}")
 
-                if status == 'FILLED':
-                    logger.info(f"✅ Order filled: {order_id}")
-                    return
+    def watch_entry_order(self, symbol, order_id, timeout_seconds, protective_ids=(), exchange_expiry=False,
+                          remaining=None):
+        """
+        Registriert eine Entry-Order beim Scheduler: nach `timeout_seconds`
+        (bzw. `remaining` Sekunden, wenn nach einem Restart wieder
+        aufgenommen) wird sie storniert, falls sie nicht (vollstaendig)
+        gefuellt ist.
+        Erreicht die Order vorher einen End-Status (User-Data-Stream oder
+        REST-Fallback), wird der Timeout abgebrochen. Bleibt der Entry
+        komplett ungefuellt, werden auch die SL/TP-Orders `protective_ids`
+        storniert.
+        Bei `exchange_expiry` (GTD) laesst Binance die Order selbst ablaufen;
+        hier wird dann nur noch das Ergebnis beobachtet, nie storniert.
+        """
+        delay = timeout_seconds if remaining is None else remaining
+        if exchange_expiry:
+            delay += GTD_OBSERVE_GRACE_SECONDS
+        timeout_call = self.scheduler.schedule(
+            delay, self._on_entry_timeout, symbol, order_id, timeout_seconds, protective_ids, not exchange_expiry
+        )
+
+        def on_done(symbol, order_id, status):
+            self.scheduler.cancel(timeout_call)
+            filled_qty = self.order_tracker.filled_qty(order_id)
+            self.order_tracker.forget(order_id)
+            if status == 'FILLED':
+                logger.info("✅ Order filled: %s", order_id)
+            else:
+                logger.info(f"ℹ️ [Background] Order {order_id} bereits beendet (Status: {status}), kein Cancel noetig")
+                if not filled_qty:
+                    self._cancel_orders(symbol, protective_ids)
 
-                if status in ('CANCELED', 'EXPIRED', 'REJECTED'):
-                    logger.info(f"ℹ️ [Background] Order {order_id} bereits beendet (Status: {status}), kein Cancel noetig")
-                    return
+        self.order_tracker.track(symbol, order_id, on_done)
+        self._arm_fallback_poll()
 
-            except Exception as e:
-                logger.warning(f"⚠️ [Background] Fehler beim Status-Check: {e}")
+    def _arm_fallback_poll(self):
+        with self._fallback_poll_lock:
+            if self._fallback_poll_armed:
+                return
+            self._fallback_poll_armed = True
+        self.scheduler.schedule(ORDER_FALLBACK_POLL_INTERVAL, self._fallback_poll)
+
+    def _fallback_poll(self):
+        """REST-Polling offener Entries, aber nur solange der User-Data-Stream getrennt ist"""
+        if not self.user_stream.connected:
+            with request_priority(PRIORITY_LOW):
+                self.resync_pending_orders()
+        with self._fallback_poll_lock:
+            self._fallback_poll_armed = False
+        if self.order_tracker.pending():
+            self._arm_fallback_poll()
+
+    def _cancel_orders(self, symbol, order_ids):
+        if not order_ids:
+            return
+        try:
+            cancelled = self.client.futures_cancel_orders(
+                symbol=symbol, orderIdList=json.dumps(list(order_ids), separators=(',', ':'))
+            )
+            if self.order_store:
+                self.order_store.update_orders(symbol, cancelled)
+            logger.info(f"🧹 Cancelled orders {list(order_ids)} for {symbol}")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cancel orders {list(order_ids)}: {e}")
 
-            time.sleep(poll_interval)
-            elapsed += poll_interval
+    def _on_entry_timeout(self, symbol, order_id, timeout_seconds, protective_ids=(), cancel=True):
+        """Timeout erreicht — finalen Status pruefen und ggf. stornieren"""
+        if not self.order_tracker.is_tracked(order_id):
+            return
 
-        # Timeout erreicht — finalen Status pruefen und ggf. stornieren
         try:
-            order = self.client.futures_get_order(symbol=symbol, orderId=order_id)
-            status = order.get('status')
+            if self.user_stream.connected:
+                status = self.order_tracker.status(order_id)
+            else:
+                # fetch_order_status loest bei End-Status on_done aus
+                status = self.fetch_order_status(symbol, order_id)
 
-            if status == 'FILLED':
-                logger.info(f"✅ [Background] Order filled: {order_id}")
+            if status in TERMINAL_ORDER_STATUSES:
                 return
 
-            if status in ('CANCELED', 'EXPIRED', 'REJECTED'):
-                logger.info(f"ℹ️ [Background] Order {order_id} bereits beendet (Status: {status})")
+            if not cancel:
+                logger.warning(f"⚠️ [Background] GTD order {order_id} still {status} after expiry — leaving it to the exchange")
                 return
 
             logger.warning(f"⏱️ [Background] {timeout_seconds}s Timeout erreicht — storniere unfilled Order {order_id} (Status: {status})")
-            self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+            cancelled = self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
             logger.info(f"🧹 [Background] Order erfolgreich storniert: {order_id}")
+            if self.order_store:
+                self.order_store.update_orders(symbol, [cancelled])
+
+            if status != 'PARTIALLY_FILLED':
+                self._cancel_orders(symbol, protective_ids)
 
         except Exception as e:
             logger.warning(f"⚠️ [Background] Konnte Order nicht stornieren (evtl. bereits gefuellt/inaktiv): {e}")
 
-    def place_order(self, signal, symbol, entry, sl, tp, risk_usd):
+        finally:
+            self.order_tracker.forget(order_id)
+
+    def _store_orders(self, symbol, orders, **entry):
+        if self.order_store and orders:
+            self.order_store.record(symbol, orders, self.order_tracker, **entry)
+
+    def recover_orders(self, open_orders):
+        """
+        Nach einem Restart: Order-Store gegen die offenen Orders bei Binance
+        abgleichen, offene Entries mit ihrem Rest-Timeout wieder ueberwachen
+        und SL/TP ungefuellt beendeter Entries stornieren.
+        """
+        self.order_store.prune()
+        watches, lookups = reconcile_stored_orders(self.order_store, open_orders, ENTRY_FILL_TIMEOUT_SECONDS)
+        for symbol, order_id, status, filled_qty, timeout_seconds, protective_ids, exchange_expiry, remaining in watches:
+            self.order_tracker.update(symbol, order_id, status, filled_qty)
+            self.watch_entry_order(symbol, order_id, timeout_seconds, protective_ids, exchange_expiry, remaining)
+        for symbol, order_id, protective_ids in lookups:
+            try:
+                status = self.fetch_order_status(symbol, order_id)
+                if status in TERMINAL_ORDER_STATUSES and not self.order_tracker.filled_qty(order_id):
+                    self._cancel_orders(symbol, protective_ids)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not recover entry order {order_id}: {e}")
+            finally:
+                self.order_tracker.forget(order_id)
+        if watches or lookups:
+            logger.info(f"♻️ Recovered {len(watches)} open entry orders, {len(lookups)} finished during downtime")
+
+    def execute_plan(self, plan):
+        """
+        Sendet die Orders eines Plans — Close-/Reduce-Legs einzeln vorweg
+        (split_position_legs), den Rest gebuendelt als batchOrders-Request
+        (max. 5 pro Request), eine einzelne direkt.
+        Returns {role: order} und {role: Exception} fuer abgelehnte Orders.
+        """
+        mark_positions_pending(self.account_book, self.client, plan)
+        orders, failures = {}, {}
+        leading, rest = split_position_legs(plan)
+        if len(rest) == 1 or not USE_BATCH_ORDERS:
+            leading, rest = leading + rest, []
+        for role, params in leading:
+            try:
+                orders[role] = self.client.futures_create_order(**params)
+            except Exception as e:
+                failures[role] = e
+
+        for i in range(0, len(rest), BATCH_ORDER_LIMIT):
+            chunk = rest[i:i + BATCH_ORDER_LIMIT]
+            try:
+                results = self.client.futures_place_batch_order(
+                    batchOrders=[{k: str(v) for k, v in params.items()} for _, params in chunk]
+                )
+            except Exception as e:
+                for role, _ in chunk:
+                    failures[role] = e
+                continue
+            for (role, _), result in zip(chunk, results):
+                if 'code' in result and 'orderId' not in result:
+                    failures[role] = OrderRejected(result['code'], result.get('msg'))
+                else:
+                    orders[role] = result
+        self.account_book.track_orders(orders.values())
+        return orders, failures
+
+    def pre_trade(self, symbol):
+        """
+        Fuehrt die voneinander unabhaengigen Reads eines Entries (Preis,
+        Balance, Symbol-Regeln, Positionen) parallel aus und wartet auf alle.
+        Returns (results, errors, timings_ms) jeweils nach Stage-Name.
+        """
+        stages = {
+            'price': (self.get_current_price, symbol),
+            'balance': (self.get_available_balance,),
+            'rules': (self.symbol_cache.rules, symbol),
+            'positions': (self.get_positions, symbol)
+        }
+        futures = {
+            name: pretrade_pool.submit(contextvars.copy_context().run, timed_call, *call)
+            for name, call in stages.items()
+        }
+
+        results, errors, timings = {}, {}, {}
+        for name, future in futures.items():
+            results[name], error, timings[name] = future.result()
+            if error is not None:
+                errors[name] = error
+        return results, errors, timings
+
+    def place_order(self, signal, symbol, entry, sl, tp, risk_usd, client_id=None):
         """
         Place a LIMIT entry order exakt auf dem Signal-Entry-Preis.
         Der Webhook-Request antwortet SOFORT nach dem Platzieren der Order,
-        ein Hintergrund-Thread ueberwacht den Fill-Status und storniert die
+        der Deadline-Scheduler ueberwacht den Fill-Status und storniert die
         Order automatisch nach ENTRY_FILL_TIMEOUT_SECONDS (Standard 5 Min)
         falls sie bis dahin nicht gefuellt wurde.
 
         Long:  Limit-Preis = entry
         Short: Limit-Preis = entry
+
+        Mit `client_id` bekommen alle Orders deterministische newClientOrderIds.
         """
+        timings = {}
         try:
-            current_price = self.get_current_price(symbol)
+            started = time.perf_counter()
+            pretrade, errors, timings = self.pre_trade(symbol)
+            timings['pretrade'] = (time.perf_counter() - started) * 1000
+
+            for stage in ('price', 'balance', 'rules'):
+                if stage in errors:
+                    logger.error(f"❌ Pre-trade {stage} lookup failed: {errors[stage]}")
+                    return None
+
+            current_price = pretrade['price']
             if not current_price:
                 return None
 
-            position_size = self.calculate_position_size(symbol, entry, sl, risk_usd)
-            if not position_size:
+            rules = pretrade['rules']
+            if rules is None:
+                logger.error(f"❌ Could not load symbol precision for {symbol}")
                 return None
 
-            symbol_info, quantity_precision, price_precision, tick_size = self.get_symbol_precision(symbol)
-            if symbol_info is None:
-                logger.error(f"❌ Could not load symbol precision for {symbol}")
+            stage_started = time.perf_counter()
+            position_size = self.calculate_position_size(
+                symbol, entry, sl, risk_usd, available_balance=pretrade['balance'], rules=rules
+            )
+            timings['sizing'] = (time.perf_counter() - stage_started) * 1000
+            if not position_size:
                 return None
 
             side = 'BUY' if signal == 'LONG' else 'SELL'
 
             # Limit-Preis exakt auf Signal-Entry setzen (kein Slippage-Puffer)
-            limit_price = self.round_to_tick(entry, tick_size)
-
-            logger.info(f"📊 Placing {signal} LIMIT order for {symbol}")
-            logger.info(f"   Side: {side}")
-            logger.info(f"   Quantity: {position_size}")
-            logger.info(f"   Signal Entry: ${entry:.2f}")
-            logger.info(f"   Current Price: ${current_price:.2f}")
-            logger.info(f"   Limit Price (exakt): ${limit_price:.2f}")
-            logger.info(f"   Stop Loss: ${sl:.2f}")
-            logger.info(f"   Take Profit: ${tp:.2f}")
-            logger.info(f"   Unfilled-Timeout: {ENTRY_FILL_TIMEOUT_SECONDS}s ({ENTRY_FILL_TIMEOUT_SECONDS/60:.1f} Min)")
-
-            # Bestehende Positionen zuerst schliessen
+            limit_price_dec = rules.normalize_price(entry)
+            quantity_dec = rules.normalize_quantity(position_size)
+            limit_price = float(limit_price_dec)
+
+            if 'positions' in errors:
+                logger.warning(f"⚠️ Error checking/closing positions: {errors['positions']}")
+            positions = pretrade['positions'] or []
+
+            good_till_date = None
+            entry_timeout = ENTRY_FILL_TIMEOUT_SECONDS
+            if self.entry_time_in_force == 'GTD':
+                exchange_time = exchange_time_ms(self.client)
+                good_till_date = good_till_date_ms(exchange_time, entry_timeout, self.client.clock.recv_window_ms)
+                entry_timeout = (good_till_date - exchange_time) / 1000
+
             try:
-                positions = self.client.futures_position_information(symbol=symbol)
-                for pos in positions:
-                    pos_amt = float(pos['positionAmt'])
-                    if pos_amt != 0:
-                        close_side = 'SELL' if pos_amt > 0 else 'BUY'
-                        logger.info(f"📤 Closing existing position: {abs(pos_amt)} {symbol}")
-                        self.client.futures_create_order(
-                            symbol=symbol,
-                            side=close_side,
-                            type='MARKET',
-                            quantity=abs(pos_amt)
-                        )
-            except Exception as e:
-                logger.warning(f"⚠️ Error checking/closing positions: {e}")
-
-            # LIMIT Entry Order platzieren
-            order = self.client.futures_create_order(
-                symbol=symbol,
-                side=side,
-                type='LIMIT',
-                price=limit_price,
-                quantity=position_size,
-                timeInForce='GTC'
-            )
+                plan = build_entry_plan(
+                    signal, symbol, positions, quantity_dec, limit_price_dec, rules, sl, tp, current_price,
+                    good_till_date=good_till_date
+                )
+            except OrderRuleViolation as e:
+                logger.error(f"❌ Order rejected locally: {e}")
+                return None
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "📊 Placing %s LIMIT order for %s: %s %s @ $%.2f (signal $%.2f, mark $%.2f), SL $%.2f, "
+                    "TP $%.2f, unfilled-timeout %ss, plan (%s%s): %s",
+                    signal, symbol, side, position_size, limit_price, entry, current_price, sl, tp,
+                    ENTRY_FILL_TIMEOUT_SECONDS, REVERSAL_MODE, ', hedge' if HEDGE_MODE else '',
+                    ', '.join(role for role, _ in plan) or 'nothing to do'
+                )
+            assign_client_order_ids(plan, client_id)
 
-            logger.info(f"📝 Limit order placed: {order['orderId']}")
-            logger.info(f"   Ueberwachung laeuft im Hintergrund (Auto-Cancel nach {ENTRY_FILL_TIMEOUT_SECONDS}s falls unfilled)")
+            for role, params in plan:
+                if role == 'close':
+                    logger.info("📤 Closing existing position: %s %s", params['quantity'], symbol)
 
-            # Hintergrund-Thread starten, der die Order ueberwacht und ggf. storniert
-            monitor_thread = threading.Thread(
-                target=self.monitor_and_cancel_if_unfilled,
-                args=(symbol, order['orderId'], ENTRY_FILL_TIMEOUT_SECONDS, signal, entry, sl, tp, position_size),
-                daemon=True
+            stage_started = time.perf_counter()
+            orders, failures = self.execute_plan(plan)
+            self._store_orders(
+                symbol, orders, timeout_seconds=entry_timeout, exchange_expiry=good_till_date is not None
             )
-            monitor_thread.start()
+            if 'close' in orders:
+                # Alte Position zu — deren SL/TP stornieren, die gerade platzierten bleiben
+                self.cancel_protective_orders(
+                    symbol, orders['close'].get('positionSide') if HEDGE_MODE else None,
+                    exclude={o['orderId'] for o in orders.values()}
+                )
+            if 'sl' in orders and 'tp' in orders:
+                self.link_protective_orders(orders['sl']['orderId'], orders['tp']['orderId'])
+
+            for role, e in failures.items():
+                if role == 'close':
+                    # Fehler beim Schliessen blockiert den Entry nicht
+                    logger.warning(f"⚠️ Error checking/closing positions: {e}")
+                else:
+                    logger.error(f"❌ {role} order rejected: {e}")
+
+            for role in ('entry', 'reduce'):
+                if role in failures:
+                    # Ohne Entry keine SL/TP stehen lassen
+                    protective = [orders[r]['orderId'] for r in ('sl', 'tp') if r in orders]
+                    self._cancel_orders(symbol, protective)
+                    raise failures[role]
+
+            if 'reduce' in orders:
+                logger.info("📉 Position reduced to target: %s %s", orders['reduce'].get('origQty'), symbol)
+            timings['orders'] = (time.perf_counter() - stage_started) * 1000
+            timings['total'] = (time.perf_counter() - started) * 1000
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("   Timings (ms): %s", ", ".join(f"{k}={v:.1f}" for k, v in timings.items()))
+
+            order = orders.get('entry')
+            if order is None:
+                # Kein LIMIT-Entry noetig (Reduce per MARKET oder Position bereits am Ziel)
+                order = orders.get('reduce')
+                fill_price = float(order.get('avgPrice') or 0) if order else 0.0
+                return {
+                    'entry_order': order,
+                    'sl_order': None,
+                    'tp_order': None,
+                    'position_size': position_size,
+                    'entry_price': fill_price or current_price,
+                    'timings_ms': timings,
+                    'note': 'Position reduced with MARKET order' if order else 'Position already at target size'
+                }
+
+            logger.info("📝 Limit order placed: %s", order['orderId'])
+            if good_till_date:
+                logger.info("   GTD: Binance laesst die Order nach %.0fs selbst ablaufen", entry_timeout)
+            else:
+                logger.info("   Ueberwachung laeuft im Hintergrund (Auto-Cancel nach %ss falls unfilled)", ENTRY_FILL_TIMEOUT_SECONDS)
 
-            # Sofort zurueckgeben — der Fill wird im Hintergrund-Thread bestaetigt/storniert
+            # Timeout beim Scheduler registrieren — Fill/Cancel wird im Hintergrund bestaetigt
+            protective_ids = [orders[role]['orderId'] for role in ('sl', 'tp') if role in orders]
+            self.watch_entry_order(
+                symbol, order['orderId'], entry_timeout, protective_ids,
+                exchange_expiry=good_till_date is not None
+            )
+
+            # Sofort zurueckgeben — der Fill wird im Hintergrund bestaetigt/storniert
             return {
                 'entry_order': order,
-                'sl_order': None,
-                'tp_order': None,
+                'sl_order': orders.get('sl'),
+                'tp_order': orders.get('tp'),
                 'position_size': position_size,
                 'entry_price': limit_price,
-                'note': f'LIMIT order placed, monitored in background for {ENTRY_FILL_TIMEOUT_SECONDS}s'
+                'timings_ms': timings,
+                'note': f'LIMIT order placed, monitored in background for {entry_timeout:.0f}s'
             }
 
         except BinanceAPIException as e:
@@ -372,97 +3443,343 @@ class BinanceTrader:
         except Exception as e:
             logger.error(f"❌ Order failed: {e}")
             return None
+        finally:
+            observe_stages(timings)
 
 
-# Initialize trader
-try:
-    trader = BinanceTrader()
-except Exception as e:
-    logger.error(f"❌ Failed to initialize trader: {e}")
-    trader = None
+SERVER_MODE = os.getenv('WEBHOOK_SERVER_MODE', 'sync')
 
+executor = SymbolExecutor()
+dedup_cache = IdempotencyCache()
+signal_index = SignalIndex()
+webhook_recorder = WebhookRecorder(WEBHOOK_RECORD_FILE) if WEBHOOK_RECORD_FILE else None
+# Die ASGI-Variante oeffnet ihr eigenes WAL (ein File pro Prozess, siehe SignalLog)
+signal_log = SignalLog(SIGNAL_WAL_FILE) if SIGNAL_WAL_FILE and SERVER_MODE == 'sync' else None
 
-@app.route('/webhook', methods=['POST'])
-def webhook():
-    """Handle TradingView webhook alerts"""
-    try:
-        if trader is None:
-            logger.error("❌ Trader not initialized — check Binance API credentials / connection")
-            return jsonify({'error': 'Trader not initialized — check server logs'}), 500
+# Trader im Hintergrund initialisieren — der Worker nimmt sofort Requests an, /readyz meldet
+# wann er handelsbereit ist (die ASGI-Variante importiert dieses Modul mit WEBHOOK_SERVER_MODE=async
+# und startet ihren eigenen AsyncBinanceTrader)
+trader = None
+trader_init = TraderInitializer()
 
-        data = request.get_json()
 
-        if not data:
-            logger.error("❌ No JSON data received")
-            return jsonify({'error': 'No data'}), 400
+def _set_trader(instance):
+    """Publish the trader, then replay the WAL — /webhook answers 503 until trader_init is ready"""
+    global trader
+    trader = instance
+    trader_init.replaying()
+    replay_pending_signals()
+
+
+if SERVER_MODE == 'sync':
+    trader_init.start(BinanceTrader, _set_trader)
 
-        if data.get('secret') != trader.webhook_secret:
-            logger.error("❌ Invalid webhook secret")
-            return jsonify({'error': 'Unauthorized'}), 401
-
-        signal = data.get('signal')
-        symbol = data.get('symbol')
-
-        if signal == 'CLOSE_LONG':
-            logger.info(f"📤 EXIT Signal: Close LONG position for {symbol}")
-            result = trader.close_position(symbol)
-
-            if result:
-                return jsonify({
-                    'status': 'success',
-                    'action': 'close_long',
-                    'symbol': symbol,
-                    'order_id': result.get('orderId')
-                }), 200
-            else:
-                return jsonify({'error': 'Failed to close position'}), 500
-
-        elif signal == 'CLOSE_SHORT':
-            logger.info(f"📤 EXIT Signal: Close SHORT position for {symbol}")
-            result = trader.close_position(symbol)
-
-            if result:
-                return jsonify({
-                    'status': 'success',
-                    'action': 'close_short',
-                    'symbol': symbol,
-                    'order_id': result.get('orderId')
-                }), 200
-            else:
-                return jsonify({'error': 'Failed to close position'}), 500
 
-        entry = float(data.get('entry', 0))
-        sl = float(data.get('sl', 0))
-        tp = float(data.get('tp', 0))
-        risk_usd = float(data.get('risk_usd', 100))
+def validate_signal(data):
+    """Field checks before a signal is queued; returns (payload, http_status) or None if it can run"""
+    signal = data.get('signal')
+    if signal in ('CLOSE_LONG', 'CLOSE_SHORT'):
+        return None
 
-        logger.info(f"📊 Webhook: {signal} {symbol}")
-        logger.info(f"   Entry: {entry}, SL: {sl}, TP: {tp}")
+    if not all([signal, data.get('symbol'), float(data.get('entry', 0)), float(data.get('sl', 0)), float(data.get('tp', 0))]):
+        logger.error("❌ Missing required fields")
+        return {'error': 'Missing fields'}, 400
 
-        if not all([signal, symbol, entry, sl, tp]):
-            logger.error("❌ Missing required fields")
-            return jsonify({'error': 'Missing fields'}), 400
+    if signal not in ['LONG', 'SHORT']:
+        logger.error(f"❌ Invalid signal: {signal}")
+        return {'error': 'Invalid signal'}, 400
+    return None
 
-        if signal not in ['LONG', 'SHORT']:
-            logger.error(f"❌ Invalid signal: {signal}")
-            return jsonify({'error': 'Invalid signal'}), 400
 
-        result = trader.place_order(signal, symbol, entry, sl, tp, risk_usd)
+def placed_order_ids(result):
+    """{role: orderId} of the orders place_order() created"""
+    orders = (('entry', result['entry_order']), ('sl', result['sl_order']), ('tp', result['tp_order']))
+    return {role: order['orderId'] for role, order in orders if order}
+
+
+def already_placed_response(data, placed):
+    """Response for a retried signal whose earlier attempt already placed `placed` — nothing is resent"""
+    order_ids = {}
+    for order in placed:
+        match = CLIENT_ORDER_ID_PATTERN.match(order.get('clientOrderId') or '')
+        order_ids.setdefault(CLIENT_ORDER_ROLES.get(match.group(2), 'order') if match else 'order', order['orderId'])
+    return {
+        'status': 'already_placed',
+        'signal': data.get('signal'),
+        'symbol': data.get('symbol'),
+        'order_ids': order_ids,
+        'note': 'An earlier attempt of this alert already placed orders — not resent'
+    }, 200
+
+
+def check_earlier_attempt(data, client_id, since):
+    """
+    Retry nach einem fehlgeschlagenen Versuch: (payload, http_status), wenn
+    der fruehere Versuch schon Orders bei Binance platziert hat oder sich das
+    nicht pruefen laesst — sonst None, das Signal darf erneut laufen.
+    """
+    try:
+        placed = trader.signal_orders(data.get('symbol'), client_id, since)
+    except Exception as e:
+        logger.error(f"❌ Could not look up the earlier attempt of {client_id}: {e}")
+        return {'error': f'Could not look up the earlier attempt — not resending: {e}'}, 500
+    if not placed:
+        return None
+    logger.warning(f"♻️ Earlier attempt of {client_id} already placed {len(placed)} order(s) — not resending")
+    return already_placed_response(data, placed)
+
+
+def run_signal(data, client_id=None):
+    """Execute a validated signal (on the symbol's executor thread); returns (payload, http_status)"""
+    signal = data.get('signal')
+    symbol = data.get('symbol')
+
+    if signal in ('CLOSE_LONG', 'CLOSE_SHORT'):
+        direction = signal.split('_')[1]
+        logger.info("📤 EXIT Signal: Close %s position for %s", direction, symbol)
+        started = time.perf_counter()
+        result = trader.close_position(symbol, direction, client_id)
+        STAGE_LATENCY.labels('close').observe(time.perf_counter() - started)
 
         if result:
-            return jsonify({
+            return {
                 'status': 'success',
-                'signal': signal,
+                'action': signal.lower(),
                 'symbol': symbol,
-                'position_size': result['position_size'],
-                'entry_price': result['entry_price']
-            }), 200
+                'order_id': result.get('orderId'),
+                'order_ids': {'close': result.get('orderId')}
+            }, 200
         else:
-            return jsonify({'error': 'Order failed or not filled within tolerance/timeout'}), 500
+            return {'error': 'Failed to close position'}, 500
+
+    entry = float(data.get('entry', 0))
+    sl = float(data.get('sl', 0))
+    tp = float(data.get('tp', 0))
+    risk_usd = float(data.get('risk_usd', 100))
+
+    logger.info("📊 Webhook: %s %s", signal, symbol)
+    logger.info("   Entry: %s, SL: %s, TP: %s", entry, sl, tp)
+
+    result = trader.place_order(signal, symbol, entry, sl, tp, risk_usd, client_id)
+
+    if result:
+        return {
+            'status': 'success',
+            'signal': signal,
+            'symbol': symbol,
+            'position_size': result['position_size'],
+            'entry_price': result['entry_price'],
+            'order_ids': placed_order_ids(result),
+            'timings_ms': {k: round(v, 2) for k, v in result['timings_ms'].items()}
+        }, 200
+    else:
+        return {'error': 'Order failed or not filled within tolerance/timeout'}, 500
 
+
+def run_tracked_signal(signal_id, data, client_id):
+    signal_index.started(signal_id)
+    return run_signal(data, client_id)
+
+
+def execute_signal(data, client_id=None):
+    """Validate and execute an authenticated signal; returns (payload, http_status)"""
+    invalid = validate_signal(data)
+    if invalid:
+        return invalid
+    return executor.submit(data.get('symbol'), run_signal, data, client_id).result()
+
+
+def signal_outcome(future):
+    """((payload, http_status), raised) of an executed signal — an exception becomes a 500"""
+    try:
+        return future.result(), False
     except Exception as e:
         logger.error(f"❌ Webhook error: {e}")
-        return jsonify({'error': str(e)}), 500
+        return ({'error': str(e)}, 500), True
+
+
+def finish_signal(key, signal_id, logged, data, outcome, received_at, started, calls, raised=False):
+    """
+    Bookkeeping once a signal's outcome is known: WAL, tracking index, dedup
+    cache, recording. Ist die Ausfuehrung mit einer Exception abgebrochen, ist
+    der 500 keine Antwort von Binance — der Dedup-Eintrag wird verworfen statt
+    an wartende Duplikate ausgeliefert.
+    """
+    payload, status_code = outcome
+    payload = dict(payload, tracking_id=signal_id)
+    if logged:
+        signal_log.complete(signal_id, status_code)
+    signal_index.finish(signal_id, payload, status_code)
+    if raised:
+        dedup_cache.discard(key)
+    else:
+        dedup_cache.complete(key, payload, status_code)
+    if webhook_recorder:
+        webhook_recorder.record(data, status_code, payload, calls or [], received_at, (time.perf_counter() - started) * 1000)
+    return payload, status_code
+
+
+def trader_unavailable():
+    """Response while the trader is still starting (503) or failed permanently (500)"""
+    if trader_init.state == 'failed':
+        return {'error': 'Trader not initialized — check server logs', 'init': trader_init.snapshot()}, 500
+    return {'error': 'Trader starting — retry shortly', 'init': trader_init.snapshot()}, 503
+
+
+def log_signal(key, client_id, data, signal_id):
+    """Append the signal to the WAL before executing it; False if the WAL is off or the write failed"""
+    if signal_log is None:
+        return False
+    started = time.perf_counter()
+    try:
+        signal_log.accept(key, client_id, data, signal_id).result(timeout=SIGNAL_WAL_SYNC_TIMEOUT)
+        return True
+    except Exception as e:
+        logger.error(f"❌ Signal WAL write failed — executing without crash protection: {e}")
+        return False
+    finally:
+        STAGE_LATENCY.labels('wal').observe(time.perf_counter() - started)
+
+
+def replay_pending_signals():
+    """
+    Nach einem Restart: im WAL angenommene, aber nie abgeschlossene Signale
+    erneut ausfuehren — mit derselben client_id. Kennt Binance bereits
+    Orders mit dieser client_id, war das Signal (teilweise) ausgefuehrt und
+    wird nur abgeschlossen. Signale aelter als SIGNAL_REPLAY_MAX_AGE_SECONDS
+    verfallen. Fehlgeschlagene Pruefungen bleiben offen fuer den naechsten Start.
+    """
+    if signal_log is None or not signal_log.pending():
+        return
+    logger.warning(f"♻️ Replaying {len(signal_log.pending())} signal(s) accepted before the last shutdown")
+    for record in signal_log.pending():
+        payload, client_id, key = record['payload'], record['client_id'], record['key']
+        label = f"{payload.get('signal')} {payload.get('symbol')} ({record['id'][:8]})"
+        try:
+            if time.time() - record['at'] > SIGNAL_REPLAY_MAX_AGE_SECONDS:
+                logger.warning(f"⚠️ Not replaying {label}: accepted {time.time() - record['at']:.0f}s ago")
+                signal_log.complete(record['id'], 'expired')
+                continue
+            placed = trader.signal_orders(payload.get('symbol'), client_id, record['at'])
+            if placed:
+                logger.info(f"♻️ {label} already reached Binance ({len(placed)} orders) — not replaying")
+                signal_log.complete(record['id'], 'executed')
+                continue
+
+            entry, is_new = dedup_cache.begin(key, dedup_cache.ttl_for(payload))
+            if not is_new:
+                signal_log.complete(record['id'], 'duplicate')
+                continue
+            # Unter der beim Annehmen vergebenen Tracking-ID abfragbar
+            entry['tracking_id'] = record['id']
+            signal_index.add(record['id'], payload, record['at'])
+            try:
+                response, status_code = execute_signal(payload, client_id=client_id)
+            except Exception:
+                dedup_cache.discard(key)
+                raise
+            response = dict(response, tracking_id=record['id'])
+            signal_index.finish(record['id'], response, status_code)
+            dedup_cache.complete(key, response, status_code)
+            signal_log.complete(record['id'], status_code)
+            logger.info(f"♻️ Replayed {label}: HTTP {status_code}")
+        except Exception as e:
+            logger.error(f"❌ Replay of {label} failed, keeping it for the next start: {e}")
+
+
+def handle_webhook():
+    """Auth, dedup and execute one webhook request; returns (payload, http_status)"""
+    started = time.perf_counter()
+    try:
+        if trader is None or trader_init.state != 'ready':
+            logger.error(f"❌ Trader not initialized (state: {trader_init.state}) — check Binance API credentials / connection")
+            return trader_unavailable()
+
+        data = request.get_json()
+
+        if not data:
+            logger.error("❌ No JSON data received")
+            return {'error': 'No data'}, 400
+
+        if data.get('secret') != trader.webhook_secret:
+            logger.error("❌ Invalid webhook secret")
+            return {'error': 'Unauthorized'}, 401
+
+        # Duplikate (TradingView-Retries, doppelte Alerts) vor jedem Exchange-Call abfangen
+        received_at = time.time()
+        key = dedup_cache.key_for(data)
+        entry, is_new = dedup_cache.begin(key, dedup_cache.ttl_for(data))
+        CACHE_REQUESTS.labels('dedup', 'miss' if is_new else 'hit').inc()
+        STAGE_LATENCY.labels('auth').observe(time.perf_counter() - started)
+        if not is_new:
+            logger.info(f"♻️ Duplicate alert suppressed: {data.get('signal')} {data.get('symbol')} ({key[:12]})")
+            # Im 202-Modus nicht auf das Original warten — dessen Tracking-ID genuegt
+            response = entry['response'] if WEBHOOK_ACCEPT_ASYNC else dedup_cache.wait(entry)
+            if response is None:
+                payload, status_code = {
+                    'status': 'duplicate',
+                    'tracking_id': entry.get('tracking_id'),
+                    'note': 'Original alert still processing'
+                }, 202
+            else:
+                payload, status_code = dict(response[0], duplicate=True), response[1]
+            if webhook_recorder:
+                webhook_recorder.record(data, status_code, payload, [], received_at,
+                                        (time.perf_counter() - started) * 1000, duplicate=True)
+            return payload, status_code
+
+        # Tracking-ID fuer GET /orders/<id> — zugleich die ID des Signals im WAL
+        signal_id = entry['tracking_id'] = uuid.uuid4().hex
+        signal_index.add(signal_id, data, received_at)
+        try:
+            invalid = validate_signal(data)
+        except Exception as e:
+            invalid = {'error': str(e)}, 500
+        if invalid:
+            return finish_signal(key, signal_id, False, data, invalid, received_at, started, None)
+
+        client_id = entry['client_id']
+        if entry['retry_since'] is not None:
+            earlier = check_earlier_attempt(data, client_id, entry['retry_since'])
+            if earlier:
+                return finish_signal(key, signal_id, False, data, earlier, received_at, started, None)
+
+        # Erst ins WAL (fsync), dann ausfuehren — ein Absturz dazwischen wird beim Start nachgeholt
+        logged = log_signal(key, client_id, data, signal_id)
+        with capture_exchange_calls() if webhook_recorder else nullcontext() as calls:
+            future = executor.submit(data.get('symbol'), run_tracked_signal, signal_id, data, client_id)
+
+        def finish(future):
+            outcome, raised = signal_outcome(future)
+            return finish_signal(key, signal_id, logged, data, outcome, received_at, started, calls, raised)
+
+        if WEBHOOK_ACCEPT_ASYNC:
+            future.add_done_callback(finish)
+            return {
+                'status': 'accepted',
+                'tracking_id': signal_id,
+                'signal': data.get('signal'),
+                'symbol': data.get('symbol')
+            }, 202
+        return finish(future)
+
+    except Exception as e:
+        logger.error(f"❌ Webhook error: {e}")
+        return {'error': str(e)}, 500
+
+
+@app.route('/webhook', methods=['POST'])
+def webhook():
+    """Handle TradingView webhook alerts"""
+    started = time.perf_counter()
+    payload, status_code = handle_webhook()
+
+    data = request.get_json(silent=True)
+    signal = data.get('signal') if isinstance(data, dict) else None
+    WEBHOOK_LATENCY.labels(
+        signal if signal in KNOWN_SIGNALS else 'invalid', str(status_code)
+    ).observe(time.perf_counter() - started)
+    return jsonify(payload), status_code
 
 
 @app.route('/status', methods=['GET'])
@@ -470,17 +3787,44 @@ def status():
     """Get bot and account status"""
     try:
         if not trader:
-            return jsonify({'error': 'Trader not initialized'}), 500
+            payload, status_code = trader_unavailable()
+            return jsonify(payload), status_code
 
-        account = trader.get_account_info()
-        btc_price = trader.get_current_price('BTCUSDT')
+        # Monitoring-Reads mit niedrigster Prioritaet — Orders haben Vorrang am Rate-Limit
+        with request_priority(PRIORITY_LOW):
+            account = trader.get_account_info()
+            btc_price = trader.get_current_price('BTCUSDT')
 
         return jsonify({
             'status': 'running',
             'testnet': trader.testnet,
             'account': account,
             'btc_price': btc_price,
+            'btc_price_age_seconds': trader.price_stream.age('BTCUSDT'),
+            'streams': {
+                'user_data': trader.user_stream.connected,
+                'mark_price': trader.price_stream.connected
+            },
             'entry_fill_timeout_seconds': ENTRY_FILL_TIMEOUT_SECONDS,
+            'entry_time_in_force': trader.entry_time_in_force,
+            'scheduler_queue_depth': trader.scheduler.depth(),
+            'pending_orders': len(trader.order_tracker.pending()),
+            'order_store': trader.order_store.snapshot() if trader.order_store else None,
+            'signal_log': signal_log.snapshot() if signal_log else None,
+            'signal_index': {'size': len(signal_index), 'states': signal_index.states(), 'accept_async': WEBHOOK_ACCEPT_ASYNC},
+            'rate_limits': trader.client.rate_gate.snapshot(),
+            'clock': trader.client.clock.snapshot(),
+            'request_policy': trader.client.policy.snapshot(),
+            'dedup_cache': {
+                'size': len(dedup_cache),
+                'hits': dedup_cache.hits,
+                'misses': dedup_cache.misses
+            },
+            'execution': {
+                'workers': executor.max_workers,
+                'busy_symbols': executor.active(),
+                'queue_depths': executor.depths()
+            },
             'timestamp': datetime.utcnow().isoformat()
         }), 200
 
@@ -494,9 +3838,11 @@ def positions():
     """Get current open positions"""
     try:
         if not trader:
-            return jsonify({'error': 'Trader not initialized'}), 500
+            payload, status_code = trader_unavailable()
+            return jsonify(payload), status_code
 
-        positions = trader.client.futures_position_information()
+        with request_priority(PRIORITY_LOW):
+            positions = trader.get_positions()
 
         active_positions = [
             {
@@ -520,6 +3866,48 @@ def positions():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/orders/<signal_id>', methods=['GET'])
+def order_status(signal_id):
+    """Outcome of one webhook signal by the tracking ID from its /webhook response"""
+    entry = signal_index.get(signal_id)
+    if entry is None:
+        return jsonify({'error': 'Unknown tracking id'}), 404
+    return jsonify(with_order_status(entry, trader.order_tracker if trader else None)), 200
+
+
+@app.route('/orders', methods=['GET'])
+def orders():
+    """Most recent webhook signals for ?symbol=, newest first"""
+    symbol = request.args.get('symbol')
+    if not symbol:
+        return jsonify({'error': 'symbol required'}), 400
+    tracker = trader.order_tracker if trader else None
+    signals = [with_order_status(entry, tracker) for entry in signal_index.for_symbol(symbol)]
+    return jsonify({'symbol': symbol, 'signals': signals, 'count': len(signals)}), 200
+
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness probe — never touches the exchange"""
+    return jsonify({'status': 'alive', 'trader': trader_init.snapshot()}), 200
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness probe — 200 once the trader is up and its caches are warm"""
+    if trader is None or trader_init.state != 'ready':
+        return jsonify({'ready': False, 'trader': trader_init.snapshot()}), 503
+    checks = trader.readiness()
+    ready = all(checks.values())
+    return jsonify({'ready': ready, 'checks': checks}), 200 if ready else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
 @app.route('/test', methods=['GET'])
 def test():
     """Test endpoint"""
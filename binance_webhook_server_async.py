@@ -0,0 +1,1441 @@
+#!/usr/bin/env python3
+"""
+Binance Futures Webhook Server — asyncio/ASGI Variante
+Gleiche Endpoints und Order-Logik wie binance_webhook_server.py, aber ein
+einzelner Prozess bedient viele Webhooks gleichzeitig: alle Exchange-Calls
+laufen ueber einen gepoolten aiohttp-Client (Keep-Alive), Pre-Trade-Reads
+per asyncio.gather, Unfilled-Timeouts ueber loop.call_later statt Threads.
+
+Start: uvicorn binance_webhook_server_async:app --host 0.0.0.0 --port $PORT
+"""
+
+import os
+
+# Das Sync-Modul nur als Bibliothek laden — dort keinen eigenen Trader starten
+os.environ.setdefault('WEBHOOK_SERVER_MODE', 'async')
+
+import json
+import logging
+import time
+import uuid
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+from datetime import datetime
+from urllib.parse import parse_qsl, unquote_plus
+
+import aiohttp
+import websockets
+import yarl
+from binance.client import AsyncClient
+from binance.exceptions import BinanceAPIException
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from binance_webhook_server import (
+    ACCOUNT_RECONCILE_SECONDS,
+    CLOCK_SYNC_INTERVAL_SECONDS,
+    CLOCK_SYNC_SAMPLES,
+    BINANCE_MOCK_URL,
+    ENTRY_FILL_TIMEOUT_SECONDS,
+    ENTRY_TIME_IN_FORCE,
+    EXCHANGE_INFO_TTL_SECONDS,
+    GTD_MIN_SECONDS,
+    GTD_OBSERVE_GRACE_SECONDS,
+    HEDGE_MODE,
+    ORDER_FALLBACK_POLL_INTERVAL,
+    ORDER_NOT_FOUND_CODE,
+    ORDER_STORE_FILE,
+    RETRY_MAX_ATTEMPTS,
+    REVERSAL_MODE,
+    STREAM_RECONNECT_MAX_WAIT,
+    TERMINAL_ORDER_STATUSES,
+    TIMESTAMP_ERROR_CODE,
+    USE_BATCH_ORDERS,
+    BATCH_ORDER_LIMIT,
+    CACHE_REQUESTS,
+    DEDUP_WAIT_SECONDS,
+    EXCHANGE_ERRORS,
+    EXCHANGE_HEDGES,
+    EXCHANGE_LATENCY,
+    EXCHANGE_RETRIES,
+    ORDERS_RECOVERED,
+    KNOWN_SIGNALS,
+    STAGE_LATENCY,
+    WEBHOOK_LATENCY,
+    USE_MARK_PRICE_STREAM,
+    USE_USER_DATA_STREAM,
+    USER_STREAM_KEEPALIVE_SECONDS,
+    WEBHOOK_ACCEPT_ASYNC,
+    WEBHOOK_RECORD_FILE,
+    SIGNAL_REPLAY_MAX_AGE_SECONDS,
+    SIGNAL_WAL_FILE,
+    SIGNAL_WAL_SYNC_TIMEOUT,
+    AccountBook,
+    CircuitOpen,
+    ClockSync,
+    ConfigurationError,
+    IdempotencyCache,
+    MarkPriceStream,
+    OrderRejected,
+    OrderStore,
+    OrderRuleViolation,
+    PRIORITY_LOW,
+    RateLimitExceeded,
+    RateLimitGate,
+    RequestPolicy,
+    SignalIndex,
+    SignalLog,
+    OrderTracker,
+    SymbolInfoCache,
+    already_placed_response,
+    TraderInitializer,
+    WebhookRecorder,
+    _exchange_calls,
+    _request_priority,
+    futures_stream_url,
+    use_mock_endpoints,
+    assign_client_order_ids,
+    build_entry_plan,
+    exchange_time_ms,
+    good_till_date_ms,
+    capture_exchange_calls,
+    logger,
+    mark_positions_pending,
+    position_size_for_risk,
+    split_position_legs,
+    stale_protective_order_ids,
+    merge_batch_results,
+    observe_stages,
+    placed_order_ids,
+    reconcile_stored_orders,
+    record_exchange_call,
+    render_metrics,
+    request_priority,
+    validate_signal,
+    with_order_status,
+)
+
+# ── Konfiguration HTTP-Pool ─────────────────────────────────────────────────
+ASYNC_HTTP_POOL_SIZE = int(os.getenv('ASYNC_HTTP_POOL_SIZE', '100'))  # max. gleichzeitige Verbindungen
+ASYNC_HTTP_KEEPALIVE_SECONDS = 30
+
+
+class AsyncGatedClient(AsyncClient):
+    """AsyncClient mit RequestPolicy, RateLimitGate und ClockSync (siehe GatedClient)"""
+
+    def __init__(self, *args, rate_gate=None, **kwargs):
+        self.rate_gate = rate_gate or RateLimitGate()
+        self.policy = RequestPolicy((aiohttp.ClientError, asyncio.TimeoutError))
+        self.clock = ClockSync()
+        self._clock_lock = asyncio.Lock()
+        if BINANCE_MOCK_URL:
+            use_mock_endpoints(self)
+        super().__init__(*args, **kwargs)
+
+    async def sync_clock(self, seen_syncs=None):
+        """Wie GatedClient.sync_clock"""
+        async with self._clock_lock:
+            if seen_syncs is not None and self.clock.syncs != seen_syncs:
+                return
+            samples = []
+            for _ in range(CLOCK_SYNC_SAMPLES):
+                sent_at = time.time()
+                server_time = (await self.futures_time())['serverTime']
+                samples.append(ClockSync.sample(sent_at, server_time, time.time()))
+            self.clock.apply(self, samples)
+
+    async def _request_futures_api(self, method, path, signed=False, version=1, **kwargs):
+        """Wie GatedClient._request_futures_api"""
+        if signed:
+            kwargs.setdefault('data', {}).setdefault('recvWindow', self.clock.recv_window_ms)
+        data = dict(kwargs.get('data') or {})  # wird beim Signieren veraendert — pro Versuch neu kopieren
+        kind = self.policy.retry_kind(method, path, data)
+        hedge_delay = self.policy.hedge_delay(method, path)
+        found = None
+        for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
+            sent_at = time.time()
+            request = dict(kwargs, data=dict(data))
+            try:
+                if hedge_delay is not None:
+                    result = await self._hedged_request(hedge_delay, method, path, signed, version, request)
+                else:
+                    result = await self._timestamped_request(method, path, signed, version, **request)
+                return merge_batch_results(found, result) if found else result
+            except Exception as e:
+                if kind is None or attempt == RETRY_MAX_ATTEMPTS or not self.policy.is_transient(e):
+                    raise
+                delay = self.policy.backoff(attempt)
+                if kind == 'create':
+                    delay = max(delay, sent_at + data['recvWindow'] / 1000 - time.time())
+                self.policy.retries += 1
+                EXCHANGE_RETRIES.labels(method, path).inc()
+                logger.warning(f"🔁 {method.upper()} {path} failed ({e or type(e).__name__}) — retry {attempt}/{RETRY_MAX_ATTEMPTS - 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            if kind == 'create':
+                found = await self._created_orders(path, data)
+                if found if path == 'order' else all(found):
+                    self.policy.recovered_orders += 1
+                    ORDERS_RECOVERED.inc()
+                    logger.info(f"♻️ {method.upper()} {path}: orders reached Binance despite the error — not resending")
+                    return found
+                if path == 'batchOrders' and not any(found):
+                    found = None
+
+    async def _created_orders(self, path, data):
+        if path == 'order':
+            return await self._order_by_client_id(data['symbol'], data['newClientOrderId'])
+        orders = json.loads(unquote_plus(data['batchOrders']))
+        return list(await asyncio.gather(*(self._order_by_client_id(o['symbol'], o['newClientOrderId']) for o in orders)))
+
+    async def _order_by_client_id(self, symbol, client_order_id):
+        try:
+            return await self.futures_get_order(symbol=symbol, origClientOrderId=client_order_id)
+        except BinanceAPIException as e:
+            if e.code == ORDER_NOT_FOUND_CODE:
+                return None
+            raise
+
+    async def _hedged_request(self, delay, method, path, signed, version, request):
+        """Wie GatedClient._hedged_request — der Verlierer wird abgebrochen"""
+        def send():
+            return asyncio.ensure_future(self._timestamped_request(
+                method, path, signed, version, **dict(request, data=dict(request['data']))
+            ))
+
+        primary = send()
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        self.policy.hedges += 1
+        hedge = send()
+        pending, error = {primary, hedge}, None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = 'hedge' if task is hedge else 'primary'
+                        if winner == 'hedge':
+                            self.policy.hedge_wins += 1
+                        EXCHANGE_HEDGES.labels(path, winner).inc()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _timestamped_request(self, method, path, signed, version, **kwargs):
+        """Wie GatedClient._timestamped_request"""
+        data = dict(kwargs.get('data') or {})
+        seen_syncs = self.clock.syncs
+        try:
+            return await self._send_futures_request(method, path, signed, version, **kwargs)
+        except BinanceAPIException as e:
+            if not signed or e.code != TIMESTAMP_ERROR_CODE:
+                raise
+            self.clock.timestamp_errors += 1
+            logger.warning(f"⏱️ {method.upper()} {path} rejected with -1021 — resyncing clock and retrying once")
+            await self.sync_clock(seen_syncs)
+            data['recvWindow'] = max(data['recvWindow'], self.clock.recv_window_ms)
+            return await self._send_futures_request(method, path, signed, version, **dict(kwargs, data=data))
+
+    async def _send_futures_request(self, method, path, signed, version, **kwargs):
+        try:
+            self.policy.breaker.allow()
+        except CircuitOpen:
+            EXCHANGE_ERRORS.labels(method, path, 'circuit_open').inc()
+            raise
+        while True:
+            try:
+                delay = self.rate_gate.reserve(method, path, kwargs.get('data'))
+            except RateLimitExceeded:
+                EXCHANGE_ERRORS.labels(method, path, 'shed').inc()
+                raise
+            if not delay:
+                break
+            logger.warning(f"⏳ Rate limit headroom low — delaying {method.upper()} {path} by {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        params = dict(kwargs.get('data') or {})  # vor der Signatur kopieren (fuers Recording)
+        uri = self._create_futures_api_uri(path, version=version)
+        kwargs = self._get_request_kwargs(method, signed, True, **kwargs)
+        # Query genau so senden wie signiert — aiohttp wuerde das vorkodierte batchOrders erneut kodieren
+        uri = yarl.URL(f"{uri}?{kwargs.pop('params')}" if kwargs.get('params') else uri, encoded=True)
+        kwargs['timeout'] = aiohttp.ClientTimeout(total=self.policy.timeout(method, path))
+        started = time.perf_counter()
+        try:
+            async with getattr(self.session, method)(uri, **kwargs) as response:
+                elapsed = time.perf_counter() - started
+                self.policy.breaker.record(response.status < 500)
+                self.policy.observe(method, path, elapsed)
+                if signed:
+                    self.clock.observe(elapsed)
+                self.response = response
+                self.rate_gate.observe(response.headers, response.status)
+                if not 200 <= response.status < 300:
+                    EXCHANGE_ERRORS.labels(method, path, str(response.status)).inc()
+                if _exchange_calls.get() is not None:
+                    record_exchange_call(method, path, params, response.status, await response.text())
+                return await self._handle_response(response)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            EXCHANGE_ERRORS.labels(method, path, 'network').inc()
+            record_exchange_call(method, path, params, None, error=repr(e))
+            self.policy.breaker.record(False)
+            raise
+        finally:
+            EXCHANGE_LATENCY.labels(method, path).observe(time.perf_counter() - started)
+
+
+class AsyncBinanceTrader:
+    """
+    Async Gegenstueck zu BinanceTrader. Nutzt dieselben Bausteine
+    (SymbolInfoCache, AccountBook, OrderTracker, MarkPriceStream, Order-
+    Planung), aber alle REST-Calls laufen ueber AsyncClient.
+    """
+
+    def __init__(self):
+        self.api_key = os.getenv('BINANCE_API_KEY')
+        self.api_secret = os.getenv('BINANCE_SECRET_KEY')
+        self.testnet = os.getenv('BINANCE_TESTNET', 'true').lower() == 'true'
+        self.webhook_secret = os.getenv('WEBHOOK_SECRET')
+
+        if not all([self.api_key, self.api_secret, self.webhook_secret]):
+            logger.error("❌ Missing required environment variables!")
+            raise ConfigurationError("BINANCE_API_KEY, BINANCE_SECRET_KEY, and WEBHOOK_SECRET must be set")
+
+        self.client = None
+        self.stream_url = futures_stream_url(self.testnet)
+        self.symbol_cache = SymbolInfoCache(None)
+        self.price_stream = MarkPriceStream(self.stream_url)
+        self.account_book = AccountBook(None, mark_price=self.price_stream.get)
+        self.order_store = OrderStore(ORDER_STORE_FILE) if ORDER_STORE_FILE else None
+        self.order_tracker = OrderTracker(self.order_store)
+        self.user_stream_connected = False
+        self.user_stream_reconnects = 0
+        self.entry_time_in_force = ENTRY_TIME_IN_FORCE
+        self._timeouts = {}  # orderId -> asyncio.TimerHandle
+        self._protective_pairs = {}  # orderId -> orderId des Geschwister-Legs (SL <-> TP)
+        self._tasks = []
+        self._symbol_refresh_lock = asyncio.Lock()
+        self._fallback_poll_task = None
+
+    async def start(self):
+        logger.info(f"{'🧪 Binance TESTNET' if self.testnet else '💰 Binance LIVE'} Mode ENABLED (async)")
+        connector = aiohttp.TCPConnector(limit=ASYNC_HTTP_POOL_SIZE, keepalive_timeout=ASYNC_HTTP_KEEPALIVE_SECONDS)
+        self.client = AsyncGatedClient(
+            self.api_key, self.api_secret, testnet=self.testnet, session_params={'connector': connector}
+        )
+
+        try:
+            await self.client.sync_clock()
+
+            account, exchange_info, open_orders = await asyncio.gather(
+                self.client.futures_account(), self.client.futures_exchange_info(), self.client.futures_get_open_orders()
+            )
+            # Offene Orders vor dem Snapshot buchen (siehe BinanceTrader.__init__)
+            self.account_book.track_orders(open_orders)
+            self.account_book.apply_snapshot(account)
+            self.symbol_cache.load(exchange_info)
+
+            if self.entry_time_in_force == 'GTD' and ENTRY_FILL_TIMEOUT_SECONDS <= GTD_MIN_SECONDS:
+                logger.warning(
+                    f"⚠️ GTD needs ENTRY_FILL_TIMEOUT_SECONDS > {GTD_MIN_SECONDS} — falling back to GTC with background cancel"
+                )
+                self.entry_time_in_force = 'GTC'
+
+            if self.order_store:
+                await self.recover_orders(open_orders)
+            self._tasks.append(asyncio.create_task(self._symbol_refresh_loop()))
+            self._tasks.append(asyncio.create_task(self._account_reconcile_loop()))
+            if CLOCK_SYNC_INTERVAL_SECONDS > 0:
+                self._tasks.append(asyncio.create_task(self._clock_sync_loop()))
+            if USE_USER_DATA_STREAM:
+                self._tasks.append(asyncio.create_task(self._user_stream_loop()))
+            if USE_MARK_PRICE_STREAM:
+                self.price_stream.start()
+        except Exception as e:
+            logger.error(f"❌ Failed to connect to Binance: {e}")
+            await self.close()
+            raise
+
+        logger.info("✅ Connected to Binance successfully")
+        logger.info(f"   Account Balance: ${self.account_book.balances()['balance']:.2f} USDT")
+        logger.info(f"   HTTP Pool Size: {ASYNC_HTTP_POOL_SIZE}")
+        logger.info(f"   Order Store: {ORDER_STORE_FILE or 'disabled'}")
+        logger.info(
+            f"   Clock Offset: {self.client.clock.offset_ms:+d}ms (RTT {self.client.clock.rtt_ms:.0f}ms), "
+            f"recvWindow {self.client.clock.recv_window_ms}ms"
+        )
+
+    async def close(self):
+        """Wie BinanceTrader.close — auch nach einem fehlgeschlagenen start()"""
+        for task in self._tasks:
+            task.cancel()
+        for handle in self._timeouts.values():
+            handle.cancel()
+        self.price_stream.stop()
+        if self.client:
+            await self.client.close_connection()
+        if self.order_store:
+            self.order_store.close()
+
+    # ── Hintergrund-Tasks ────────────────────────────────────────────────────
+
+    async def refresh_symbols(self):
+        """Single-flight reload of exchange info"""
+        seen_loaded_at = self.symbol_cache.loaded_at
+        async with self._symbol_refresh_lock:
+            if self.symbol_cache.loaded_at != seen_loaded_at:
+                return
+            self.symbol_cache.load(await self.client.futures_exchange_info())
+
+    async def _symbol_refresh_loop(self):
+        _request_priority.set(PRIORITY_LOW)  # gilt nur fuer diesen Task
+        while True:
+            await asyncio.sleep(EXCHANGE_INFO_TTL_SECONDS)
+            try:
+                await self.refresh_symbols()
+            except Exception as e:
+                logger.warning(f"⚠️ Exchange info refresh failed, keeping cached data: {e}")
+
+    async def _account_reconcile_loop(self):
+        _request_priority.set(PRIORITY_LOW)
+        while True:
+            await asyncio.sleep(ACCOUNT_RECONCILE_SECONDS)
+            try:
+                self.account_book.apply_snapshot(await self.client.futures_account())
+            except Exception as e:
+                logger.warning(f"⚠️ Account reconciliation failed: {e}")
+
+    async def _clock_sync_loop(self):
+        _request_priority.set(PRIORITY_LOW)
+        while True:
+            await asyncio.sleep(CLOCK_SYNC_INTERVAL_SECONDS)
+            try:
+                await self.client.sync_clock()
+            except Exception as e:
+                logger.warning(f"⚠️ Clock sync failed, keeping offset {self.client.clock.offset_ms:+d}ms: {e}")
+
+    def _on_order_update(self, msg):
+        """Wie BinanceTrader._on_order_update — das Storno des Geschwister-Legs laeuft als Task"""
+        self.account_book.on_order_update(msg)
+        self.order_tracker.on_order_update(msg)
+        o = msg['o']
+        if o['X'] in TERMINAL_ORDER_STATUSES:
+            sibling = self._protective_pairs.pop(o['i'], None)
+            if sibling is not None:
+                self._protective_pairs.pop(sibling, None)
+                if o['X'] == 'FILLED':
+                    logger.info("🔗 %s protective order %s filled — cancelling its sibling %s", o['s'], o['i'], sibling)
+                    asyncio.ensure_future(self._cancel_orders(o['s'], [sibling]))
+
+    def link_protective_orders(self, sl_order_id, tp_order_id):
+        """Wie BinanceTrader.link_protective_orders"""
+        self._protective_pairs[sl_order_id] = tp_order_id
+        self._protective_pairs[tp_order_id] = sl_order_id
+
+    async def cancel_protective_orders(self, symbol, position_side=None, exclude=()):
+        """Wie BinanceTrader.cancel_protective_orders"""
+        try:
+            open_orders = await self.client.futures_get_open_orders(symbol=symbol)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not list open orders of {symbol} to cancel its SL/TP: {e}")
+            return
+        await self._cancel_orders(symbol, stale_protective_order_ids(open_orders, position_side, exclude))
+
+    async def _user_stream_loop(self):
+        handlers = {
+            'ORDER_TRADE_UPDATE': self._on_order_update,
+            'ACCOUNT_UPDATE': self.account_book.on_account_update,
+            'ACCOUNT_CONFIG_UPDATE': self.account_book.on_account_config_update
+        }
+        attempt = 0
+        while True:
+            keepalive = None
+            try:
+                listen_key = await self.client.futures_stream_get_listen_key()
+                async with websockets.connect(f"{self.stream_url}/ws/{listen_key}", max_size=None) as ws:
+                    self.user_stream_connected = True
+                    attempt = 0
+                    logger.info("🔌 [user-data-stream] Stream connected")
+                    keepalive = asyncio.create_task(self._listen_key_keepalive(listen_key))
+                    await self._on_user_stream_connect()
+
+                    async for raw in ws:
+                        msg = json.loads(raw)
+                        if msg.get('e') == 'listenKeyExpired':
+                            logger.warning("⚠️ [user-data-stream] Listen key expired — reconnecting")
+                            break
+                        handler = handlers.get(msg.get('e'))
+                        if handler:
+                            try:
+                                handler(msg)
+                            except Exception as e:
+                                logger.warning(f"⚠️ [user-data-stream] Error handling stream message: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ [user-data-stream] Stream error: {e}")
+            finally:
+                if keepalive:
+                    keepalive.cancel()
+                if self.user_stream_connected:
+                    logger.warning("🔌 [user-data-stream] Stream disconnected")
+                self.user_stream_connected = False
+
+            self.user_stream_reconnects += 1
+            await asyncio.sleep(min(STREAM_RECONNECT_MAX_WAIT, 0.5 * (2 ** attempt)))
+            attempt += 1
+
+    async def _listen_key_keepalive(self, listen_key):
+        while True:
+            await asyncio.sleep(USER_STREAM_KEEPALIVE_SECONDS)
+            try:
+                await self.client.futures_stream_keepalive(listenKey=listen_key)
+            except Exception as e:
+                logger.warning(f"⚠️ [user-data-stream] Listen key keepalive failed: {e}")
+
+    async def _on_user_stream_connect(self):
+        """Nach (Re-)Connect: Account und offene Orders aus der Verbindungsluecke nachholen"""
+        try:
+            if self.user_stream_reconnects:
+                self.account_book.apply_snapshot(await self.client.futures_account())
+            await self.resync_pending_orders()
+        except Exception as e:
+            logger.warning(f"⚠️ [user-data-stream] Resync after connect failed: {e}")
+
+    # ── Lesende Calls ────────────────────────────────────────────────────────
+
+    def _account_book_is_live(self):
+        return self.user_stream_connected and self.account_book.loaded
+
+    def readiness(self):
+        """Warm-cache checks for /readyz (siehe BinanceTrader.readiness)"""
+        return {
+            'exchange_info': self.symbol_cache.loaded_at > 0,
+            'account': self.account_book.loaded,
+            'prices': not USE_MARK_PRICE_STREAM or self.price_stream.last_message_at > 0
+        }
+
+    async def get_current_price(self, symbol):
+        price = self.price_stream.get(symbol)
+        CACHE_REQUESTS.labels('mark_price', 'miss' if price is None else 'hit').inc()
+        if price is not None:
+            return price
+        try:
+            ticker = await self.client.futures_symbol_ticker(symbol=symbol)
+            return float(ticker['price'])
+        except Exception as e:
+            logger.error(f"❌ Error getting price for {symbol}: {e}")
+            return None
+
+    async def get_available_balance(self):
+        live = self._account_book_is_live()
+        CACHE_REQUESTS.labels('account', 'hit' if live else 'miss').inc()
+        if not live:
+            self.account_book.apply_snapshot(await self.client.futures_account())
+        return self.account_book.balances()['available']
+
+    async def get_account_info(self):
+        try:
+            if not self._account_book_is_live():
+                self.account_book.apply_snapshot(await self.client.futures_account())
+            balances = self.account_book.balances()
+            return {'balance': balances['balance'], 'available': balances['available'], 'testnet': self.testnet}
+        except Exception as e:
+            logger.error(f"❌ Error getting account info: {e}")
+            return None
+
+    async def get_positions(self, symbol=None):
+        """Wie BinanceTrader.get_positions"""
+        if self._account_book_is_live() and self.account_book.is_current(symbol):
+            return self.account_book.positions(symbol)
+        if symbol:
+            positions = await self.client.futures_position_information(symbol=symbol)
+        else:
+            positions = await self.client.futures_position_information()
+        return [p for p in positions if float(p['positionAmt']) != 0]
+
+    async def get_rules(self, symbol):
+        rules = self.symbol_cache.rules(symbol)
+        if rules is None:
+            # Evtl. neu gelistetes Symbol — einmal nachladen
+            try:
+                await self.refresh_symbols()
+            except Exception as e:
+                logger.warning(f"⚠️ Exchange info refresh failed: {e}")
+            rules = self.symbol_cache.rules(symbol)
+        return rules
+
+    # ── Order-Ueberwachung ───────────────────────────────────────────────────
+
+    async def signal_orders(self, symbol, client_id, since):
+        """Wie BinanceTrader.signal_orders"""
+        orders = await self.client.futures_get_all_orders(symbol=symbol, startTime=int((since - 60) * 1000))
+        return [o for o in orders if (o.get('clientOrderId') or '').startswith(f"{client_id}-")]
+
+    async def fetch_order_status(self, symbol, order_id):
+        order = await self.client.futures_get_order(symbol=symbol, orderId=order_id)
+        status = order.get('status')
+        self.order_tracker.update(symbol, order_id, status, float(order.get('executedQty', 0)))
+        return status
+
+    async def resync_pending_orders(self):
+        for symbol, order_id in self.order_tracker.pending():
+            try:
+                await self.fetch_order_status(symbol, order_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Resync failed for order {order_id}: {e}")
+
+    def watch_entry_order(self, symbol, order_id, timeout_seconds, protective_ids=(), exchange_expiry=False,
+                          remaining=None):
+        """Wie BinanceTrader.watch_entry_order, Timeout per loop.call_later"""
+        loop = asyncio.get_running_loop()
+        delay = timeout_seconds if remaining is None else remaining
+        if exchange_expiry:
+            delay += GTD_OBSERVE_GRACE_SECONDS
+        self._timeouts[order_id] = loop.call_later(
+            delay,
+            lambda: asyncio.ensure_future(
+                self._on_entry_timeout(symbol, order_id, timeout_seconds, protective_ids, not exchange_expiry)
+            )
+        )
+
+        def on_done(symbol, order_id, status):
+            handle = self._timeouts.pop(order_id, None)
+            if handle:
+                handle.cancel()
+            filled_qty = self.order_tracker.filled_qty(order_id)
+            self.order_tracker.forget(order_id)
+            if status == 'FILLED':
+                logger.info("✅ Order filled: %s", order_id)
+            else:
+                logger.info(f"ℹ️ [Background] Order {order_id} bereits beendet (Status: {status}), kein Cancel noetig")
+                if not filled_qty:
+                    asyncio.ensure_future(self._cancel_orders(symbol, protective_ids))
+
+        self.order_tracker.track(symbol, order_id, on_done)
+        if self._fallback_poll_task is None or self._fallback_poll_task.done():
+            self._fallback_poll_task = asyncio.create_task(self._fallback_poll())
+
+    async def _fallback_poll(self):
+        """REST-Polling offener Entries, aber nur solange der User-Data-Stream getrennt ist"""
+        _request_priority.set(PRIORITY_LOW)
+        while self.order_tracker.pending():
+            await asyncio.sleep(ORDER_FALLBACK_POLL_INTERVAL)
+            if not self.user_stream_connected:
+                await self.resync_pending_orders()
+
+    def pending_timeouts(self):
+        return len(self._timeouts)
+
+    async def _cancel_orders(self, symbol, order_ids):
+        if not order_ids:
+            return
+        try:
+            cancelled = await self.client.futures_cancel_orders(
+                symbol=symbol, orderIdList=json.dumps(list(order_ids), separators=(',', ':'))
+            )
+            if self.order_store:
+                self.order_store.update_orders(symbol, cancelled)
+            logger.info(f"🧹 Cancelled orders {list(order_ids)} for {symbol}")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cancel orders {list(order_ids)}: {e}")
+
+    async def _on_entry_timeout(self, symbol, order_id, timeout_seconds, protective_ids=(), cancel=True):
+        """Timeout erreicht — finalen Status pruefen und ggf. stornieren"""
+        self._timeouts.pop(order_id, None)
+        if not self.order_tracker.is_tracked(order_id):
+            return
+
+        try:
+            if self.user_stream_connected:
+                status = self.order_tracker.status(order_id)
+            else:
+                status = await self.fetch_order_status(symbol, order_id)
+
+            if status in TERMINAL_ORDER_STATUSES:
+                return
+
+            if not cancel:
+                logger.warning(f"⚠️ [Background] GTD order {order_id} still {status} after expiry — leaving it to the exchange")
+                return
+
+            logger.warning(f"⏱️ [Background] {timeout_seconds}s Timeout erreicht — storniere unfilled Order {order_id} (Status: {status})")
+            cancelled = await self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+            logger.info(f"🧹 [Background] Order erfolgreich storniert: {order_id}")
+            if self.order_store:
+                self.order_store.update_orders(symbol, [cancelled])
+
+            if status != 'PARTIALLY_FILLED':
+                await self._cancel_orders(symbol, protective_ids)
+
+        except Exception as e:
+            logger.warning(f"⚠️ [Background] Konnte Order nicht stornieren (evtl. bereits gefuellt/inaktiv): {e}")
+
+        finally:
+            self.order_tracker.forget(order_id)
+
+    async def recover_orders(self, open_orders):
+        """Wie BinanceTrader.recover_orders"""
+        self.order_store.prune()
+        watches, lookups = reconcile_stored_orders(self.order_store, open_orders, ENTRY_FILL_TIMEOUT_SECONDS)
+        for symbol, order_id, status, filled_qty, timeout_seconds, protective_ids, exchange_expiry, remaining in watches:
+            self.order_tracker.update(symbol, order_id, status, filled_qty)
+            self.watch_entry_order(symbol, order_id, timeout_seconds, protective_ids, exchange_expiry, remaining)
+        for symbol, order_id, protective_ids in lookups:
+            try:
+                status = await self.fetch_order_status(symbol, order_id)
+                if status in TERMINAL_ORDER_STATUSES and not self.order_tracker.filled_qty(order_id):
+                    await self._cancel_orders(symbol, protective_ids)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not recover entry order {order_id}: {e}")
+            finally:
+                self.order_tracker.forget(order_id)
+        if watches or lookups:
+            logger.info(f"♻️ Recovered {len(watches)} open entry orders, {len(lookups)} finished during downtime")
+
+    # ── Orders ───────────────────────────────────────────────────────────────
+
+    def _store_orders(self, symbol, orders, **entry):
+        if self.order_store and orders:
+            self.order_store.record(symbol, orders, self.order_tracker, **entry)
+
+    async def close_position(self, symbol, position_side=None, client_id=None):
+        """Close all positions for a symbol using MARKET order"""
+        try:
+            for pos in await self.get_positions(symbol):
+                if HEDGE_MODE and position_side and pos.get('positionSide') != position_side:
+                    continue
+                pos_amt = float(pos['positionAmt'])
+
+                if pos_amt != 0:
+                    side = 'SELL' if pos_amt > 0 else 'BUY'
+                    params = {'symbol': symbol, 'side': side, 'type': 'MARKET', 'quantity': abs(pos_amt)}
+                    if HEDGE_MODE:
+                        params['positionSide'] = pos.get('positionSide', 'BOTH')
+                    if client_id:
+                        params['newClientOrderId'] = f"{client_id}-x"
+
+                    logger.info("📤 Closing position: %s %s (Side: %s)", abs(pos_amt), symbol, side)
+                    self.account_book.mark_pending(symbol, exchange_time_ms(self.client))
+                    order = await self.client.futures_create_order(**params)
+                    self._store_orders(symbol, {'close': order})
+                    logger.info("✅ Position closed: Order ID %s", order['orderId'])
+                    await self.cancel_protective_orders(symbol, params.get('positionSide'))
+                    return order
+
+            logger.warning(f"⚠️ No open position found for {symbol}")
+            return None
+
+        except BinanceAPIException as e:
+            logger.error(f"❌ Binance API Error closing position: {e.message}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error closing position: {e}")
+            return None
+
+    async def execute_plan(self, plan):
+        """
+        Wie BinanceTrader.execute_plan: Close-/Reduce-Legs nacheinander vorweg,
+        der Rest als batchOrders-Request — ohne Batching gleichzeitig.
+        """
+        mark_positions_pending(self.account_book, self.client, plan)
+        orders, failures = {}, {}
+        leading, rest = split_position_legs(plan)
+        for role, params in leading:
+            try:
+                orders[role] = await self.client.futures_create_order(**params)
+            except Exception as e:
+                failures[role] = e
+
+        if len(rest) == 1 or not USE_BATCH_ORDERS:
+            results = await asyncio.gather(
+                *(self.client.futures_create_order(**params) for _, params in rest), return_exceptions=True
+            )
+            for (role, _), result in zip(rest, results):
+                if isinstance(result, Exception):
+                    failures[role] = result
+                else:
+                    orders[role] = result
+            rest = []
+
+        for i in range(0, len(rest), BATCH_ORDER_LIMIT):
+            chunk = rest[i:i + BATCH_ORDER_LIMIT]
+            try:
+                results = await self.client.futures_place_batch_order(
+                    batchOrders=[{k: str(v) for k, v in params.items()} for _, params in chunk]
+                )
+            except Exception as e:
+                for role, _ in chunk:
+                    failures[role] = e
+                continue
+            for (role, _), result in zip(chunk, results):
+                if 'code' in result and 'orderId' not in result:
+                    failures[role] = OrderRejected(result['code'], result.get('msg'))
+                else:
+                    orders[role] = result
+        self.account_book.track_orders(orders.values())
+        return orders, failures
+
+    async def _timed(self, coro):
+        started = time.perf_counter()
+        try:
+            return await coro, None, (time.perf_counter() - started) * 1000
+        except Exception as e:
+            return None, e, (time.perf_counter() - started) * 1000
+
+    async def place_order(self, signal, symbol, entry, sl, tp, risk_usd, client_id=None):
+        """LIMIT-Entry exakt auf dem Signal-Entry-Preis (siehe BinanceTrader.place_order)"""
+        timings = {}
+        try:
+            started = time.perf_counter()
+            stages = {
+                'price': self.get_current_price(symbol),
+                'balance': self.get_available_balance(),
+                'rules': self.get_rules(symbol),
+                'positions': self.get_positions(symbol)
+            }
+            results = await asyncio.gather(*(self._timed(c) for c in stages.values()))
+            pretrade, errors, timings = {}, {}, {}
+            for name, (result, error, elapsed) in zip(stages, results):
+                pretrade[name], timings[name] = result, elapsed
+                if error is not None:
+                    errors[name] = error
+            timings['pretrade'] = (time.perf_counter() - started) * 1000
+
+            for stage in ('price', 'balance', 'rules'):
+                if stage in errors:
+                    logger.error(f"❌ Pre-trade {stage} lookup failed: {errors[stage]}")
+                    return None
+
+            current_price, rules = pretrade['price'], pretrade['rules']
+            if not current_price:
+                return None
+            if rules is None:
+                logger.error(f"❌ Could not load symbol precision for {symbol}")
+                return None
+
+            stage_started = time.perf_counter()
+            quantity = position_size_for_risk(entry, sl, risk_usd, pretrade['balance'], rules)
+            timings['sizing'] = (time.perf_counter() - stage_started) * 1000
+            if not quantity:
+                return None
+            position_size = float(quantity)
+            limit_price_dec = rules.normalize_price(entry)
+            limit_price = float(limit_price_dec)
+
+            if 'positions' in errors:
+                logger.warning(f"⚠️ Error checking/closing positions: {errors['positions']}")
+
+            good_till_date = None
+            entry_timeout = ENTRY_FILL_TIMEOUT_SECONDS
+            if self.entry_time_in_force == 'GTD':
+                exchange_time = exchange_time_ms(self.client)
+                good_till_date = good_till_date_ms(exchange_time, entry_timeout, self.client.clock.recv_window_ms)
+                entry_timeout = (good_till_date - exchange_time) / 1000
+
+            try:
+                plan = build_entry_plan(
+                    signal, symbol, pretrade['positions'] or [], quantity, limit_price_dec, rules, sl, tp,
+                    current_price, good_till_date=good_till_date
+                )
+            except OrderRuleViolation as e:
+                logger.error(f"❌ Order rejected locally: {e}")
+                return None
+            assign_client_order_ids(plan, client_id)
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "📊 Placing %s LIMIT order for %s: %s @ %s (plan %s%s: %s)",
+                    signal, symbol, position_size, limit_price, REVERSAL_MODE, ', hedge' if HEDGE_MODE else '',
+                    ', '.join(role for role, _ in plan) or 'nothing to do'
+                )
+
+            stage_started = time.perf_counter()
+            orders, failures = await self.execute_plan(plan)
+            timings['orders'] = (time.perf_counter() - stage_started) * 1000
+            self._store_orders(
+                symbol, orders, timeout_seconds=entry_timeout, exchange_expiry=good_till_date is not None
+            )
+            if 'close' in orders:
+                await self.cancel_protective_orders(
+                    symbol, orders['close'].get('positionSide') if HEDGE_MODE else None,
+                    exclude={o['orderId'] for o in orders.values()}
+                )
+            if 'sl' in orders and 'tp' in orders:
+                self.link_protective_orders(orders['sl']['orderId'], orders['tp']['orderId'])
+            timings['total'] = (time.perf_counter() - started) * 1000
+
+            for role, e in failures.items():
+                if role == 'close':
+                    logger.warning(f"⚠️ Error checking/closing positions: {e}")
+                else:
+                    logger.error(f"❌ {role} order rejected: {e}")
+
+            for role in ('entry', 'reduce'):
+                if role in failures:
+                    await self._cancel_orders(symbol, [orders[r]['orderId'] for r in ('sl', 'tp') if r in orders])
+                    raise failures[role]
+
+            order = orders.get('entry')
+            if order is None:
+                order = orders.get('reduce')
+                fill_price = float(order.get('avgPrice') or 0) if order else 0.0
+                return {
+                    'entry_order': order,
+                    'sl_order': None,
+                    'tp_order': None,
+                    'position_size': position_size,
+                    'entry_price': fill_price or current_price,
+                    'timings_ms': timings,
+                    'note': 'Position reduced with MARKET order' if order else 'Position already at target size'
+                }
+
+            logger.info("📝 Limit order placed: %s", order['orderId'])
+            protective_ids = [orders[role]['orderId'] for role in ('sl', 'tp') if role in orders]
+            self.watch_entry_order(
+                symbol, order['orderId'], entry_timeout, protective_ids,
+                exchange_expiry=good_till_date is not None
+            )
+
+            return {
+                'entry_order': order,
+                'sl_order': orders.get('sl'),
+                'tp_order': orders.get('tp'),
+                'position_size': position_size,
+                'entry_price': limit_price,
+                'timings_ms': timings,
+                'note': f'LIMIT order placed, monitored in background for {entry_timeout:.0f}s'
+            }
+
+        except BinanceAPIException as e:
+            logger.error(f"❌ Binance API Error: {e.message}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Order failed: {e}")
+            return None
+        finally:
+            observe_stages(timings)
+
+
+class SymbolLocks:
+    """
+    Signale pro Symbol strikt nacheinander — asyncio.Lock weckt Wartende in
+    FIFO-Reihenfolge. Zaehlt Halter und Wartende selbst und entfernt den
+    Lock eines Symbols, sobald niemand ihn mehr haelt oder auf ihn wartet.
+    """
+
+    def __init__(self):
+        self._locks = {}  # symbol -> [asyncio.Lock, Halter + Wartende]
+
+    @asynccontextmanager
+    async def hold(self, symbol):
+        entry = self._locks.setdefault(symbol, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[symbol]
+
+    def queue_depths(self):
+        """Signals waiting behind the running one, per symbol"""
+        return {symbol: users - 1 for symbol, (_, users) in self._locks.items()}
+
+    def __len__(self):
+        return len(self._locks)
+
+
+class AsyncIdempotencyCache(IdempotencyCache):
+    """
+    IdempotencyCache fuer den Event-Loop: jeder Eintrag traegt zusaetzlich
+    ein Future `settled`, auf das Duplikate ohne Polling warten. Alle
+    Aufrufe laufen im Loop-Thread.
+    """
+
+    def _new_entry(self, now, ttl):
+        entry = super()._new_entry(now, ttl)
+        entry['settled'] = asyncio.get_running_loop().create_future()
+        return entry
+
+    def _settle(self, entry):
+        super()._settle(entry)
+        if not entry['settled'].done():
+            entry['settled'].set_result(None)
+
+    async def wait(self, entry, timeout=DEDUP_WAIT_SECONDS):
+        """Wait until the original finished; returns (payload, status) or None"""
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(asyncio.shield(entry['settled']), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return entry['response']
+
+
+trader = None
+trader_init = TraderInitializer()
+_init_task = None
+
+symbol_locks = SymbolLocks()
+dedup_cache = AsyncIdempotencyCache()
+webhook_recorder = WebhookRecorder(WEBHOOK_RECORD_FILE) if WEBHOOK_RECORD_FILE else None
+signal_log = SignalLog(SIGNAL_WAL_FILE) if SIGNAL_WAL_FILE else None
+signal_index = SignalIndex()
+_signal_tasks = set()  # 202-Modus: laufende Ausfuehrungen festhalten, sonst raeumt der GC die Tasks ab
+
+
+# ── ASGI App ────────────────────────────────────────────────────────────────
+
+async def handle_webhook(data):
+    """Handle TradingView webhook alerts; returns (payload, status)"""
+    started = time.perf_counter()
+    payload, status = await process_webhook(data)
+    signal = data.get('signal') if isinstance(data, dict) else None
+    WEBHOOK_LATENCY.labels(
+        signal if signal in KNOWN_SIGNALS else 'invalid', str(status)
+    ).observe(time.perf_counter() - started)
+    return payload, status
+
+
+def trader_unavailable():
+    """Response while the trader is still starting (503) or failed permanently (500)"""
+    if trader_init.state == 'failed':
+        return {'error': 'Trader not initialized — check server logs', 'init': trader_init.snapshot()}, 500
+    return {'error': 'Trader starting — retry shortly', 'init': trader_init.snapshot()}, 503
+
+
+async def log_signal(key, client_id, data, signal_id):
+    """Wie binance_webhook_server.log_signal"""
+    if signal_log is None:
+        return False
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            asyncio.wrap_future(signal_log.accept(key, client_id, data, signal_id)), SIGNAL_WAL_SYNC_TIMEOUT
+        )
+        return True
+    except Exception as e:
+        logger.error(f"❌ Signal WAL write failed — executing without crash protection: {e}")
+        return False
+    finally:
+        STAGE_LATENCY.labels('wal').observe(time.perf_counter() - started)
+
+
+async def replay_pending_signals():
+    """Wie binance_webhook_server.replay_pending_signals"""
+    if signal_log is None or not signal_log.pending():
+        return
+    logger.warning(f"♻️ Replaying {len(signal_log.pending())} signal(s) accepted before the last shutdown")
+    for record in signal_log.pending():
+        payload, client_id, key = record['payload'], record['client_id'], record['key']
+        label = f"{payload.get('signal')} {payload.get('symbol')} ({record['id'][:8]})"
+        try:
+            if time.time() - record['at'] > SIGNAL_REPLAY_MAX_AGE_SECONDS:
+                logger.warning(f"⚠️ Not replaying {label}: accepted {time.time() - record['at']:.0f}s ago")
+                signal_log.complete(record['id'], 'expired')
+                continue
+            placed = await trader.signal_orders(payload.get('symbol'), client_id, record['at'])
+            if placed:
+                logger.info(f"♻️ {label} already reached Binance ({len(placed)} orders) — not replaying")
+                signal_log.complete(record['id'], 'executed')
+                continue
+
+            entry, is_new = dedup_cache.begin(key, dedup_cache.ttl_for(payload))
+            if not is_new:
+                signal_log.complete(record['id'], 'duplicate')
+                continue
+            entry['tracking_id'] = record['id']
+            signal_index.add(record['id'], payload, record['at'])
+            try:
+                response, status = await execute_signal(payload, client_id=client_id)
+            except Exception:
+                dedup_cache.discard(key)
+                raise
+            response = dict(response, tracking_id=record['id'])
+            signal_index.finish(record['id'], response, status)
+            dedup_cache.complete(key, response, status)
+            signal_log.complete(record['id'], status)
+            logger.info(f"♻️ Replayed {label}: HTTP {status}")
+        except Exception as e:
+            logger.error(f"❌ Replay of {label} failed, keeping it for the next start: {e}")
+
+
+async def process_webhook(data):
+    """Auth, dedup and execute one webhook request"""
+    started = time.perf_counter()
+    if trader is None or trader_init.state != 'ready':
+        logger.error(f"❌ Trader not initialized (state: {trader_init.state}) — check Binance API credentials / connection")
+        return trader_unavailable()
+
+    if not data:
+        logger.error("❌ No JSON data received")
+        return {'error': 'No data'}, 400
+
+    if data.get('secret') != trader.webhook_secret:
+        logger.error("❌ Invalid webhook secret")
+        return {'error': 'Unauthorized'}, 401
+
+    # Duplikate vor jedem Exchange-Call abfangen (siehe IdempotencyCache)
+    received_at = time.time()
+    key = dedup_cache.key_for(data)
+    entry, is_new = dedup_cache.begin(key, dedup_cache.ttl_for(data))
+    CACHE_REQUESTS.labels('dedup', 'miss' if is_new else 'hit').inc()
+    STAGE_LATENCY.labels('auth').observe(time.perf_counter() - started)
+    if not is_new:
+        logger.info(f"♻️ Duplicate alert suppressed: {data.get('signal')} {data.get('symbol')} ({key[:12]})")
+        # Im 202-Modus nicht auf das Original warten — dessen Tracking-ID genuegt
+        response = await dedup_cache.wait(entry, 0 if WEBHOOK_ACCEPT_ASYNC else DEDUP_WAIT_SECONDS)
+        if response is None:
+            payload, status = {
+                'status': 'duplicate',
+                'tracking_id': entry.get('tracking_id'),
+                'note': 'Original alert still processing'
+            }, 202
+        else:
+            payload, status = dict(response[0], duplicate=True), response[1]
+        if webhook_recorder:
+            webhook_recorder.record(data, status, payload, [], received_at,
+                                    (time.perf_counter() - started) * 1000, duplicate=True)
+        return payload, status
+
+    # Tracking-ID fuer GET /orders/<id> — zugleich die ID des Signals im WAL
+    signal_id = entry['tracking_id'] = uuid.uuid4().hex
+    signal_index.add(signal_id, data, received_at)
+    try:
+        invalid = validate_signal(data)
+    except Exception as e:
+        invalid = {'error': str(e)}, 500
+    if invalid:
+        return finish_signal(key, signal_id, False, data, invalid, received_at, started, None)
+
+    client_id = entry['client_id']
+    if entry['retry_since'] is not None:
+        earlier = await check_earlier_attempt(data, client_id, entry['retry_since'])
+        if earlier:
+            return finish_signal(key, signal_id, False, data, earlier, received_at, started, None)
+
+    # Erst ins WAL (fsync im Writer-Thread, der Loop wartet nicht blockierend), dann ausfuehren
+    logged = await log_signal(key, client_id, data, signal_id)
+    with capture_exchange_calls() if webhook_recorder else nullcontext() as calls:
+        task = asyncio.create_task(
+            run_tracked_signal(key, signal_id, logged, data, client_id, received_at, started, calls)
+        )
+    if WEBHOOK_ACCEPT_ASYNC:
+        _signal_tasks.add(task)
+        task.add_done_callback(_signal_tasks.discard)
+        return {
+            'status': 'accepted',
+            'tracking_id': signal_id,
+            'signal': data.get('signal'),
+            'symbol': data.get('symbol')
+        }, 202
+    # Bricht der Client ab, laeuft die Ausfuehrung trotzdem zu Ende
+    return await asyncio.shield(task)
+
+
+async def check_earlier_attempt(data, client_id, since):
+    """Wie binance_webhook_server.check_earlier_attempt"""
+    try:
+        placed = await trader.signal_orders(data.get('symbol'), client_id, since)
+    except Exception as e:
+        logger.error(f"❌ Could not look up the earlier attempt of {client_id}: {e}")
+        return {'error': f'Could not look up the earlier attempt — not resending: {e}'}, 500
+    if not placed:
+        return None
+    logger.warning(f"♻️ Earlier attempt of {client_id} already placed {len(placed)} order(s) — not resending")
+    return already_placed_response(data, placed)
+
+
+def finish_signal(key, signal_id, logged, data, outcome, received_at, started, calls, raised=False):
+    """Wie binance_webhook_server.finish_signal"""
+    payload, status = outcome
+    payload = dict(payload, tracking_id=signal_id)
+    if logged:
+        signal_log.complete(signal_id, status)
+    signal_index.finish(signal_id, payload, status)
+    if raised:
+        dedup_cache.discard(key)
+    else:
+        dedup_cache.complete(key, payload, status)
+    if webhook_recorder:
+        webhook_recorder.record(data, status, payload, calls or [], received_at, (time.perf_counter() - started) * 1000)
+    return payload, status
+
+
+async def run_tracked_signal(key, signal_id, logged, data, client_id, received_at, started, calls):
+    """Execute an accepted signal and record its outcome (WAL, index, dedup cache, recording)"""
+    signal_index.started(signal_id)
+    raised = False
+    try:
+        outcome = await run_signal(data, client_id)
+    except Exception as e:
+        logger.error(f"❌ Webhook error: {e}")
+        outcome, raised = ({'error': str(e)}, 500), True
+    return finish_signal(key, signal_id, logged, data, outcome, received_at, started, calls, raised)
+
+
+async def execute_signal(data, client_id=None):
+    """Validate and execute an authenticated signal; returns (payload, status)"""
+    invalid = validate_signal(data)
+    if invalid:
+        return invalid
+    return await run_signal(data, client_id)
+
+
+async def run_signal(data, client_id=None):
+    """Execute a validated signal under the symbol's lock; returns (payload, status)"""
+    signal = data.get('signal')
+    symbol = data.get('symbol')
+
+    if signal in ('CLOSE_LONG', 'CLOSE_SHORT'):
+        direction = signal.split('_')[1]
+        logger.info("📤 EXIT Signal: Close %s position for %s", direction, symbol)
+        started = time.perf_counter()
+        async with symbol_locks.hold(symbol):
+            result = await trader.close_position(symbol, position_side=direction, client_id=client_id)
+        STAGE_LATENCY.labels('close').observe(time.perf_counter() - started)
+        if result:
+            return {
+                'status': 'success',
+                'action': signal.lower(),
+                'symbol': symbol,
+                'order_id': result.get('orderId'),
+                'order_ids': {'close': result.get('orderId')}
+            }, 200
+        return {'error': 'Failed to close position'}, 500
+
+    entry = float(data.get('entry', 0))
+    sl = float(data.get('sl', 0))
+    tp = float(data.get('tp', 0))
+    risk_usd = float(data.get('risk_usd', 100))
+
+    logger.info("📊 Webhook: %s %s — Entry: %s, SL: %s, TP: %s", signal, symbol, entry, sl, tp)
+
+    async with symbol_locks.hold(symbol):
+        result = await trader.place_order(signal, symbol, entry, sl, tp, risk_usd, client_id)
+    if result:
+        return {
+            'status': 'success',
+            'signal': signal,
+            'symbol': symbol,
+            'position_size': result['position_size'],
+            'entry_price': result['entry_price'],
+            'order_ids': placed_order_ids(result),
+            'timings_ms': {k: round(v, 2) for k, v in result['timings_ms'].items()}
+        }, 200
+    return {'error': 'Order failed or not filled within tolerance/timeout'}, 500
+
+
+async def handle_status(_data):
+    if not trader:
+        return trader_unavailable()
+
+    with request_priority(PRIORITY_LOW):
+        account, btc_price = await asyncio.gather(trader.get_account_info(), trader.get_current_price('BTCUSDT'))
+    return {
+        'status': 'running',
+        'testnet': trader.testnet,
+        'account': account,
+        'btc_price': btc_price,
+        'btc_price_age_seconds': trader.price_stream.age('BTCUSDT'),
+        'streams': {
+            'user_data': trader.user_stream_connected,
+            'mark_price': trader.price_stream.connected
+        },
+        'entry_fill_timeout_seconds': ENTRY_FILL_TIMEOUT_SECONDS,
+        'entry_time_in_force': trader.entry_time_in_force,
+        'pending_orders': trader.pending_timeouts(),
+        'order_store': trader.order_store.snapshot() if trader.order_store else None,
+        'signal_log': signal_log.snapshot() if signal_log else None,
+        'signal_index': {'size': len(signal_index), 'states': signal_index.states(), 'accept_async': WEBHOOK_ACCEPT_ASYNC},
+        'rate_limits': trader.client.rate_gate.snapshot(),
+        'clock': trader.client.clock.snapshot(),
+        'request_policy': trader.client.policy.snapshot(),
+        'dedup_cache': {'size': len(dedup_cache), 'hits': dedup_cache.hits, 'misses': dedup_cache.misses},
+        'execution': {
+            'queue_depths': symbol_locks.queue_depths()
+        },
+        'timestamp': datetime.utcnow().isoformat()
+    }, 200
+
+
+async def handle_positions(_data):
+    if not trader:
+        return trader_unavailable()
+
+    with request_priority(PRIORITY_LOW):
+        positions = await trader.get_positions()
+    active_positions = [
+        {
+            'symbol': p['symbol'],
+            'size': float(p['positionAmt']),
+            'entry_price': float(p['entryPrice']),
+            'unrealized_pnl': float(p['unRealizedProfit']),
+            'leverage': int(p['leverage'])
+        }
+        for p in positions
+        if float(p['positionAmt']) != 0
+    ]
+    return {'positions': active_positions, 'count': len(active_positions)}, 200
+
+
+async def handle_order(_data, signal_id):
+    """Outcome of one webhook signal by the tracking ID from its /webhook response"""
+    entry = signal_index.get(signal_id)
+    if entry is None:
+        return {'error': 'Unknown tracking id'}, 404
+    return with_order_status(entry, trader.order_tracker if trader else None), 200
+
+
+async def handle_orders(query):
+    """Most recent webhook signals for ?symbol=, newest first"""
+    symbol = (query or {}).get('symbol')
+    if not symbol:
+        return {'error': 'symbol required'}, 400
+    tracker = trader.order_tracker if trader else None
+    signals = [with_order_status(entry, tracker) for entry in signal_index.for_symbol(symbol)]
+    return {'symbol': symbol, 'signals': signals, 'count': len(signals)}, 200
+
+
+async def handle_healthz(_data):
+    """Liveness probe — never touches the exchange"""
+    return {'status': 'alive', 'trader': trader_init.snapshot()}, 200
+
+
+async def handle_readyz(_data):
+    """Readiness probe — 200 once the trader is up and its caches are warm"""
+    if trader is None or trader_init.state != 'ready':
+        return {'ready': False, 'trader': trader_init.snapshot()}, 503
+    checks = trader.readiness()
+    ready = all(checks.values())
+    return {'ready': ready, 'checks': checks}, 200 if ready else 503
+
+
+async def handle_metrics(_data):
+    return render_metrics(), 200
+
+
+async def handle_test(_data):
+    return {
+        'status': 'ok',
+        'message': 'Binance Webhook Server is running (async)',
+        'testnet': trader.testnet if trader else None
+    }, 200
+
+
+ROUTES = {
+    ('POST', '/webhook'): handle_webhook,
+    ('GET', '/status'): handle_status,
+    ('GET', '/positions'): handle_positions,
+    ('GET', '/orders'): handle_orders,
+    ('GET', '/healthz'): handle_healthz,
+    ('GET', '/readyz'): handle_readyz,
+    ('GET', '/metrics'): handle_metrics,
+    ('GET', '/test'): handle_test,
+}
+# Routen mit einem Pfad-Parameter als letztem Segment, z.B. /orders/<id>
+PARAM_ROUTES = {
+    ('GET', '/orders/'): handle_order,
+}
+
+
+async def _init_trader():
+    """Connect in the background with retry; webhooks are accepted once the WAL replay is done"""
+    global trader
+    while True:
+        trader_init.attempt_started()
+        try:
+            instance = AsyncBinanceTrader()
+            await instance.start()
+        except Exception as e:
+            wait = trader_init.failed(e)
+            if wait is None:
+                return
+            await asyncio.sleep(wait)
+            continue
+        trader = instance
+        trader_init.replaying()
+        await replay_pending_signals()
+        trader_init.succeeded()
+        return
+
+
+async def _lifespan(receive, send):
+    global _init_task
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Nicht auf Binance warten — uvicorn nimmt sofort Requests an, /readyz meldet die Bereitschaft
+            _init_task = asyncio.create_task(_init_trader())
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if _init_task and not _init_task.done():
+                _init_task.cancel()
+            if trader:
+                await trader.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def _send_json(send, payload, status):
+    await _send_body(send, json.dumps(payload).encode(), status, b'application/json')
+
+
+async def _send_body(send, body, status, content_type):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def app(scope, receive, send):
+    """Minimal ASGI app — keine Framework-Abhaengigkeit, nur uvicorn als Server"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    handler, params = ROUTES.get((scope['method'], scope['path'])), ()
+    if handler is None:
+        prefix, _, param = scope['path'].rpartition('/')
+        handler, params = PARAM_ROUTES.get((scope['method'], prefix + '/')) if param else None, (param,)
+    if handler is None:
+        await _send_json(send, {'error': 'Not found'}, 404)
+        return
+
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    if data is None and scope['method'] == 'GET' and scope.get('query_string'):
+        data = dict(parse_qsl(scope['query_string'].decode()))
+
+    try:
+        payload, status = await handler(data, *params)
+    except Exception as e:
+        logger.error(f"❌ {scope['path']} error: {e}")
+        payload, status = {'error': str(e)}, 500
+    if isinstance(payload, bytes):
+        await _send_body(send, payload, status, CONTENT_TYPE_LATEST.encode())
+    else:
+        await _send_json(send, payload, status)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('PORT', 10000)))
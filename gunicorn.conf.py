@@ -0,0 +1,9 @@
+"""gunicorn-Hooks — gunicorn laedt diese Datei automatisch aus dem Arbeitsverzeichnis"""
+import os
+
+
+def child_exit(server, worker):
+    # Werte beendeter Worker aus den live*-Gauges entfernen (PROMETHEUS_MULTIPROC_DIR)
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Webhook-Replay
+Spielt eine mit WEBHOOK_RECORD_FILE aufgezeichnete Alert-Folge erneut durch
+webhook() — gegen den lokalen Binance-Stand-in, in Originalgeschwindigkeit,
+beschleunigt oder so schnell wie moeglich. Der Replay-Lauf wird selbst
+wieder aufgezeichnet und pro Alert mit dem Original verglichen (HTTP-Status,
+Folge der Exchange-Calls, Latenz) — zum Debuggen von Produktionsfaellen und
+fuer Performance-Vergleiche zwischen Versionen.
+
+Beispiel:
+  WEBHOOK_RECORD_FILE=webhooks.jsonl gunicorn binance_webhook_server:app      # aufzeichnen
+  python replay_webhooks.py webhooks.jsonl --speed 10                           # 10x schneller abspielen
+  python replay_webhooks.py webhooks.jsonl --speed max --server async --output replay.jsonl
+"""
+
+import os
+import sys
+import json
+import argparse
+from collections import Counter, defaultdict
+
+import binance_mock_server
+from benchmark_webhook import BENCH_SECRET, run_async, run_sync, setup_environment, summarize
+
+MAX_LISTED_MISMATCHES = 20
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Replay recorded webhooks against the local Binance stand-in')
+    parser.add_argument('recording', help='JSON-lines file written via WEBHOOK_RECORD_FILE')
+    parser.add_argument('--speed', default='original',
+                        help="'original', 'max' or a speed-up factor (e.g. 10 = ten times faster)")
+    parser.add_argument('--server', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--concurrency', type=int, default=32, help='max. alerts in flight')
+    parser.add_argument('--output', help='replay recording (default: <recording>.replay.jsonl)')
+    parser.add_argument('--no-align-prices', action='store_true',
+                        help="don't move the stand-in's mark price to the recorded price before each alert")
+    parser.add_argument('--log-level', default='WARNING', help='server log level during the replay')
+    return parser.parse_args(argv)
+
+
+def load_recording(path):
+    with open(path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    entries.sort(key=lambda e: (e['received_at'], e['seq']))
+    return entries
+
+
+def speed_factor(speed):
+    if speed == 'max':
+        return None
+    if speed == 'original':
+        return 1.0
+    factor = float(speed)
+    if factor <= 0:
+        raise SystemExit('--speed factor must be positive')
+    return factor
+
+
+def recorded_price(entry):
+    """Best guess of the mark price when the alert arrived: REST ticker response, else the signal entry"""
+    for call in entry['exchange_calls']:
+        if call['path'] == 'ticker/price' and isinstance(call.get('body'), dict) and 'price' in call['body']:
+            return call['body']['price']
+    return entry['payload'].get('entry')
+
+
+def call_sequence(entry):
+    return [f"{c['method']} {c['path']}" for c in entry['exchange_calls']]
+
+
+def match_key(entry):
+    """Alerts are matched by payload (in arrival order) — identical payloads are matched by occurrence"""
+    return json.dumps(entry['payload'], sort_keys=True)
+
+
+def compare(original, replayed):
+    """Pair original and replayed entries; returns (pairs, unmatched_original)"""
+    pending = defaultdict(list)
+    for entry in replayed:
+        pending[match_key(entry)].append(entry)
+    pairs, unmatched = [], []
+    for entry in original:
+        candidates = pending.get(match_key(entry))
+        if candidates:
+            pairs.append((entry, candidates.pop(0)))
+        else:
+            unmatched.append(entry)
+    return pairs, unmatched
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    entries = load_recording(args.recording)
+    if not entries:
+        print(f"No webhooks in {args.recording}", file=sys.stderr)
+        return 1
+    output = args.output or f"{args.recording}.replay.jsonl"
+    if os.path.exists(output):
+        os.remove(output)
+
+    mock = binance_mock_server.MockBinanceServer(port=0, stream_port=0)
+    # In der Aufzeichnung gehandelte, dem Stand-in unbekannte Symbole vor dem Serverstart listen
+    for entry in entries:
+        symbol, price = entry['payload'].get('symbol'), recorded_price(entry)
+        if symbol and price and symbol not in mock.exchange.symbols:
+            mock.exchange.add_symbol(symbol, price)
+    mock.start()
+    setup_environment(args.server, mock.url, mock.stream_url, args.log_level, WEBHOOK_RECORD_FILE=output)
+    drive = run_async(args.concurrency) if args.server == 'async' else run_sync(args.concurrency)
+
+    factor = speed_factor(args.speed)
+    first = entries[0]['received_at']
+    schedule, originals = [], {}
+    for entry in entries:
+        alert = dict(entry['payload'], secret=BENCH_SECRET)
+        originals[id(alert)] = entry
+        schedule.append(((entry['received_at'] - first) / factor if factor else None, alert))
+
+    def align_price(alert):
+        symbol, price = alert.get('symbol'), recorded_price(originals[id(alert)])
+        if symbol in mock.exchange.symbols and price:
+            mock.exchange.set_price(symbol, price)
+
+    latencies = []
+    elapsed = drive(
+        schedule,
+        on_result=lambda alert, status, payload, latency: latencies.append(latency),
+        before_send=None if args.no_align_prices else align_price
+    )
+
+    # Aufzeichnung des Replays abschliessen und mit dem Original vergleichen
+    server = sys.modules['binance_webhook_server_async' if args.server == 'async' else 'binance_webhook_server']
+    server.webhook_recorder.close()
+    mock.stop()
+    replayed = load_recording(output) if os.path.exists(output) else []
+    pairs, unmatched = compare(entries, replayed)
+
+    status_changes = [(o, r) for o, r in pairs if o['status'] != r['status']]
+    call_changes = [(o, r) for o, r in pairs if call_sequence(o) != call_sequence(r)]
+    report = {
+        'recording': args.recording,
+        'replay_recording': output,
+        'server': args.server,
+        'speed': args.speed,
+        'alerts': len(entries),
+        'replayed': len(replayed),
+        'unmatched': len(unmatched),
+        'duration_s': round(elapsed, 3),
+        'recorded_span_s': round(entries[-1]['received_at'] - first, 3),
+        'status_changes': len(status_changes),
+        'exchange_call_changes': len(call_changes),
+        'statuses_original': dict(Counter(str(e['status']) for e in entries)),
+        'statuses_replay': dict(Counter(str(e['status']) for e in replayed)),
+        'duration_ms_original': summarize([e['duration_ms'] for e in entries]),
+        'duration_ms_replay': summarize([e['duration_ms'] for e in replayed]),
+        'latency_ms_replay_client': summarize(latencies)
+    }
+    print(json.dumps(report, indent=2))
+
+    for original, replay in status_changes[:MAX_LISTED_MISMATCHES]:
+        payload = original['payload']
+        print(f"≠ #{original['seq']} {payload.get('signal')} {payload.get('symbol')}: "
+              f"status {original['status']} → {replay['status']} ({replay['response']})", file=sys.stderr)
+    for original, replay in call_changes[:MAX_LISTED_MISMATCHES]:
+        print(f"≠ #{original['seq']} calls {call_sequence(original)} → {call_sequence(replay)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Gemeinsame Fixtures: ein lokaler Binance-Stand-in (binance_mock_server) pro
+Testlauf und das Server-Modul als Bibliothek — ohne eigenen Trader, Log-File
+im Temp-Verzeichnis, ohne Order-Store und Signal-WAL.
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import binance_mock_server  # noqa: E402
+
+MOCK = binance_mock_server.MockBinanceServer(port=0, stream_port=0)
+
+# Vor dem ersten Import von binance_webhook_server setzen — die Konfiguration wird beim Import gelesen
+os.environ.update({
+    'WEBHOOK_SERVER_MODE': 'async',
+    'BINANCE_MOCK_URL': MOCK.url,
+    'BINANCE_MOCK_STREAM_URL': MOCK.stream_url,
+    'BINANCE_API_KEY': 'test',
+    'BINANCE_SECRET_KEY': 'test',
+    'WEBHOOK_SECRET': 'test',
+    'LOG_FILE': os.path.join(tempfile.mkdtemp(prefix='webhook-tests-'), 'server.log'),
+    'LOG_LEVEL': 'WARNING',
+    'ORDER_STORE_FILE': '',
+    'SIGNAL_WAL_FILE': '',
+    'WEBHOOK_RECORD_FILE': '',
+})
+
+
+@pytest.fixture(scope='session')
+def mock_server():
+    MOCK.start()
+    yield MOCK
+    MOCK.stop()
+
+
+@pytest.fixture
+def mock(mock_server):
+    """Stand-in mit frischem Exchange-Zustand und ohne Fault-Injection"""
+    faults = dict(vars(mock_server.faults))
+    mock_server.exchange.reset()
+    yield mock_server
+    vars(mock_server.faults).update(faults)
+    mock_server.exchange.clock_skew_ms = 0
+    mock_server.exchange.reset()
+
+
+@pytest.fixture
+def client(mock):
+    import binance_webhook_server as server
+    return server.GatedClient('test', 'test', testnet=True)
+
+
+@pytest.fixture
+def trader(mock):
+    """BinanceTrader gegen den Stand-in, mit verbundenem User-Data-Stream"""
+    import binance_webhook_server as server
+    instance = server.BinanceTrader()
+    deadline = time.monotonic() + 5
+    while not (instance.user_stream.connected and instance.account_book.loaded):
+        assert time.monotonic() < deadline, 'user-data stream did not connect'
+        time.sleep(0.02)
+    yield instance
+    instance.close()
@@ -0,0 +1,104 @@
+import time
+from decimal import Decimal
+
+import binance_webhook_server as server
+
+
+def account_update(symbol, amount, transaction_time):
+    return {'e': 'ACCOUNT_UPDATE', 'T': transaction_time, 'a': {
+        'B': [], 'P': [{'s': symbol, 'pa': str(amount), 'ep': '100', 'up': '0', 'ps': 'BOTH'}]
+    }}
+
+
+def test_pending_symbol_waits_for_a_newer_account_update():
+    book = server.AccountBook(None)
+    book.mark_pending('BTCUSDT', 2000)
+    assert not book.is_current('BTCUSDT')
+    assert not book.is_current()
+    assert book.is_current('ETHUSDT')
+
+    book.on_account_update(account_update('BTCUSDT', 1, 1999))  # Fill einer frueheren Order
+    assert not book.is_current('BTCUSDT')
+
+    book.on_account_update(account_update('BTCUSDT', 0, 2001))
+    assert book.is_current('BTCUSDT')
+    assert book.positions('BTCUSDT') == []
+
+
+def test_pending_mark_expires(monkeypatch):
+    book = server.AccountBook(None)
+    book.mark_pending('BTCUSDT', 2000)
+    monkeypatch.setattr(server, 'ACCOUNT_PENDING_MAX_SECONDS', 0)
+    time.sleep(0.01)
+    assert book.is_current('BTCUSDT')
+
+
+def test_reversal_after_own_close_uses_fresh_positions(mock, trader):
+    """LONG fills, CLOSE, then SHORT — with stream events delayed the SHORT must not re-close the long"""
+    mock.faults.stream_delay_ms = 150
+    price = float(mock.exchange.symbols['BTCUSDT']['price'])
+
+    long_result = trader.place_order('LONG', 'BTCUSDT', price, price * 0.99, price * 1.05, 50)
+    assert long_result['entry_order']['status'] == 'FILLED'
+    assert trader.close_position('BTCUSDT')
+    short_result = trader.place_order('SHORT', 'BTCUSDT', price, price * 1.01, price * 0.95, 50)
+    assert short_result['entry_order']['status'] == 'FILLED'
+
+    position = mock.exchange.positions[('BTCUSDT', 'BOTH')]
+    assert position['amount'] == -Decimal(short_result['entry_order']['origQty'])
+
+
+def snapshot(available='1000'):
+    return {
+        'totalWalletBalance': '1000', 'availableBalance': available,
+        'assets': [{'asset': 'USDT', 'walletBalance': '1000'}],
+        'positions': [{'symbol': 'BTCUSDT', 'positionAmt': '0', 'entryPrice': '0', 'unrealizedProfit': '0',
+                       'leverage': '10'}]
+    }
+
+
+def order_update(order_id, status, filled='0'):
+    return {'e': 'ORDER_TRADE_UPDATE', 'o': {
+        's': 'BTCUSDT', 'i': order_id, 'o': 'LIMIT', 'X': status, 'q': '2', 'z': filled, 'p': '100', 'R': False
+    }}
+
+
+def test_open_limit_orders_reserve_margin():
+    book = server.AccountBook(None)
+    book.apply_snapshot(snapshot())
+    assert book.balances()['available'] == 1000
+
+    book.on_order_update(order_update(1, 'NEW'))
+    assert book.balances()['available'] == 980  # 2 x 100 / Leverage 10
+    book.on_order_update(order_update(1, 'PARTIALLY_FILLED', filled='1'))
+    assert book.balances()['available'] == 990
+    book.on_order_update(order_update(1, 'FILLED', filled='2'))
+    assert book.balances()['available'] == 1000
+
+    # Die REST-Antwort der Order kommt nach dem FILLED-Event — nicht erneut buchen
+    book.track_orders([{'symbol': 'BTCUSDT', 'orderId': 1, 'type': 'LIMIT', 'status': 'NEW', 'origQty': '2',
+                        'executedQty': '0', 'price': '100', 'reduceOnly': False, 'closePosition': False}])
+    assert book.balances()['available'] == 1000
+
+
+def test_open_orders_at_startup_are_not_counted_twice():
+    book = server.AccountBook(None)
+    book.track_orders([{'symbol': 'BTCUSDT', 'orderId': 1, 'type': 'LIMIT', 'status': 'NEW', 'origQty': '2',
+                        'executedQty': '0', 'price': '100', 'reduceOnly': False, 'closePosition': False}])
+    book.apply_snapshot(snapshot(available='980'))  # Binance zieht die Order-Margin schon ab
+    assert book.balances()['available'] == 980
+    book.on_order_update(order_update(1, 'CANCELED'))
+    assert book.balances()['available'] == 1000
+
+
+def test_unrealized_pnl_follows_the_mark_price():
+    prices = {}
+    book = server.AccountBook(None, mark_price=prices.get)
+    book.apply_snapshot(snapshot())
+    book.on_account_update(account_update('BTCUSDT', 1, 1))  # Entry 100, uPnL 0, Margin 10
+    assert book.balances()['available'] == 990
+
+    prices['BTCUSDT'] = 80.0
+    [position] = book.positions('BTCUSDT')
+    assert position['unRealizedProfit'] == -20
+    assert book.balances()['available'] == 970
@@ -0,0 +1,39 @@
+import asyncio
+
+import binance_webhook_server_async as async_server
+
+
+def test_symbol_locks_serialize_per_symbol_and_drop_idle_locks():
+    locks = async_server.SymbolLocks()
+    order, depths = [], []
+
+    async def signal(symbol, name, hold=0.01):
+        async with locks.hold(symbol):
+            order.append(name)
+            await asyncio.sleep(hold)
+            if symbol == 'BTCUSDT':
+                depths.append(locks.queue_depths()['BTCUSDT'])
+
+    async def main():
+        await asyncio.gather(signal('BTCUSDT', 'a'), signal('BTCUSDT', 'b'), signal('ETHUSDT', 'c'), signal('BTCUSDT', 'd'))
+
+    asyncio.run(main())
+
+    assert [name for name in order if name != 'c'] == ['a', 'b', 'd']
+    assert depths == [2, 1, 0]
+    assert len(locks) == 0
+
+
+def test_symbol_lock_released_when_waiter_is_cancelled():
+    locks = async_server.SymbolLocks()
+
+    async def main():
+        async with locks.hold('BTCUSDT'):
+            waiter = asyncio.ensure_future(locks.hold('BTCUSDT').__aenter__())
+            await asyncio.sleep(0)
+            assert locks.queue_depths() == {'BTCUSDT': 1}
+            waiter.cancel()
+            await asyncio.sleep(0)
+        assert len(locks) == 0
+
+    asyncio.run(main())
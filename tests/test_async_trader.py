@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+import binance_webhook_server as server
+import binance_webhook_server_async as async_server
+
+
+def run_with_trader(test):
+    """AsyncBinanceTrader gegen den Stand-in starten, `test(trader)` ausfuehren, wieder schliessen"""
+    async def main():
+        trader = async_server.AsyncBinanceTrader()
+        await trader.start()
+        try:
+            deadline = time.monotonic() + 5
+            while not trader._account_book_is_live():
+                assert time.monotonic() < deadline, 'user-data stream did not connect'
+                await asyncio.sleep(0.02)
+            return await test(trader)
+        finally:
+            await trader.close()
+
+    return asyncio.run(main())
+
+
+def test_async_sizing_matches_the_sync_trader(trader, mock):
+    price = trader.get_current_price('BTCUSDT')
+    entry, sl = price * 0.97, price * 0.9
+    expected = trader.calculate_position_size('BTCUSDT', entry, sl, 100)
+
+    async def place(async_trader):
+        return await async_trader.place_order('LONG', 'BTCUSDT', entry, sl, price * 1.1, 100)
+
+    result = run_with_trader(place)
+
+    assert result['position_size'] == expected
+    assert result['entry_order']['origQty'] == format(server._to_decimal(expected), 'f')
+
+
+@pytest.mark.parametrize('batch', [True, False])
+def test_async_reversal_closes_before_the_entry_is_sent(mock, monkeypatch, batch):
+    monkeypatch.setattr(async_server, 'USE_BATCH_ORDERS', batch)
+    monkeypatch.setattr(server, 'PLACE_PROTECTIVE_ORDERS', True)
+    monkeypatch.setattr(server, 'REVERSAL_MODE', 'close_then_open')
+    calls = []
+
+    async def reverse(trader):
+        price = await trader.get_current_price('BTCUSDT')
+        await trader.place_order('LONG', 'BTCUSDT', price * 1.01, price * 0.9, price * 1.1, 100)
+        create, batch_order = trader.client.futures_create_order, trader.client.futures_place_batch_order
+
+        async def slow_create(**params):
+            calls.append(('send', params['type']))
+            if params['type'] == 'MARKET':
+                await asyncio.sleep(0.1)  # ein langsamer Close darf den Entry nicht ueberholen lassen
+            result = await create(**params)
+            calls.append(('done', params['type']))
+            return result
+
+        async def record_batch(batchOrders):
+            calls.append(('send', 'batch'))
+            return await batch_order(batchOrders=batchOrders)
+
+        trader.client.futures_create_order = slow_create
+        trader.client.futures_place_batch_order = record_batch
+        return await trader.place_order('SHORT', 'BTCUSDT', price * 0.99, price * 1.1, price * 0.9, 100)
+
+    result = run_with_trader(reverse)
+
+    assert result['entry_order']['status'] == 'FILLED'
+    assert calls[:2] == [('send', 'MARKET'), ('done', 'MARKET')]
+    assert mock.exchange.positions[('BTCUSDT', 'BOTH')]['amount'] < 0
+    # Nur die SL/TP der neuen Short-Position bleiben offen
+    assert {o['side'] for o in mock.exchange.open_orders('BTCUSDT')} == {'BUY'}
+
+
+def test_async_close_cancels_sl_and_tp(mock, monkeypatch):
+    monkeypatch.setattr(server, 'PLACE_PROTECTIVE_ORDERS', True)
+
+    async def close(trader):
+        price = await trader.get_current_price('BTCUSDT')
+        result = await trader.place_order('LONG', 'BTCUSDT', price * 1.01, price * 0.9, price * 1.1, 100)
+        assert len(mock.exchange.open_orders('BTCUSDT')) == 2
+        await trader.close_position('BTCUSDT')
+        return result
+
+    run_with_trader(close)
+
+    assert mock.exchange.open_orders('BTCUSDT') == []
+    assert ('BTCUSDT', 'BOTH') not in mock.exchange.positions
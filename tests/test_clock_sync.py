@@ -0,0 +1,35 @@
+import types
+
+import binance_webhook_server as server
+
+
+def test_sample_refers_server_time_to_the_middle_of_the_round_trip():
+    offset_ms, rtt_ms = server.ClockSync.sample(1000.000, 1_000_250, 1000.100)
+    assert round(rtt_ms, 6) == 100
+    assert round(offset_ms, 6) == 200
+
+
+def test_apply_uses_the_lowest_rtt_sample():
+    clock, client = server.ClockSync(), types.SimpleNamespace(timestamp_offset=0)
+    clock.apply(client, [(900.0, 400.0), (-120.4, 12.0), (300.0, 80.0)])
+    assert clock.offset_ms == client.timestamp_offset == -120
+    assert clock.rtt_ms == 12.0 and clock.syncs == 1
+
+
+def test_recv_window_follows_signed_request_latency_within_bounds():
+    clock = server.ClockSync()
+    assert clock.tune_recv_window() == server.RECV_WINDOW_MIN_MS
+    for _ in range(100):
+        clock.observe(2.5)
+    assert clock.tune_recv_window() == 7500
+    clock.observe(60)
+    for _ in range(10):
+        clock.observe(60)
+    assert clock.tune_recv_window() == server.RECV_WINDOW_MAX_MS
+
+
+def test_sync_clock_measures_the_mock_skew(client, mock):
+    mock.exchange.clock_skew_ms = 3000
+    client.sync_clock()
+    assert abs(client.clock.offset_ms - 3000) < 50
+    assert client.timestamp_offset == client.clock.offset_ms
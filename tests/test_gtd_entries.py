@@ -0,0 +1,61 @@
+import time
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+import binance_webhook_server as server
+
+
+def test_good_till_date_clears_the_minimum_after_the_latest_arrival():
+    now = 1_700_000_000_500
+    good_till_date = server.good_till_date_ms(now, server.GTD_MIN_SECONDS, 5000)
+    assert good_till_date % 1000 == 0
+    assert good_till_date >= now + 5000 + (server.GTD_MIN_SECONDS + server.GTD_MARGIN_SECONDS) * 1000
+
+    # Laengere Timeouts bleiben unveraendert (nur auf Sekunden aufgerundet)
+    assert server.good_till_date_ms(now, 3600, 5000) == now - 500 + 3601 * 1000
+
+
+def test_mock_enforces_the_600s_rule(client, mock):
+    price = mock.exchange.symbols['BTCUSDT']['price'] * 9 / 10
+    params = {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'quantity': '0.010',
+              'price': format(price, 'f'), 'timeInForce': 'GTD'}
+
+    # Auf Sekunden abgeschnitten bleibt davon genau now + 600s — zu frueh
+    too_early = mock.exchange.now_ms() // 1000 * 1000 + 600999
+    with pytest.raises(BinanceAPIException) as error:
+        client.futures_create_order(goodTillDate=too_early, **params)
+    assert error.value.code == -5040
+
+    client.sync_clock()
+    good_till_date = server.good_till_date_ms(server.exchange_time_ms(client), 600, client.clock.recv_window_ms)
+    order = client.futures_create_order(goodTillDate=good_till_date, **params)
+    assert order['status'] == 'NEW'
+
+
+def test_gtd_entry_is_accepted_with_clock_skew(trader, mock, monkeypatch):
+    mock.exchange.clock_skew_ms = 3000
+    trader.client.sync_clock()
+    monkeypatch.setattr(server, 'ENTRY_FILL_TIMEOUT_SECONDS', 601)
+    trader.entry_time_in_force = 'GTD'
+    price = float(trader.get_current_price('BTCUSDT'))
+
+    result = trader.place_order('LONG', 'BTCUSDT', price * 0.97, price * 0.9, price * 1.1, 100)
+
+    entry = result['entry_order']
+    assert entry['timeInForce'] == 'GTD' and entry['status'] == 'NEW'
+    assert entry['goodTillDate'] % 1000 == 0
+    assert entry['goodTillDate'] > mock.exchange.now_ms() + server.GTD_MIN_SECONDS * 1000
+    # Der Beobachter wartet bis zum tatsaechlichen Ablauf, nicht nur die konfigurierten 601s
+    [call] = [c for _, _, c in trader.scheduler._heap if c.callback == trader._on_entry_timeout and not c.cancelled]
+    assert call.deadline - time.monotonic() > 601 + server.GTD_OBSERVE_GRACE_SECONDS
+
+
+def test_gtd_needs_more_than_the_minimum(mock, monkeypatch):
+    monkeypatch.setattr(server, 'ENTRY_TIME_IN_FORCE', 'GTD')
+    monkeypatch.setattr(server, 'ENTRY_FILL_TIMEOUT_SECONDS', server.GTD_MIN_SECONDS)
+    trader = server.BinanceTrader()
+    try:
+        assert trader.entry_time_in_force == 'GTC'
+    finally:
+        trader.close()
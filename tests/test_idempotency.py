@@ -0,0 +1,123 @@
+import asyncio
+import time
+from concurrent.futures import Future
+
+import binance_webhook_server as server
+import binance_webhook_server_async as async_server
+
+
+def test_failed_attempt_marks_the_retry():
+    cache = server.IdempotencyCache()
+    entry, is_new = cache.begin('k')
+    assert is_new and entry['retry_since'] is None
+    first_attempt = entry['created_at']
+    cache.complete('k', {'error': 'boom'}, 500)
+
+    retry, is_new = cache.begin('k')
+    assert is_new and retry['retry_since'] == first_attempt
+    cache.discard('k')
+
+    # Auch nach mehreren Fehlschlaegen zaehlt der erste Versuch
+    retry, _ = cache.begin('k')
+    assert retry['retry_since'] == first_attempt
+    cache.complete('k', {'status': 'success'}, 200)
+    cache._entries.clear()
+    fresh, _ = cache.begin('k')
+    assert fresh['retry_since'] is None
+
+
+def test_raised_execution_is_not_handed_to_duplicates():
+    key = 'raised'
+    entry, _ = server.dedup_cache.begin(key)
+    duplicate, _ = server.dedup_cache.begin(key)
+    future = Future()
+    future.set_exception(RuntimeError('connection reset'))
+
+    outcome, raised = server.signal_outcome(future)
+    payload, status = server.finish_signal(key, 'sid', False, {}, outcome, time.time(), time.perf_counter(), None, raised)
+
+    assert raised and status == 500 and payload['error'] == 'connection reset'
+    assert server.dedup_cache.wait(duplicate, timeout=0) is None
+    retry, is_new = server.dedup_cache.begin(key)
+    assert is_new and retry['retry_since'] == entry['created_at']
+    server.dedup_cache.discard(key)
+
+
+def test_retry_does_not_resend_orders_of_an_earlier_attempt(trader, monkeypatch):
+    monkeypatch.setattr(server, 'trader', trader)
+    price = float(trader.get_current_price('BTCUSDT'))
+    client_id = 'tv-' + 'a' * 24
+    data = {'signal': 'LONG', 'symbol': 'BTCUSDT'}
+    since = time.time()
+
+    assert server.check_earlier_attempt(data, client_id, since) is None
+    result = trader.place_order('LONG', 'BTCUSDT', price * 0.9, price * 0.8, price * 1.2, 100, client_id)
+    assert result
+
+    payload, status = server.check_earlier_attempt(data, client_id, since)
+    assert status == 200 and payload['status'] == 'already_placed'
+    assert payload['order_ids']['entry'] == result['entry_order']['orderId']
+
+
+def test_async_duplicate_waits_for_the_original_without_polling():
+    async def main():
+        cache = async_server.AsyncIdempotencyCache()
+        entry, _ = cache.begin('k')
+        duplicate, is_new = cache.begin('k')
+        assert not is_new
+        waiter = asyncio.ensure_future(cache.wait(duplicate, timeout=5))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        cache.complete('k', {'status': 'success'}, 200)
+        assert await asyncio.wait_for(waiter, 0.1) == ({'status': 'success'}, 200)
+        assert await cache.wait(duplicate, timeout=0) == ({'status': 'success'}, 200)
+
+    asyncio.run(main())
+
+
+def test_content_dedup_only_catches_retries():
+    cache = server.IdempotencyCache(content_ttl_seconds=5)
+    close = {'signal': 'CLOSE_LONG', 'symbol': 'BTCUSDT'}
+    entry = {'signal': 'LONG', 'symbol': 'BTCUSDT', 'entry': 100}
+    assert cache.ttl_for(close) == 0
+    assert cache.ttl_for(entry) == 5
+    assert cache.ttl_for(dict(close, alert_id='a1')) == cache.ttl_seconds
+
+    key = cache.key_for(close)
+    first, first_new = cache.begin(key, cache.ttl_for(close))
+    second, second_new = cache.begin(key, cache.ttl_for(close))
+    assert first_new and second_new and first['client_id'] != second['client_id']
+    cache.complete(key, {'status': 'success'}, 200)
+
+    key = cache.key_for(entry)
+    original, _ = cache.begin(key, 5)
+    retry, is_new = cache.begin(key, 5)
+    assert not is_new and retry is original
+    original['created_at'] -= 6
+    later, is_new = cache.begin(key, 5)
+    assert is_new and later['client_id'] != original['client_id']
+
+
+def test_repeated_close_is_not_suppressed(trader, mock, monkeypatch):
+    monkeypatch.setattr(server, 'trader', trader)
+    monkeypatch.setattr(server.trader_init, 'state', 'ready')
+    monkeypatch.setattr(server.dedup_cache, 'content_ttl_seconds', 0.2)
+    http = server.app.test_client()
+    price = float(trader.get_current_price('BTCUSDT'))
+    # 1 % ueber dem Preis bleibt der LIMIT-Entry marketable, auch wenn der Random Walk dazwischen tickt
+    long = {'secret': 'test', 'signal': 'LONG', 'symbol': 'BTCUSDT', 'entry': price * 1.01,
+            'sl': price * 0.98, 'tp': price * 1.02, 'risk_usd': 50}
+    close = {'secret': 'test', 'signal': 'CLOSE_LONG', 'symbol': 'BTCUSDT'}
+
+    def position():
+        pos = mock.exchange.positions.get(('BTCUSDT', 'BOTH'))
+        return pos['amount'] if pos else 0
+
+    for _ in range(2):
+        time.sleep(0.3)  # gleichlautender Entry nach dem Retry-Fenster ist ein neues Signal
+        response = http.post('/webhook', json=long)
+        assert response.status_code == 200 and not response.get_json().get('duplicate')
+        assert position() > 0
+        response = http.post('/webhook', json=close)
+        assert response.status_code == 200 and not response.get_json().get('duplicate')
+        assert position() == 0
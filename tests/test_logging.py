@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import os, sys, time
+sys.modules.setdefault('gunicorn', type(sys)('gunicorn'))  # wie unter gunicorn --preload importiert
+import binance_webhook_server as server
+server.logger.warning('master')
+pid = os.fork()
+if pid == 0:
+    server.logger.warning('worker')
+    server.log_listener.stop()
+    os._exit(0)
+os.waitpid(pid, 0)
+server.log_listener.stop()
+print(pid)
+"""
+
+
+def test_each_gunicorn_worker_logs_to_its_own_file(tmp_path):
+    env = dict(os.environ, LOG_FILE=str(tmp_path / 'bot.log'))
+    worker_pid = subprocess.run(
+        [sys.executable, '-c', WORKER], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout.split()[-1]
+
+    files = {name: (tmp_path / name).read_text() for name in os.listdir(tmp_path)}
+    assert 'worker' in files[f'bot.{worker_pid}.log']
+    assert 'master' not in files[f'bot.{worker_pid}.log']
+    assert sum('worker' in text for text in files.values()) == 1
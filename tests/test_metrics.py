@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import binance_webhook_server as server
+server.CACHE_REQUESTS.labels('dedup', 'hit').inc()
+server.OrderTracker().track('BTCUSDT', 1, lambda *args: None)
+"""
+
+
+def test_metrics_aggregate_worker_processes(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path / 'metrics'), LOG_FILE=str(tmp_path / 'bot.log'))
+    os.mkdir(env['PROMETHEUS_MULTIPROC_DIR'])
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', WORKER], cwd=ROOT, env=env, check=True)
+
+    scrape = subprocess.run(
+        [sys.executable, '-c', 'import binance_webhook_server as s; print(s.render_metrics().decode())'],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    assert 'cache_requests_total{cache="dedup",result="hit"} 2.0' in scrape
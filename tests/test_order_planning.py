@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+import pytest
+
+import binance_mock_server
+import binance_webhook_server as server
+
+
+@pytest.fixture(scope='module')
+def rules():
+    info = binance_mock_server.MockExchange().exchange_info()
+    return {s['symbol']: server.SymbolRules(s) for s in info['symbols']}
+
+
+def position(amount, side='BOTH'):
+    return {'symbol': 'BTCUSDT', 'positionAmt': str(amount), 'positionSide': side}
+
+
+def plan(signal, positions, quantity, rules, **kwargs):
+    return server.plan_entry_orders(
+        signal, 'BTCUSDT', positions, Decimal(quantity), Decimal('65000'), rules['BTCUSDT'],
+        hedge_mode=kwargs.pop('hedge_mode', False), **kwargs
+    )
+
+
+def test_flat_account_places_a_single_limit_entry(rules):
+    [(role, params)] = plan('LONG', [], '0.010', rules)
+    assert role == 'entry'
+    assert params == {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'quantity': '0.010',
+                      'price': '65000', 'timeInForce': 'GTC'}
+
+
+def test_close_then_open_close_leg_is_reduce_only(rules):
+    orders = plan('SHORT', [position('0.025')], '0.010', rules, reversal_mode='close_then_open')
+    assert [role for role, _ in orders] == ['close', 'entry']
+    close = orders[0][1]
+    assert (close['side'], close['type'], close['quantity'], close['reduceOnly']) == ('SELL', 'MARKET', '0.025', 'true')
+
+
+def test_net_mode_reversal_keeps_the_limit_entry(rules):
+    orders = plan('SHORT', [position('0.025')], '0.010', rules, reversal_mode='net', good_till_date=1_700_000_000_000)
+    assert [role for role, _ in orders] == ['close', 'entry']
+    close, entry = orders[0][1], orders[1][1]
+    assert (close['side'], close['type'], close['quantity'], close['reduceOnly']) == ('SELL', 'MARKET', '0.025', 'true')
+    # Der neue Entry wartet wie jeder andere am Signal-Preis, mit Ablauf
+    assert (entry['side'], entry['type'], entry['quantity'], entry['price']) == ('SELL', 'LIMIT', '0.010', '65000')
+    assert (entry['timeInForce'], entry['goodTillDate']) == ('GTD', 1_700_000_000_000)
+
+
+def test_net_mode_adjusts_same_direction_position_by_the_difference(rules):
+    [(role, params)] = plan('LONG', [position('0.004')], '0.010', rules, reversal_mode='net')
+    assert (role, params['type'], params['quantity']) == ('entry', 'LIMIT', '0.006')
+
+    [(role, params)] = plan('LONG', [position('0.015')], '0.010', rules, reversal_mode='net')
+    assert (role, params['side'], params['quantity'], params['reduceOnly']) == ('reduce', 'SELL', '0.005', 'true')
+
+
+@pytest.mark.parametrize('held', ['0.0104', '0.0096'])
+def test_net_mode_delta_below_one_step_is_already_at_target(rules, held):
+    assert plan('LONG', [position(held)], '0.010', rules, reversal_mode='net') == []
+
+
+def test_hedge_mode_closes_the_opposite_leg_by_position_side(rules):
+    orders = plan('LONG', [position('-0.020', 'SHORT')], '0.010', rules, reversal_mode='net', hedge_mode=True)
+    assert [(role, p['side'], p['positionSide']) for role, p in orders] == [('close', 'BUY', 'SHORT'), ('entry', 'BUY', 'LONG')]
+    assert all('reduceOnly' not in p for _, p in orders)  # Hedge-Modus: positionSide statt reduceOnly
+
+
+def test_position_legs_are_sent_ahead_of_the_batch(rules):
+    orders = plan('SHORT', [position('0.025')], '0.010', rules) + server.plan_protective_orders(
+        'SHORT', 'BTCUSDT', 70000, 60000, rules['BTCUSDT'], hedge_mode=False
+    )
+    leading, rest = server.split_position_legs(orders)
+    assert [role for role, _ in leading] == ['close']
+    assert [role for role, _ in rest] == ['entry', 'sl', 'tp']
+
+
+def test_position_size_is_capped_by_margin_and_lifted_to_min_notional(rules):
+    btc = rules['BTCUSDT']
+    # 100 USD Risiko bei 1000 USD Abstand = 0.1 BTC; 500 USD Balance * 20 * 0.95 reichen nur fuer 0.146
+    assert server.position_size_for_risk(65000, 64000, 100, 500, btc) == Decimal('0.100')
+    assert server.position_size_for_risk(65000, 64900, 100, 500, btc) == btc.normalize_quantity(500 * 20 * 0.95 / 65000)
+    assert server.position_size_for_risk(65000, 60000, 0.01, 500, btc) == btc.min_quantity_for_notional(65000)
+    assert server.position_size_for_risk(65000, 65000, 100, 500, btc) is None
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+import binance_webhook_server as server
+
+CLIENT_ID = 'tv-' + 'b' * 24
+
+
+def order(order_id, role_code=None, status='NEW', executed='0', client_id=CLIENT_ID, **extra):
+    return dict({
+        'symbol': 'BTCUSDT', 'orderId': order_id, 'status': status, 'executedQty': executed, 'side': 'BUY',
+        'type': 'LIMIT', 'origQty': '0.010', 'price': '60000', 'time': time.time() * 1000,
+        'clientOrderId': f'{client_id}-{role_code}' if role_code else 'web_manual'
+    }, **extra)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = server.OrderStore(str(tmp_path / 'orders.db'))
+    yield store
+    store.close()
+
+
+def statuses(store):
+    with store._lock:
+        return {row['order_id']: row['status'] for row in store._db.execute('SELECT order_id, status FROM orders')}
+
+
+def test_open_entry_is_watched_again_with_its_remaining_time(store):
+    store.record('BTCUSDT', {'entry': order(1), 'sl': order(2), 'tp': order(3)}, timeout_seconds=600,
+                 created_at=time.time() - 100)
+
+    watches, lookups = server.reconcile_stored_orders(
+        store, [order(1, status='PARTIALLY_FILLED', executed='0.004'), order(2), order(3)], 600
+    )
+
+    [(symbol, order_id, status, filled, timeout, protective, expiry, remaining)] = watches
+    assert (symbol, order_id, status, filled, timeout) == ('BTCUSDT', 1, 'PARTIALLY_FILLED', 0.004, 600)
+    assert sorted(protective) == [2, 3] and not expiry
+    assert 495 < remaining <= 500
+    assert lookups == []
+
+
+def test_vanished_orders_are_closed_unless_their_protection_is_still_open(store):
+    store.record('BTCUSDT', {'entry': order(1), 'sl': order(2), 'tp': order(3)}, timeout_seconds=600)
+    store.record('ETHUSDT', {'entry': dict(order(4), symbol='ETHUSDT')}, timeout_seconds=600)
+
+    watches, lookups = server.reconcile_stored_orders(store, [order(2), order(3)], 600)
+
+    assert lookups == [('BTCUSDT', 1, [2, 3])]
+    assert statuses(store)[4] == server.ORDER_CLOSED_UNOBSERVED
+    assert statuses(store)[1] == 'NEW'  # End-Status erst per Lookup
+
+
+def test_bot_orders_placed_but_never_stored_are_adopted(store):
+    entry = order(7, 'e0', timeInForce='GTD')
+    entry['goodTillDate'] = int(entry['time']) + 612000
+    live = [entry, order(8, 's1'), order(9, 't2'), order(10)]
+
+    watches, _ = server.reconcile_stored_orders(store, live, 600)
+
+    [(_, order_id, _, _, timeout, protective, expiry, _)] = watches
+    # Ablauf zum goodTillDate der Order, nicht nach dem konfigurierten Timeout
+    assert order_id == 7 and expiry and 611 < timeout <= 612
+    assert sorted(protective) == [8, 9]
+    assert 10 not in statuses(store)  # manuelle Order bleibt unberuehrt
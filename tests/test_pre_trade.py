@@ -0,0 +1,33 @@
+import pytest
+
+
+def fail(*args):
+    raise ConnectionError('lookup failed')
+
+
+def test_failed_stage_is_reported_next_to_the_others(trader, monkeypatch):
+    monkeypatch.setattr(trader, 'get_positions', fail)
+
+    results, errors, timings = trader.pre_trade('BTCUSDT')
+
+    assert set(errors) == {'positions'} and isinstance(errors['positions'], ConnectionError)
+    assert results['price'] > 0 and results['balance'] > 0 and results['rules'] is not None
+    assert set(timings) == {'price', 'balance', 'rules', 'positions'}
+
+
+def test_entry_goes_ahead_without_positions(trader, mock, monkeypatch):
+    monkeypatch.setattr(trader, 'get_positions', fail)
+    price = trader.get_current_price('BTCUSDT')
+
+    result = trader.place_order('LONG', 'BTCUSDT', price * 0.97, price * 0.9, price * 1.1, 100)
+
+    assert result['entry_order']['status'] == 'NEW'
+
+
+@pytest.mark.parametrize('stage', ['get_current_price', 'get_available_balance'])
+def test_entry_is_skipped_when_a_required_stage_fails(trader, mock, monkeypatch, stage):
+    price = trader.get_current_price('BTCUSDT')
+    monkeypatch.setattr(trader, stage, fail)
+
+    assert trader.place_order('LONG', 'BTCUSDT', price * 0.97, price * 0.9, price * 1.1, 100) is None
+    assert mock.exchange.open_orders('BTCUSDT') == []
@@ -0,0 +1,94 @@
+import time
+from decimal import Decimal
+
+import pytest
+
+import binance_webhook_server as server
+
+
+@pytest.fixture
+def protective(monkeypatch):
+    monkeypatch.setattr(server, 'PLACE_PROTECTIVE_ORDERS', True)
+    monkeypatch.setattr(server, 'REVERSAL_MODE', 'close_then_open')
+
+
+def open_orders(mock, symbol='BTCUSDT'):
+    return {o['orderId']: o for o in mock.exchange.open_orders(symbol)}
+
+
+def wait_for(condition, timeout=3):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not met in time'
+        time.sleep(0.02)
+
+
+def enter(trader, signal, price):
+    """Marketable LIMIT-Entry (sofort gefuellt) mit SL/TP 10 % neben dem Preis"""
+    direction = 1 if signal == 'LONG' else -1
+    result = trader.place_order(
+        signal, 'BTCUSDT', price * (1 + direction * 0.01),
+        price * (1 - direction * 0.1), price * (1 + direction * 0.1), 100
+    )
+    assert result['entry_order']['status'] == 'FILLED'
+    return result
+
+
+def test_close_cancels_the_positions_sl_and_tp(trader, mock, protective):
+    result = enter(trader, 'LONG', trader.get_current_price('BTCUSDT'))
+    assert set(open_orders(mock)) == {result['sl_order']['orderId'], result['tp_order']['orderId']}
+
+    trader.close_position('BTCUSDT')
+    assert open_orders(mock) == {}
+
+
+def test_reversal_keeps_only_the_new_sl_and_tp(trader, mock, protective):
+    price = trader.get_current_price('BTCUSDT')
+    enter(trader, 'LONG', price)
+
+    result = enter(trader, 'SHORT', price)
+    assert mock.exchange.positions[('BTCUSDT', 'BOTH')]['amount'] < 0
+    assert set(open_orders(mock)) == {result['sl_order']['orderId'], result['tp_order']['orderId']}
+
+
+def test_filled_take_profit_cancels_the_stop_loss(trader, mock, protective):
+    price = trader.get_current_price('BTCUSDT')
+    result = enter(trader, 'LONG', price)
+
+    mock.exchange.set_price('BTCUSDT', Decimal(str(price)) * Decimal('1.2'))
+    assert mock.exchange.orders[result['tp_order']['orderId']]['status'] == 'FILLED'
+    sl_id = result['sl_order']['orderId']
+    wait_for(lambda: mock.exchange.orders[sl_id]['status'] == 'CANCELED')
+    assert trader._protective_pairs == {}
+
+
+def test_execute_plan_reports_rejected_legs_of_a_batch(trader, mock):
+    btc = mock.exchange.symbols['BTCUSDT']
+    price = btc['price']
+    # 0.9 * Preis liegt nicht immer auf dem Tick-Raster
+    limit = format((price * Decimal('0.9') / btc['tick']).quantize(Decimal(1)) * btc['tick'], 'f')
+    plan = [
+        ('entry', {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'quantity': '0.010',
+                   'price': limit, 'timeInForce': 'GTC'}),
+        ('sl', {'symbol': 'BTCUSDT', 'side': 'SELL', 'type': 'STOP_MARKET', 'closePosition': 'true'}),
+        ('tp', {'symbol': 'BTCUSDT', 'side': 'SELL', 'type': 'TAKE_PROFIT_MARKET', 'closePosition': 'true',
+                'stopPrice': format(price * Decimal('1.1'), 'f')}),
+    ]
+
+    orders, failures = trader.execute_plan(plan)
+
+    assert set(orders) == {'entry', 'tp'} and set(failures) == {'sl'}
+    assert isinstance(failures['sl'], server.OrderRejected) and failures['sl'].code == -1102
+    assert set(open_orders(mock)) == {orders['entry']['orderId'], orders['tp']['orderId']}
+
+
+def test_rejected_entry_in_a_batch_leaves_no_sl_or_tp(trader, mock, protective, monkeypatch):
+    # Ein GTD knapp unter der 600s-Grenze — nur der Entry der Batch wird abgelehnt
+    trader.entry_time_in_force = 'GTD'
+    monkeypatch.setattr(server, 'good_till_date_ms', lambda now, timeout, recv_window: now + 60_000)
+    price = trader.get_current_price('BTCUSDT')
+
+    result = trader.place_order('LONG', 'BTCUSDT', price * 0.97, price * 0.9, price * 1.1, 100)
+
+    assert result is None
+    wait_for(lambda: open_orders(mock) == {})
@@ -0,0 +1,54 @@
+from urllib.parse import urlencode
+
+import pytest
+
+import binance_webhook_server as server
+
+ORDERS = [
+    {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'quantity': '0.010', 'price': '50000', 'timeInForce': 'GTC'},
+    {'symbol': 'BTCUSDT', 'side': 'SELL', 'type': 'LIMIT', 'quantity': '0.010', 'price': '90000', 'timeInForce': 'GTC'},
+]
+
+
+def encoded_batch(orders):
+    """batchOrders as python-binance's futures_place_batch_order sends it"""
+    return urlencode({'batchOrders': orders})[12:].replace('%27', '%22')
+
+
+def test_costs_count_every_order_of_an_encoded_batch():
+    priority, costs = server.RateLimitGate.costs('post', 'batchOrders', {'batchOrders': encoded_batch(ORDERS)})
+    assert priority == server.PRIORITY_HIGH
+    assert costs == [(('weight', 60), 5), (('orders', 10), 2), (('orders', 60), 2)]
+
+
+def test_costs_of_reads_depend_on_their_parameters():
+    assert server.RateLimitGate.costs('get', 'openOrders', {})[1] == [(('weight', 60), 40)]
+    assert server.RateLimitGate.costs('get', 'openOrders', {'symbol': 'BTCUSDT'})[1] == [(('weight', 60), 1)]
+    with server.request_priority(server.PRIORITY_LOW):
+        assert server.RateLimitGate.costs('get', 'account')[0] == server.PRIORITY_LOW
+
+
+def test_low_priority_is_shed_before_orders_run_out_of_headroom():
+    gate = server.RateLimitGate(weight_1m=100, max_delay=0)
+    with server.request_priority(server.PRIORITY_LOW):
+        for _ in range(70):
+            assert gate.reserve('get', 'exchangeInfo') == 0
+        with pytest.raises(server.RateLimitExceeded):
+            gate.reserve('get', 'exchangeInfo')
+    assert gate.reserve('get', 'exchangeInfo') == 0
+
+
+def test_rate_limit_response_pauses_all_calls():
+    gate = server.RateLimitGate()
+    gate.observe({'X-MBX-USED-WEIGHT-1M': '2000', 'Retry-After': '30'}, 429)
+    assert gate.snapshot()['usage']['weight_60s']['used'] == 2000
+    with pytest.raises(server.RateLimitExceeded) as shed:
+        gate.reserve('post', 'order')
+    assert 29 < shed.value.retry_after <= 30
+
+
+def test_batch_orders_reach_the_mock_and_are_counted(client):
+    results = client.futures_place_batch_order(batchOrders=ORDERS)
+    assert [r['side'] for r in results] == ['BUY', 'SELL'] and all('orderId' in r for r in results)
+    # Der Stand-in zaehlt auch Orders frueherer Tests — der Header kann hoeher liegen
+    assert client.rate_gate.snapshot()['usage']['orders_10s']['used'] >= 2
@@ -0,0 +1,39 @@
+import replay_webhooks
+
+
+def entry(seq, payload, status=200, calls=()):
+    return {'seq': seq, 'received_at': float(seq), 'payload': payload, 'status': status,
+            'exchange_calls': [dict(call) for call in calls]}
+
+
+def test_match_key_ignores_payload_key_order():
+    a = entry(1, {'signal': 'LONG', 'symbol': 'BTCUSDT', 'entry': 65000})
+    b = entry(2, {'entry': 65000, 'symbol': 'BTCUSDT', 'signal': 'LONG'})
+    assert replay_webhooks.match_key(a) == replay_webhooks.match_key(b)
+    assert replay_webhooks.match_key(a) != replay_webhooks.match_key(entry(3, {**a['payload'], 'entry': 65001}))
+
+
+def test_identical_payloads_pair_by_occurrence():
+    long, close = {'signal': 'LONG', 'symbol': 'BTCUSDT'}, {'signal': 'CLOSE_LONG', 'symbol': 'BTCUSDT'}
+    original = [entry(1, long), entry(2, close), entry(3, long)]
+    # Der Replay laeuft parallel — die Reihenfolge der Aufzeichnung kann abweichen
+    replayed = [entry(11, long, status=409), entry(12, long), entry(13, close)]
+
+    pairs, unmatched = replay_webhooks.compare(original, replayed)
+
+    assert [(o['seq'], r['seq']) for o, r in pairs] == [(1, 11), (2, 13), (3, 12)]
+    assert unmatched == []
+
+
+def test_alerts_missing_from_the_replay_are_unmatched():
+    original = [entry(1, {'signal': 'LONG'}), entry(2, {'signal': 'LONG'}), entry(3, {'signal': 'SHORT'})]
+    pairs, unmatched = replay_webhooks.compare(original, [entry(11, {'signal': 'LONG'})])
+    assert [(o['seq'], r['seq']) for o, r in pairs] == [(1, 11)]
+    assert [e['seq'] for e in unmatched] == [2, 3]
+
+
+def test_recorded_price_prefers_the_ticker_response():
+    ticker = {'method': 'GET', 'path': 'ticker/price', 'body': {'symbol': 'BTCUSDT', 'price': '65012.5'}}
+    payload = {'signal': 'LONG', 'symbol': 'BTCUSDT', 'entry': 64000}
+    assert replay_webhooks.recorded_price(entry(1, payload, calls=[ticker])) == '65012.5'
+    assert replay_webhooks.recorded_price(entry(2, payload)) == 64000
@@ -0,0 +1,86 @@
+import json
+import time
+from urllib.parse import urlencode
+
+import pytest
+from binance.exceptions import BinanceAPIException
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+import binance_webhook_server as server
+
+
+def api_error(status, code=-1001):
+    response = type('Response', (), {'status_code': status, 'text': json.dumps({'code': code, 'msg': 'x'})})()
+    return BinanceAPIException(response, status, response.text)
+
+
+def test_circuit_opens_fails_fast_and_closes_after_a_good_probe():
+    breaker = server.CircuitBreaker(window=10, min_calls=4, failure_ratio=0.5, open_seconds=0.05)
+    for success in (True, False, True, False):
+        breaker.allow()
+        breaker.record(success)
+    assert breaker.state == 'open'
+    with pytest.raises(server.CircuitOpen):
+        breaker.allow()
+
+    time.sleep(0.06)
+    breaker.allow()  # Probe
+    with pytest.raises(server.CircuitOpen):
+        breaker.allow()  # nur ein Probe gleichzeitig
+    breaker.record(True)
+    assert breaker.state == 'closed' and breaker.snapshot()['recent_calls'] == 0
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = server.CircuitBreaker(window=4, min_calls=2, failure_ratio=0.5, open_seconds=0.05)
+    breaker.record(False)
+    breaker.record(False)
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(False)
+    assert breaker.state == 'open' and breaker.opens == 2
+
+
+@pytest.mark.parametrize('method, path, data, kind', [
+    ('get', 'account', {}, 'read'),
+    ('post', 'order', {'newClientOrderId': 'tv-x-e0'}, 'create'),
+    ('post', 'order', {}, None),
+    ('delete', 'order', {'orderId': 1}, None),
+    ('post', 'batchOrders', {'batchOrders': [{'newClientOrderId': 'a'}, {'newClientOrderId': 'b'}]}, 'create'),
+    ('post', 'batchOrders', {'batchOrders': [{'newClientOrderId': 'a'}, {}]}, None),
+])
+def test_retry_kind(method, path, data, kind):
+    if path == 'batchOrders':
+        # wie python-binance: url-kodiertes JSON
+        data = {'batchOrders': urlencode(data)[12:].replace('%27', '%22')}
+    assert server.RequestPolicy.retry_kind(method, path, data) == kind
+
+
+def test_only_transport_errors_and_5xx_are_transient():
+    policy = server.RequestPolicy((RequestsConnectionError,))
+    assert policy.is_transient(RequestsConnectionError())
+    assert policy.is_transient(api_error(503))
+    assert not policy.is_transient(api_error(400, -2019))
+    assert not policy.is_transient(ValueError())
+
+
+def test_hedge_delay_follows_the_endpoint_p95():
+    policy = server.RequestPolicy(())
+    assert policy.hedge_delay('get', 'exchangeInfo') is None
+    assert policy.hedge_delay('get', 'account') == server.HEDGE_DEFAULT_DELAY
+    for i in range(100):
+        policy.observe('get', 'account', (i + 1) / 1000)
+    assert policy.hedge_delay('get', 'account') == pytest.approx(0.096)
+
+
+def test_merge_batch_results_keeps_orders_already_found():
+    found = [{'orderId': 1}, None]
+    resend = [{'code': -4015, 'msg': 'Client order id is not valid'}, {'orderId': 2}]
+    assert server.merge_batch_results(found, resend) == [{'orderId': 1}, {'orderId': 2}]
+
+
+def test_transient_read_errors_are_retried_against_the_mock(client, mock):
+    mock.faults.configure(error_rate=1, error_paths=['exchangeInfo'])
+    with pytest.raises(BinanceAPIException):
+        client.futures_exchange_info()
+    assert client.policy.retries == server.RETRY_MAX_ATTEMPTS - 1
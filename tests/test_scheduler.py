@@ -0,0 +1,30 @@
+import threading
+import time
+
+import binance_webhook_server as server
+
+
+def test_slow_callback_does_not_delay_other_deadlines():
+    scheduler = server.DeadlineScheduler('test-scheduler', workers=2)
+    scheduler.start()
+    release = threading.Event()
+    fired = threading.Event()
+
+    scheduler.schedule(0, release.wait, 5)
+    scheduler.schedule(0.05, fired.set)
+
+    assert fired.wait(1), 'second deadline waited for the blocked callback'
+    release.set()
+
+
+def test_cancelled_call_never_fires():
+    scheduler = server.DeadlineScheduler('test-scheduler')
+    scheduler.start()
+    fired = threading.Event()
+
+    call = scheduler.schedule(0.05, fired.set)
+    scheduler.cancel(call)
+
+    assert scheduler.depth() == 0
+    time.sleep(0.15)
+    assert not fired.is_set()
@@ -0,0 +1,66 @@
+import fcntl
+import json
+import os
+
+import binance_webhook_server as server
+
+
+def accepted(log, key):
+    return log.accept(key, f"tv-{key}", {'signal': 'LONG', 'symbol': 'BTCUSDT', 'secret': 'x'}).result(timeout=5)
+
+
+def test_restart_replays_only_open_signals_and_compacts(tmp_path):
+    base = str(tmp_path / 'wal.jsonl')
+    log = server.SignalLog(base)
+    done, open_id = accepted(log, 'a'), accepted(log, 'b')
+    log.complete(done, 200)
+    log.close()
+
+    log = server.SignalLog(base)
+    assert [r['id'] for r in log.pending()] == [open_id]
+    assert 'secret' not in log.pending()[0]['payload']
+    with open(log.path) as f:
+        assert [json.loads(line)['id'] for line in f] == [open_id]
+    log.close()
+
+
+def test_log_compacts_once_it_grows_past_the_limit(tmp_path):
+    log = server.SignalLog(str(tmp_path / 'wal.jsonl'), compact_bytes=2000)
+    for i in range(20):
+        log.complete(accepted(log, str(i)), 200)
+    last = accepted(log, 'last')
+    log.close()
+    with open(log.path) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) < 40 and {r['id'] for r in lines if r['op'] == 'accept'} >= {last}
+
+
+def test_wal_of_an_exited_worker_is_adopted_once(tmp_path):
+    base = str(tmp_path / 'wal.jsonl')
+    record = {'op': 'accept', 'id': 'dead', 'at': 1.0, 'key': 'k', 'client_id': 'tv-k', 'payload': {}}
+    for pid in (99998, 99999):
+        with open(tmp_path / f'wal.{pid}.jsonl', 'w') as f:
+            f.write(json.dumps(dict(record, id=f'dead-{pid}')) + '\n')
+    # 99999 laeuft noch: sein Lock ist gehalten
+    live = open(tmp_path / 'wal.99999.jsonl.lock', 'a')
+    fcntl.flock(live, fcntl.LOCK_EX)
+
+    log = server.SignalLog(base)
+    assert [r['id'] for r in log.pending()] == ['dead-99998']
+    assert not os.path.exists(tmp_path / 'wal.99998.jsonl')
+    assert os.path.exists(tmp_path / 'wal.99999.jsonl')
+    log.close()
+
+    # Nach dem Neustart gehoert der uebernommene Eintrag zum eigenen File
+    log = server.SignalLog(base)
+    assert [r['id'] for r in log.pending()] == ['dead-99998']
+    log.close()
+    live.close()
+
+
+def test_webhooks_wait_for_the_replay(monkeypatch):
+    monkeypatch.setattr(server, 'trader', object())
+    monkeypatch.setattr(server.trader_init, 'state', 'replaying')
+    response = server.app.test_client().post('/webhook', json={'signal': 'LONG', 'symbol': 'BTCUSDT'})
+    assert response.status_code == 503
+    assert server.app.test_client().get('/readyz').status_code == 503
@@ -0,0 +1,26 @@
+import pytest
+
+import binance_webhook_server as server
+
+
+def test_stream_consumer_requires_url_and_on_message():
+    with pytest.raises(TypeError):
+        server.StreamConsumer('plain')
+
+    class NoHandler(server.StreamConsumer):
+        def url(self):
+            return 'ws://localhost'
+
+    with pytest.raises(TypeError):
+        NoHandler('no-handler')
+
+
+def test_mark_price_stream_caches_latest_price():
+    stream = server.MarkPriceStream('ws://localhost')
+    stream.on_message([{'s': 'BTCUSDT', 'p': '65000.5'}, {'s': 'ETHUSDT', 'p': '3000'}])
+    stream.on_message([{'s': 'BTCUSDT', 'p': '65001.0'}])
+
+    assert stream.get('BTCUSDT') == 65001.0
+    assert stream.get('ETHUSDT') == 3000.0
+    assert stream.get('SOLUSDT') is None
+    assert stream.get('BTCUSDT', max_age=-1) is None
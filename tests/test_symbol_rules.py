@@ -0,0 +1,93 @@
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+import binance_webhook_server as server
+
+BTCUSDT = {
+    'symbol': 'BTCUSDT',
+    'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': '0.10', 'minPrice': '556.80', 'maxPrice': '4529764'},
+        {'filterType': 'LOT_SIZE', 'stepSize': '0.001', 'minQty': '0.001', 'maxQty': '1000'},
+        {'filterType': 'MARKET_LOT_SIZE', 'stepSize': '0.010', 'minQty': '0.010', 'maxQty': '120'},
+        {'filterType': 'MIN_NOTIONAL', 'notional': '100'},
+        {'filterType': 'PERCENT_PRICE', 'multiplierUp': '1.0500', 'multiplierDown': '0.9500'},
+    ]
+}
+
+
+@pytest.fixture
+def rules():
+    return server.SymbolRules(BTCUSDT)
+
+
+def test_prices_round_to_the_nearest_tick_without_float_error(rules):
+    assert rules.normalize_price(65000.04) == Decimal('65000.0')
+    assert rules.normalize_price(65000.05) == Decimal('65000.1')
+    assert rules.normalize_price('0.1') + rules.normalize_price('0.2') == Decimal('0.3')
+
+
+def test_quantities_round_down_to_the_limit_or_market_step(rules):
+    assert rules.normalize_quantity(0.0129) == Decimal('0.012')
+    assert rules.normalize_quantity(0.0129, market=True) == Decimal('0.01')
+    assert rules.normalize_quantity(0.0009) == 0
+
+
+def test_min_notional_quantity_rounds_up(rules):
+    assert rules.min_quantity_for_notional(65000) == Decimal('0.002')
+    assert rules.min_quantity_for_notional(1_000_000) == rules.min_qty
+
+
+@pytest.mark.parametrize('side, quantity, price, reduce_only, message', [
+    ('BUY', '0.0015', '65000.0', False, 'not a multiple of step'),
+    ('BUY', '0.001', '65000.05', False, 'not a multiple of tick'),
+    ('BUY', '0.001', '65000.0', False, 'notional'),
+    ('BUY', '0.002', '70000.0', False, 'above 1.0500 x mark'),
+    ('SELL', '0.002', '60000.0', False, 'below 0.9500 x mark'),
+    ('BUY', '121', None, False, 'above maxQty'),
+])
+def test_validate_rejects_what_binance_would(rules, side, quantity, price, reduce_only, message):
+    with pytest.raises(server.OrderRuleViolation, match=message):
+        rules.validate(side, quantity, price, mark_price='65000', reduce_only=reduce_only)
+
+
+def test_reduce_only_orders_skip_min_notional(rules):
+    rules.validate('SELL', '0.001', '65000.0', mark_price='65000', reduce_only=True)
+
+
+class SlowExchangeInfo:
+    """futures_exchange_info, das den Request eine Weile offen haelt und Aufrufe zaehlt"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def futures_exchange_info(self):
+        self.calls += 1
+        time.sleep(0.1)
+        return {'symbols': [BTCUSDT]}
+
+
+def test_concurrent_misses_share_one_exchange_info_request():
+    client = SlowExchangeInfo()
+    cache = server.SymbolInfoCache(client)
+    start = threading.Barrier(8)
+    found = []
+
+    def lookup():
+        start.wait()
+        found.append(cache.rules('BTCUSDT') is not None)
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == 1
+    assert found == [True] * 8
+
+    # Ein weiterer Miss innerhalb von EXCHANGE_INFO_MISS_REFRESH_SECONDS laedt nicht erneut
+    assert cache.rules('ETHUSDT') is None
+    assert client.calls == 1
@@ -0,0 +1,31 @@
+import threading
+import time
+
+import pytest
+
+import binance_webhook_server as server
+
+
+def background_threads():
+    return {t for t in threading.enumerate() if t.is_alive() and not t.name.startswith('pretrade')}
+
+
+def test_failed_init_stops_the_threads_it_started(mock):
+    before = background_threads()
+    mock.faults.configure(error_rate=1, error_paths=['account'])
+
+    with pytest.raises(Exception):
+        server.BinanceTrader()
+
+    deadline = time.monotonic() + 2
+    while background_threads() - before and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert background_threads() - before == set()
+
+
+def test_close_stops_scheduler_and_streams(trader):
+    fired = threading.Event()
+    trader.close()
+    trader.scheduler.schedule(0, fired.set)
+    assert not fired.wait(0.2)
+    assert trader.user_stream._stop.is_set() and trader.price_stream._stop.is_set()